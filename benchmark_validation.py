@@ -0,0 +1,140 @@
+"""
+Benchmark de validación de filas
+
+Compara filas/segundo de la validación anterior (que recorría los campos
+de la clase en cada fila) con el plan de validación compilado, usando un
+importador de 50 campos.
+
+Uso:
+    python benchmark_validation.py
+    python benchmark_validation.py --rows 50000
+"""
+import argparse
+import os
+import time
+from datetime import datetime, date
+from decimal import Decimal
+
+import django
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from flex_importer.base import FlexImporter
+
+
+FIELD_FACTORIES = [
+    lambda i: models.CharField(verbose_name=f'Texto {i}', max_length=50),
+    lambda i: models.IntegerField(verbose_name=f'Entero {i}'),
+    lambda i: models.DecimalField(verbose_name=f'Decimal {i}', max_digits=10, decimal_places=2),
+    lambda i: models.FloatField(verbose_name=f'Flotante {i}', blank=True),
+    lambda i: models.BooleanField(verbose_name=f'Booleano {i}'),
+    lambda i: models.DateField(verbose_name=f'Fecha {i}'),
+]
+
+SAMPLE_VALUES = ['texto', '42', '19.99', '3.5', 'si', '2026-01-15']
+
+
+def build_importer(field_count=50):
+    """Build an importer class with field_count fields of mixed types"""
+    attrs = {'__module__': __name__, '_abstract': True}
+    for i in range(field_count):
+        attrs[f'campo_{i}'] = FIELD_FACTORIES[i % len(FIELD_FACTORIES)](i)
+    return type('BenchmarkImporter', (FlexImporter,), attrs)
+
+
+def build_rows(row_count, field_count=50):
+    """Build rows keyed by field name with string values, as read from a CSV"""
+    row = {f'campo_{i}': SAMPLE_VALUES[i % len(SAMPLE_VALUES)] for i in range(field_count)}
+    return [dict(row) for _ in range(row_count)]
+
+
+def legacy_convert(value, field_type):
+    """Type conversion as done before the validation plan (if/elif ladder)"""
+    try:
+        if field_type == 'integer':
+            return int(value)
+        elif field_type == 'float':
+            return float(value)
+        elif field_type == 'decimal':
+            return Decimal(str(value))
+        elif field_type == 'boolean':
+            if isinstance(value, bool):
+                return value
+            return str(value).lower() in ('true', 'yes', 'si', 'sí', '1', 't')
+        elif field_type == 'date':
+            if isinstance(value, date):
+                return value
+            return datetime.strptime(str(value), '%Y-%m-%d').date()
+        elif field_type == 'datetime':
+            if isinstance(value, datetime):
+                return value
+            return datetime.fromisoformat(str(value))
+        else:
+            return str(value)
+    except Exception:
+        raise ValidationError(f"No se pudo convertir el valor '{value}' al tipo {field_type}")
+
+
+def legacy_validate_row(importer_class, row_data):
+    """Row validation as done before the validation plan (introspection per row)"""
+    errors = []
+    validated_data = {}
+
+    for info in importer_class.get_field_info():
+        value = row_data.get(info['name']) or row_data.get(info['verbose_name'])
+
+        if info['required'] and (value is None or value == ''):
+            errors.append(f"El campo '{info['verbose_name']}' es requerido")
+            continue
+
+        if value is not None and value != '':
+            try:
+                validated_data[info['name']] = legacy_convert(value, info['type'])
+            except (ValueError, ValidationError) as e:
+                errors.append(f"Error en campo '{info['verbose_name']}': {str(e)}")
+        else:
+            validated_data[info['name']] = None
+
+    return validated_data, errors
+
+
+def measure(label, validate, rows):
+    """Run validate over rows and print rows per second"""
+    start = time.perf_counter()
+    for row in rows:
+        validate(row)
+    elapsed = time.perf_counter() - start
+    rate = len(rows) / elapsed
+    print(f"   {label:<12} {elapsed:8.3f} s   {rate:12,.0f} filas/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de validación de filas')
+    parser.add_argument('--rows', type=int, default=20000, help='Número de filas (default: 20000)')
+    parser.add_argument('--fields', type=int, default=50, help='Número de campos (default: 50)')
+    args = parser.parse_args()
+
+    importer_class = build_importer(args.fields)
+    rows = build_rows(args.rows, args.fields)
+
+    # Both paths must produce the same result
+    assert legacy_validate_row(importer_class, rows[0]) == importer_class.validate_row(rows[0])
+
+    print("=" * 60)
+    print(f"VALIDACIÓN: {args.rows} filas x {args.fields} campos")
+    print("=" * 60)
+
+    before = measure('Anterior', lambda row: legacy_validate_row(importer_class, row), rows)
+    after = measure('Plan', importer_class.validate_row, rows)
+
+    print("-" * 60)
+    print(f"   Mejora plan: {after / before:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -53,6 +53,25 @@ class SalesImporter(FlexImporter):
         except Exception as e:
             return f"Error al crear venta: {str(e)}"
 
+    def import_batch(self, rows):
+        """
+        Create the sales of a batch with a single bulk_create.
+
+        If the insert fails, the processor splits the batch and retries the
+        halves, so only the failing rows are reported as errors.
+        """
+        Sale.objects.bulk_create([
+            Sale(
+                date=row_data['date'],
+                cliente=row_data['cliente'],
+                producto=row_data['producto'],
+                cantidad=row_data['cantidad'] if row_data.get('cantidad') is not None else 1,
+                precio=row_data['precio']
+            )
+            for row_data in rows
+        ])
+        return ['created'] * len(rows)
+
 
 class SalesModelImporter(FlexModelImporter):
     """
@@ -148,4 +167,13 @@ class ProductModelImporter(FlexModelImporter):
             return result  # Returns {'instance': instance, 'action': 'created'/'updated'}
 
         except Exception as e:
-            return f"Error al guardar producto: {str(e)}"
\ No newline at end of file
+            return f"Error al guardar producto: {str(e)}"
+
+    def import_batch(self, rows):
+        """
+        Upsert a whole batch by 'sku' with set-based queries.
+
+        save_instances preloads the existing SKUs with one query and writes
+        the batch with bulk operations, returning 'created'/'updated' per row.
+        """
+        return self.save_instances(rows)
\ No newline at end of file
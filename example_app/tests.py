@@ -1,11 +1,58 @@
 """
 Tests for FlexImporter and FlexModelImporter
 """
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from asgiref.sync import sync_to_async
+from datetime import date, datetime
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, models
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
 from decimal import Decimal
-from .models import Sale
-from .importers import SalesImporter, SalesModelImporter
+from openpyxl import Workbook, load_workbook
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+from flex_importer import tasks
+from flex_importer.admin import PROGRESS_STREAM_SUPPORTED, ImportJobAdmin
+from flex_importer.base import FlexImporter
+from flex_importer.dates import DateParser
+from flex_importer.models import ImportJob, ImportRowError
+from flex_importer.processor import ImportProcessor
+from flex_importer.progress import get_progress_channel
+from flex_importer.readers import CSVReader, JSONLReader, JSONReader, JSONStream, XLSXReader, reader_registry
+from .models import Product, Sale
+from .importers import ProductModelImporter, SalesImporter, SalesModelImporter
+
+
+def write_temp_file(suffix, content):
+    """Write content to a temporary file and return its path"""
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(content)
+    return path
+
+
+def write_temp_xlsx(rows):
+    """Write rows to a temporary workbook and return its path"""
+    wb = Workbook()
+    ws = wb.active
+    for row in rows:
+        ws.append(row)
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    wb.save(path)
+    return path
 
 
 class FlexImporterTestCase(TestCase):
@@ -40,6 +87,113 @@ class FlexImporterTestCase(TestCase):
         self.assertEqual(validated_data['cantidad'], 5)
         self.assertEqual(validated_data['precio'], Decimal('29.99'))
 
+    def test_validation_plan_is_cached_per_class(self):
+        """Test the compiled validation plan is built once for each importer class"""
+        plan = SalesImporter.get_validation_plan()
+
+        self.assertIs(SalesImporter.get_validation_plan(), plan)
+        self.assertIsNot(SalesModelImporter.get_validation_plan(), plan)
+        self.assertEqual(plan.field_name_map['Nombre del Cliente'], 'cliente')
+        self.assertEqual(
+            plan.header_index(['Precio Unitario', 'Otro', 'cliente']),
+            {0: 'precio', 2: 'cliente'}
+        )
+
+    def test_validation_plan_field_types(self):
+        """Test subclass field types win over their base classes"""
+        types = {name: field_type for name, _, _, field_type, _ in SalesImporter.get_validation_plan().fields}
+
+        self.assertEqual(types['date'], 'datetime')
+        self.assertEqual(types['producto'], 'integer')
+
+    def test_validation_keeps_zero_values(self):
+        """Test falsy values such as 0 are validated instead of treated as missing"""
+        row_data = {
+            'date': timezone.now(),
+            'cliente': 'Ana',
+            'producto': 0,
+            'cantidad': 0,
+            'precio': 0,
+        }
+
+        validated_data, errors = SalesImporter.validate_row(row_data)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(validated_data['producto'], 0)
+        self.assertEqual(validated_data['precio'], Decimal('0'))
+
+    def test_validation_error_message(self):
+        """Test conversion errors keep the 'Error en campo' message"""
+        row_data = {'date': timezone.now(), 'cliente': 'Ana', 'producto': 'abc', 'precio': '1'}
+
+        validated_data, errors = SalesImporter.validate_row(row_data)
+
+        self.assertEqual(errors, [
+            "Error en campo 'ID del Producto': "
+            "[\"No se pudo convertir el valor 'abc' al tipo integer\"]"
+        ])
+
+    def test_date_parser_values(self):
+        """Test ISO strings, Excel serial numbers and native cells are converted"""
+        parser = DateParser()
+
+        self.assertEqual(parser.to_date('2026-01-15'), date(2026, 1, 15))
+        self.assertEqual(parser.to_date('2026-1-5'), date(2026, 1, 5))
+        self.assertEqual(parser.to_date(datetime(2026, 1, 15, 10, 30)), date(2026, 1, 15))
+        self.assertEqual(parser.to_date(46037), date(2026, 1, 15))
+        self.assertEqual(parser.to_datetime('2026-01-15 10:30:00'), datetime(2026, 1, 15, 10, 30))
+        self.assertIsNotNone(parser.to_datetime('2026-01-15T10:30:00+00:00').tzinfo)
+        self.assertEqual(parser.to_datetime(46037.5), datetime(2026, 1, 15, 12, 0))
+        self.assertEqual(parser.to_datetime(date(2026, 1, 15)), datetime(2026, 1, 15))
+
+        with self.assertRaises(ValueError):
+            parser.to_date('15/01/2026')
+        with self.assertRaises(ValueError):
+            parser.to_date('2026-01-15 10:30:00')
+        with self.assertRaises(ValueError):
+            parser.to_date(0.5)
+
+    def test_date_parser_formats_and_cache(self):
+        """Test extra formats are accepted and repeated strings hit the cache"""
+        parser = DateParser(['%d/%m/%Y', '%d/%m/%y %H:%M', '%d de %B de %Y'])
+
+        self.assertEqual(parser.to_date('15/01/2026'), date(2026, 1, 15))
+        self.assertEqual(parser.to_datetime('15/01/26 08:05'), datetime(2026, 1, 15, 8, 5))
+        self.assertEqual(parser.to_date('15 de January de 2026'), date(2026, 1, 15))
+        self.assertEqual(parser.to_date('2026-01-15'), date(2026, 1, 15))
+
+        for _ in range(3):
+            parser.to_date('16/01/2026')
+
+        self.assertEqual(parser.cache_info()['date'].hits, 2)
+
+    def test_date_parser_out_of_range_iso_layout(self):
+        """Test an ISO-shaped value with out-of-range parts still reaches the declared formats"""
+        parser = DateParser(['%Y-%d-%m', '%Y-%d-%m %H:%M:%S'])
+
+        self.assertEqual(parser.to_date('2026-25-12'), date(2026, 12, 25))
+        self.assertEqual(parser.to_datetime('2026-25-12 10:30:00'), datetime(2026, 12, 25, 10, 30))
+        with self.assertRaises(ValueError):
+            DateParser().to_date('2026-25-12')
+
+    def test_meta_date_formats(self):
+        """Test Meta.date_formats is used by validate_row"""
+        class DayFirstImporter(FlexImporter):
+            _abstract = True
+            fecha = models.DateField(verbose_name='Fecha')
+
+            class Meta:
+                date_formats = ['%d/%m/%Y']
+
+        validated_data, errors = DayFirstImporter.validate_row({'fecha': '31/12/2025'})
+        self.assertEqual(errors, [])
+        self.assertEqual(validated_data['fecha'], date(2025, 12, 31))
+
+        validated_data, errors = SalesImporter.validate_row(
+            {'date': '31/12/2025', 'cliente': 'Ana', 'producto': '1', 'precio': '1'}
+        )
+        self.assertEqual(len(errors), 1)
+
     def test_sales_importer_import_action(self):
         """Test import action creates Sale"""
         importer = SalesImporter()
@@ -164,6 +318,72 @@ class FlexModelImporterTestCase(TestCase):
         self.assertEqual(sale2.cliente, 'Updated Cliente')
         self.assertEqual(sale2.cantidad, 10)
 
+    @skipUnless(getattr(connection.features, 'supports_update_conflicts_with_target', False),
+                'La base de datos (o Django < 4.1) no soporta INSERT ... ON CONFLICT')
+    def test_save_instances_native_upsert(self):
+        """Test a batch keyed on a unique field is written with one upsert statement"""
+        Product.objects.create(sku='A1', nombre='Viejo', precio=Decimal('1.00'), stock=1)
+        rows = [
+            {'sku': 'A1', 'nombre': 'Nuevo', 'precio': Decimal('2.00'), 'stock': 5},
+            {'sku': 'B2', 'nombre': 'Otro', 'precio': Decimal('3.00'), 'stock': 1},
+            {'sku': 'B2', 'nombre': 'Otro bis', 'precio': Decimal('3.50'), 'stock': 2},
+        ]
+
+        # SELECT existing keys + SAVEPOINT + INSERT ... ON CONFLICT + RELEASE
+        with self.assertNumQueries(4):
+            outcomes = ProductModelImporter.save_instances(rows)
+
+        self.assertEqual([outcome['action'] for outcome in outcomes], ['updated', 'created', 'updated'])
+        self.assertEqual(Product.objects.count(), 2)
+        self.assertEqual(Product.objects.get(sku='A1').nombre, 'Nuevo')
+        self.assertEqual(Product.objects.get(sku='B2').stock, 2)
+
+    def test_save_instances_without_native_upsert(self):
+        """Test a unique key_field falls back to bulk_create/bulk_update without the upsert feature flag"""
+        Product.objects.create(sku='A1', nombre='Viejo', precio=Decimal('1.00'), stock=1)
+        rows = [
+            {'sku': 'A1', 'nombre': 'Nuevo', 'precio': Decimal('2.00'), 'stock': 5},
+            {'sku': 'B2', 'nombre': 'Otro', 'precio': Decimal('3.00'), 'stock': 1},
+        ]
+        # Django < 4.1 has no supports_update_conflicts_with_target
+        old_features = {'default': SimpleNamespace(features=SimpleNamespace())}
+
+        with mock.patch('flex_importer.model_importer.connections', old_features):
+            outcomes = ProductModelImporter.save_instances(rows)
+
+        self.assertEqual([outcome['action'] for outcome in outcomes], ['updated', 'created'])
+        self.assertEqual(Product.objects.get(sku='A1').nombre, 'Nuevo')
+        self.assertTrue(Product.objects.filter(sku='B2').exists())
+
+    def test_save_instances_bulk_update(self):
+        """Test a non-unique key_field is split into bulk_create and bulk_update"""
+        now = timezone.now()
+        existing = Sale.objects.create(date=now, cliente='Ana', producto=1, cantidad=1, precio=Decimal('1'))
+        Sale.objects.create(date=now, cliente='Dup', producto=9, cantidad=1, precio=Decimal('1'))
+        Sale.objects.create(date=now, cliente='Dup', producto=9, cantidad=1, precio=Decimal('1'))
+        rows = [
+            {'date': now, 'cliente': 'Ana María', 'producto': 1, 'cantidad': 3, 'precio': Decimal('2')},
+            {'date': now, 'cliente': 'Luis', 'producto': 2, 'cantidad': 1, 'precio': Decimal('5')},
+            {'date': now, 'cliente': 'Eva', 'producto': 9, 'cantidad': 1, 'precio': Decimal('5')},
+        ]
+
+        outcomes = SalesModelImporter.save_instances(rows)
+
+        self.assertEqual([outcome['action'] for outcome in outcomes[:2]], ['updated', 'created'])
+        self.assertIsInstance(outcomes[2], Exception)
+        self.assertEqual(outcomes[0]['instance'].pk, existing.pk)
+        existing.refresh_from_db()
+        self.assertEqual((existing.cliente, existing.cantidad), ('Ana María', 3))
+        self.assertEqual(Sale.objects.filter(producto=2).count(), 1)
+        self.assertFalse(Sale.objects.filter(cliente='Eva').exists())
+
+    def test_generate_template_jsonl(self):
+        """Test the JSONL template holds one example object per line"""
+        lines = SalesModelImporter.generate_template_jsonl().read().decode('utf-8').splitlines()
+
+        self.assertEqual(len(lines), 1)
+        self.assertIn('producto', json.loads(lines[0]))
+
     def test_model_importer_validation_same_as_regular(self):
         """Test that validation works the same for both importers"""
         test_date = timezone.now()
@@ -181,3 +401,1356 @@ class FlexModelImporterTestCase(TestCase):
         self.assertEqual(len(errors1), len(errors2))
         self.assertEqual(validated1['producto'], validated2['producto'])
         self.assertEqual(validated1['cantidad'], validated2['cantidad'])
+
+
+class UppercaseCSVReader(CSVReader):
+    """CSV reader used to test FLEX_IMPORTER_READERS overrides"""
+
+    def __iter__(self):
+        for row in super().__iter__():
+            yield {key: value.upper() if isinstance(value, str) else value for key, value in row.items()}
+
+
+class ReaderTestCase(TestCase):
+    """Test streaming file readers"""
+
+    def test_xlsx_reader_streams_rows(self):
+        """Test XLSX reader strips headers, skips blank rows and numbers rows"""
+        path = write_temp_xlsx([
+            ['Cliente *', 'Cantidad'],
+            ['Ana', 1],
+            [None, None],
+            ['Luis', 2],
+        ])
+        self.addCleanup(os.remove, path)
+
+        reader = XLSXReader(path)
+        rows = iter(reader)
+
+        self.assertEqual(next(rows), {'Cliente': 'Ana', 'Cantidad': 1, '_row_number': 2})
+        self.assertEqual(next(rows), {'Cliente': 'Luis', 'Cantidad': 2, '_row_number': 4})
+        self.assertIsNone(next(rows, None))
+        self.assertEqual(reader.estimate_total(), 3)
+
+    def test_xlsx_reader_without_dimensions(self):
+        """Test the row estimate is unknown when the sheet has no stored dimensions"""
+        path = write_temp_xlsx([['Cliente *'], ['Ana']])
+        self.addCleanup(os.remove, path)
+
+        with mock.patch('openpyxl.worksheet._read_only.ReadOnlyWorksheet.max_row',
+                        new_callable=mock.PropertyMock, return_value=None):
+            self.assertIsNone(XLSXReader(path).estimate_total())
+
+    def test_xlsx_reader_header_row(self):
+        """Test XLSX reader honors a custom header row"""
+        path = write_temp_xlsx([
+            ['Reporte de ventas'],
+            ['Cliente *', 'Cantidad'],
+            ['Ana', 1],
+        ])
+        self.addCleanup(os.remove, path)
+
+        rows = list(XLSXReader(path, header_row=2))
+
+        self.assertEqual(rows, [{'Cliente': 'Ana', 'Cantidad': 1, '_row_number': 3}])
+
+    def test_iter_batches(self):
+        """Test readers yield fixed-size batches with their row numbers"""
+        path = write_temp_file('.csv', b'a\n1\n2\n\n3\n4\n5\n')
+        self.addCleanup(os.remove, path)
+
+        batches = list(CSVReader(path).iter_batches(2))
+
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(batches[1].row_numbers, [4, 5])
+        self.assertEqual(batches[1].rows, [{'a': '3'}, {'a': '4'}])
+
+    def test_iter_selected_matches_full_iteration(self):
+        """Test readers only yield the selected row numbers, numbered like a full read"""
+        csv_path = write_temp_file('.csv', b'a,b\n1,x\n2,"y\nz"\n\n3,w\n4,v\n')
+        jsonl_path = write_temp_file('.jsonl', b'{"a": 1}\n{"a": 2}\n\n{"a": 3}\n')
+        broken_jsonl_path = write_temp_file('.jsonl', b'{"a": 1}\n{"a": 2}\nnot json\n')
+        xlsx_path = write_temp_xlsx([['a'], [1], [2], [None], [3], [4]])
+        for path in (csv_path, jsonl_path, broken_jsonl_path, xlsx_path):
+            self.addCleanup(os.remove, path)
+
+        for reader, selected in [
+            (CSVReader(csv_path), {3, 4}),
+            (JSONLReader(jsonl_path), {2, 4}),
+            (XLSXReader(xlsx_path), {3, 5}),
+        ]:
+            with self.subTest(reader=type(reader).__name__):
+                expected = [row for row in reader if row['_row_number'] in selected]
+                self.assertEqual(len(expected), 2)
+                self.assertEqual(list(reader.iter_selected(selected)), expected)
+
+        # Lines after the last selected one are never decoded
+        self.assertEqual(len(list(JSONLReader(broken_jsonl_path).iter_selected({1, 2}))), 2)
+
+    def test_iter_after_skips_to_checkpoint(self):
+        """Test readers resume after a row number with the numbering of a full read"""
+        csv_path = write_temp_file('.csv', b'a\n1\n2\n\n3\n4\n')
+        jsonl_path = write_temp_file('.jsonl', b'{"a": 1}\n{"a": 2}\n\n{"a": 3}\n')
+        xlsx_path = write_temp_xlsx([['a'], [1], [2], [None], [3], [4]])
+        for path in (csv_path, jsonl_path, xlsx_path):
+            self.addCleanup(os.remove, path)
+
+        for reader, checkpoint in [
+            (CSVReader(csv_path), 3),
+            (JSONLReader(jsonl_path), 1),
+            (XLSXReader(xlsx_path), 3),
+        ]:
+            with self.subTest(reader=type(reader).__name__):
+                expected = [row for row in reader if row['_row_number'] > checkpoint]
+                self.assertEqual(len(expected), 2)
+                self.assertEqual(list(reader.iter_after(checkpoint)), expected)
+
+    def test_reader_registry(self):
+        """Test built-in formats are registered and can be overridden by settings"""
+        self.assertIs(reader_registry.get_reader('jsonl'), JSONLReader)
+        self.assertIn(('xlsx', 'Excel (XLSX)'), reader_registry.get_format_choices())
+
+        with override_settings(FLEX_IMPORTER_READERS={'csv': 'example_app.tests.UppercaseCSVReader'}):
+            self.assertIs(reader_registry.get_reader('csv'), UppercaseCSVReader)
+
+        reader_registry.register('tsv', verbose_name='TSV')(UppercaseCSVReader)
+        self.addCleanup(reader_registry._registry.pop, 'tsv')
+        self.assertIs(reader_registry.get_reader('tsv'), UppercaseCSVReader)
+
+    def test_json_reader_streams_both_shapes(self):
+        """Test JSON reader decodes rows across tiny chunks for both shapes"""
+        documents = [
+            b'[{"a": 12345, "b": "x y"}, {"a": 67890, "b": "[]"}]',
+            b'{"template_info": {"fields": [1, 2]}, "data": [{"a": 12345, "b": "x y"},\n'
+            b' {"a": 67890, "b": "[]"}], "extra": true}',
+        ]
+        expected = [
+            {'a': 12345, 'b': 'x y', '_row_number': 1},
+            {'a': 67890, 'b': '[]', '_row_number': 2},
+        ]
+
+        for content in documents:
+            path = write_temp_file('.json', content)
+            self.addCleanup(os.remove, path)
+            self.assertEqual(list(JSONReader(path, chunk_size=3)), expected)
+
+    def test_json_reader_numbers_cut_by_chunks(self):
+        """Test top-level numbers split across chunk boundaries ("12." / "1e") are decoded whole"""
+        path = write_temp_file('.json', b'{"total": 12.5, "version": 1e3, "data": [{"a": 1}], "pages": -2E+1}')
+        self.addCleanup(os.remove, path)
+
+        for chunk_size in range(1, 70):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(JSONReader(path, chunk_size=chunk_size)), [{'a': 1, '_row_number': 1}])
+
+    def test_json_reader_fails_fast_on_malformed_row(self):
+        """Test a malformed row is reported at its file position without reading the rest of the file"""
+        content = '[{"a": 1},\n {"a": 2 "b": 3},\n' + ',\n'.join('{"a": %d}' % n for n in range(20000)) + ']'
+
+        for chunk_size in (1, 7, 64, 4096):
+            with self.subTest(chunk_size=chunk_size):
+                f = io.StringIO(content)
+                stream = JSONStream(f, chunk_size=chunk_size)
+                with self.assertRaisesMessage(ValueError, "la línea 2, columna 10: Expecting ',' delimiter"):
+                    list(stream.iter_rows())
+                self.assertLess(f.tell(), 8192)
+
+    def test_json_reader_rejects_rows_over_max_size(self):
+        """Test a row larger than max_row_size is rejected instead of being buffered"""
+        path = write_temp_file('.json', b'[{"a": "x"}, {"a": "' + b'x' * 5000 + b'"}]')
+        self.addCleanup(os.remove, path)
+
+        self.assertEqual(len(list(JSONReader(path, chunk_size=16, max_row_size=10000))), 2)
+        with self.assertRaisesMessage(ValueError, 'supera el tamaño máximo de 1000 caracteres'):
+            list(JSONReader(path, chunk_size=16, max_row_size=1000))
+
+    def test_jsonl_reader_numbers_lines(self):
+        """Test JSONL reader skips blank lines and keeps line numbers"""
+        path = write_temp_file('.jsonl', b'{"a": 1}\n\n{"a": 2}\n{"a": 3}')
+        self.addCleanup(os.remove, path)
+
+        rows = list(JSONLReader(path))
+
+        self.assertEqual([row['_row_number'] for row in rows], [1, 3, 4])
+        self.assertEqual([row['a'] for row in rows], [1, 2, 3])
+
+    def test_jsonl_reader_split_ranges(self):
+        """Test byte ranges cover every line exactly once with the same numbering"""
+        content = b''.join(b'{"n": %d, "pad": "%s"}\n' % (n, b'x' * (n % 7)) for n in range(1, 51))
+        path = write_temp_file('.jsonl', content)
+        self.addCleanup(os.remove, path)
+
+        ranges = JSONLReader.split_ranges(path, 4)
+        rows = []
+        for start, end, first_line in ranges:
+            rows.extend(JSONLReader(path, start=start, end=end, first_line=first_line))
+
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual(rows, list(JSONLReader(path)))
+        self.assertEqual([row['_row_number'] for row in rows], [row['n'] for row in rows])
+
+    def test_csv_reader_split_ranges(self):
+        """Test byte ranges split CSV files between records, never inside a quoted line break"""
+        content = 'n,nota\n' + ''.join(
+            f'{n},"línea\npartida {n}"\n' if n % 3 else f'{n},simple\n\n' for n in range(1, 41)
+        )
+        path = write_temp_file('.csv', content.encode('utf-8'))
+        self.addCleanup(os.remove, path)
+
+        ranges = CSVReader.split_ranges(path, 4)
+        rows = []
+        for start, end, first_row in ranges:
+            rows.extend(CSVReader(path, start=start, end=end, first_row=first_row))
+
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual(rows, list(CSVReader(path)))
+        self.assertEqual([row['n'] for row in rows], [str(n) for n in range(1, 41)])
+
+    def test_json_reader_rejects_invalid_shape(self):
+        """Test JSON reader rejects objects without a "data" list"""
+        for content in [b'{"rows": []}', b'{"data": {}}', b'"text"']:
+            path = write_temp_file('.json', content)
+            self.addCleanup(os.remove, path)
+            with self.assertRaises(ValueError):
+                list(JSONReader(path))
+
+
+class ImportProcessorTestCase(TestCase):
+    """Test end-to-end processing of uploaded files"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def create_job(self, file_format, content, filename=None, importer=SalesImporter):
+        """Create an ImportJob for the given file content"""
+        return ImportJob.objects.create(
+            importer_class=f'{importer.__module__}.{importer.__name__}',
+            importer_name=importer.get_verbose_name(),
+            file_format=file_format,
+            uploaded_file=SimpleUploadedFile(filename or f'data.{file_format}', content),
+        )
+
+    def test_process_csv(self):
+        """Test a CSV import with a validation error"""
+        content = (
+            'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+            '2026-01-01,Ana,1,2,10.50\n'
+            '\n'
+            '2026-01-02,Luis,abc,1,5.00\n'
+        ).encode('utf-8')
+        job = self.create_job('csv', content)
+
+        self.assertTrue(ImportProcessor(job).process())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'partial')
+        self.assertEqual(job.total_rows, 2)
+        self.assertEqual(job.success_rows, 1)
+        self.assertEqual(job.error_rows, 1)
+        self.assertEqual(job.error_details[0]['row'], 3)
+        self.assertEqual(Sale.objects.get().cliente, 'Ana')
+
+    def test_process_json(self):
+        """Test a JSON import with a "data" property"""
+        content = (
+            '{"data": [{"date": "2026-01-01", "cliente": "Ana", '
+            '"producto": 1, "precio": "10.50"}]}'
+        ).encode('utf-8')
+        job = self.create_job('json', content)
+
+        self.assertTrue(ImportProcessor(job).process())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'success')
+        self.assertEqual(job.total_rows, 1)
+        self.assertEqual(Sale.objects.get().cantidad, 1)
+
+    def test_process_gzip_csv(self):
+        """Test a gzip-compressed CSV is decompressed while reading"""
+        content = gzip.compress(
+            'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+            '2026-01-01,Ana,1,2,10.50\n'.encode('utf-8')
+        )
+        job = self.create_job('csv', content, filename='ventas.csv.gz')
+
+        self.assertTrue(ImportProcessor(job).process())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'success')
+        self.assertEqual(Sale.objects.get().cliente, 'Ana')
+
+    def test_process_zip_members(self):
+        """Test a zip with several members is one import with per-member row numbers"""
+        header = 'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('enero.csv', header + '2026-01-01,Ana,1,2,10.50\n')
+            archive.writestr('febrero.csv', header + '2026-02-01,Luis,x,1,5.00\n')
+            archive.writestr('LEEME.txt', 'ignorado')
+        job = self.create_job('csv', buffer.getvalue(), filename='ventas.zip')
+
+        self.assertTrue(ImportProcessor(job).process())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'partial')
+        self.assertEqual(job.processed_rows, 2)
+        self.assertEqual(job.error_details[0]['file'], 'febrero.csv')
+        self.assertEqual(job.error_details[0]['row'], 2)
+
+    def test_process_jsonl(self):
+        """Test a JSON Lines import reports line numbers in errors"""
+        content = (
+            '{"date": "2026-01-01", "cliente": "Ana", "producto": 1, "precio": "10.50"}\n'
+            '\n'
+            '{"date": "2026-01-01", "cliente": "Luis", "producto": 2}\n'
+        ).encode('utf-8')
+        job = self.create_job('jsonl', content)
+
+        self.assertTrue(ImportProcessor(job).process())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'partial')
+        self.assertEqual(job.total_rows, 2)
+        self.assertEqual(job.error_details[0]['row'], 3)
+
+    @override_settings(FLEX_IMPORTER_BATCH_SIZE=2)
+    def test_import_batch_per_batch(self):
+        """Test valid rows are imported with one import_batch call per batch"""
+        content = (
+            'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+            '2026-01-01,Ana,1,2,10.50\n'
+            '2026-01-01,Luis,x,1,5.00\n'
+            '2026-01-02,Eva,3,,7.00\n'
+            '2026-01-03,Juan,4,1,1.00\n'
+            '2026-01-04,Rosa,5,1,2.00\n'
+        ).encode('utf-8')
+        job = self.create_job('csv', content)
+
+        with mock.patch.object(
+            SalesImporter, 'import_batch', autospec=True, side_effect=SalesImporter.import_batch
+        ) as import_batch:
+            self.assertTrue(ImportProcessor(job).process())
+
+        self.assertEqual([len(call.args[1]) for call in import_batch.call_args_list], [1, 2, 1])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'partial')
+        self.assertEqual(job.created_rows, 4)
+        self.assertEqual(job.error_details[0]['row'], 3)
+        self.assertEqual(Sale.objects.get(cliente='Eva').cantidad, 1)
+
+    def test_import_batch_defaults_to_import_action(self):
+        """Test importers defining only import_action keep their per-row outcomes"""
+        Sale.objects.create(date=timezone.now(), cliente='Ana', producto=1, cantidad=1, precio=Decimal('1'))
+        content = (
+            '[{"date": "2026-01-01", "cliente": "Ana", "producto": 1, "cantidad": 1, "precio": "10.50"},'
+            ' {"date": "2026-01-01", "cliente": "Luis", "producto": 2, "cantidad": 1, "precio": "5.00"}]'
+        ).encode('utf-8')
+        job = self.create_job('json', content, importer=SalesModelImporter)
+
+        self.assertTrue(ImportProcessor(job).process())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'success')
+        self.assertEqual((job.created_rows, job.updated_rows), (1, 1))
+
+    def test_import_batch_exception_fails_batch_rows(self):
+        """Test an exception raised by import_batch is recorded for each row of the batch"""
+        content = (
+            '{"date": "2026-01-01", "cliente": "Ana", "producto": 1, "precio": "10.50"}\n'
+            '{"date": "2026-01-01", "cliente": "Luis", "producto": 2, "precio": "5.00"}\n'
+        ).encode('utf-8')
+        job = self.create_job('jsonl', content)
+
+        with mock.patch.object(SalesImporter, 'import_batch', side_effect=RuntimeError('sin conexión')):
+            self.assertTrue(ImportProcessor(job).process())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error_rows, 2)
+        self.assertEqual(job.error_details[1]['errors'], ['Excepción: sin conexión'])
+
+    def test_process_model_importer_upsert(self):
+        """Test re-running a keyed model import reports created and updated rows"""
+        Product.objects.create(sku='A1', nombre='Viejo', precio=Decimal('1.00'), stock=1)
+        content = (
+            'SKU *,Nombre del Producto *,Precio *,Stock Inicial *\n'
+            'A1,Teclado,25.00,10\n'
+            'B2,Ratón,9.90,30\n'
+        ).encode('utf-8')
+        job = self.create_job('csv', content, importer=ProductModelImporter)
+
+        self.assertTrue(ImportProcessor(job).process())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'success')
+        self.assertEqual((job.created_rows, job.updated_rows), (1, 1))
+        self.assertEqual(Product.objects.get(sku='A1').nombre, 'Teclado')
+
+    def import_with_errors(self):
+        """Import a CSV where the second and third rows fail validation"""
+        content = (
+            'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+            '2026-01-01,Ana,1,2,10.50\n'
+            '2026-01-02,Luis,abc,1,5.00\n'
+            '2026-01-03,Eva,3,1,\n'
+        ).encode('utf-8')
+        job = self.create_job('csv', content)
+        # Like a job created by the admin upload from SalesImporter.Meta
+        job.can_re_run = SalesImporter.can_re_run()
+        ImportProcessor(job).process()
+        return job
+
+    def download_failed_rows(self, job, file_format):
+        """Download the failed rows export of a job from the admin"""
+        user, _ = User.objects.get_or_create(username='admin', defaults={'is_staff': True, 'is_superuser': True})
+        self.client.force_login(user)
+        response = self.client.get(reverse('admin:flex_importer_failed_rows', args=[job.pk]), {'format': file_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_failed_rows_csv_export_can_be_reimported(self):
+        """Test the CSV export has the template headers, an error column and re-imports once fixed"""
+        job = self.import_with_errors()
+
+        content = self.download_failed_rows(job, 'csv').decode('utf-8-sig')
+
+        lines = content.splitlines()
+        self.assertEqual(lines[0], 'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *,Errores')
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith('2026-01-02,Luis,abc,1,5.00,'))
+        self.assertIn('ID del Producto', lines[1])
+
+        fixed = content.replace(',abc,', ',2,').replace('2026-01-03,Eva,3,1,,', '2026-01-03,Eva,3,1,7.00,')
+        retry_job = self.create_job('csv', fixed.encode('utf-8'))
+        ImportProcessor(retry_job).process()
+        retry_job.refresh_from_db()
+        self.assertEqual(retry_job.status, 'success')
+        self.assertEqual(retry_job.success_rows, 2)
+
+    def test_failed_rows_xlsx_and_jsonl_export(self):
+        """Test the Excel and JSON Lines exports of the failed rows"""
+        job = self.import_with_errors()
+
+        wb = load_workbook(io.BytesIO(self.download_failed_rows(job, 'xlsx')), read_only=True)
+        rows = list(wb.active.iter_rows(values_only=True))
+        self.assertEqual(rows[0][-1], 'Errores')
+        self.assertEqual(rows[1][:3], ('2026-01-02', 'Luis', 'abc'))
+        self.assertEqual(len(rows), 3)
+
+        lines = self.download_failed_rows(job, 'jsonl').decode('utf-8').splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['cliente'] for row in rows], ['Luis', 'Eva'])
+        self.assertEqual(rows[1]['_errores'], ["El campo 'Precio Unitario' es requerido"])
+
+    def test_failed_rows_export_reads_original_file(self):
+        """Test errors stored without data take their row from the uploaded file"""
+        job = self.import_with_errors()
+        job.row_errors.update(data=None)
+
+        lines = self.download_failed_rows(job, 'csv').decode('utf-8-sig').splitlines()
+
+        self.assertTrue(lines[1].startswith('2026-01-02,Luis,abc,1,5.00,'))
+        self.assertTrue(lines[2].startswith('2026-01-03,Eva,3,1,,'))
+
+    def test_retry_failed_rows(self):
+        """Test a retry job only processes the failed rows and reports to the parent job"""
+        job = self.import_with_errors()
+        user, _ = User.objects.get_or_create(username='admin', defaults={'is_staff': True, 'is_superuser': True})
+        self.client.force_login(user)
+
+        with mock.patch('flex_importer.admin.should_use_async', return_value=False), \
+                mock.patch.object(ImportProcessor, '_process_batches', autospec=True,
+                                  side_effect=ImportProcessor._process_batches) as process_batches:
+            response = self.client.get(reverse('admin:flex_importer_retry_failed', args=[job.pk]))
+
+        retry_job = ImportJob.objects.get(parent_job=job)
+        self.assertRedirects(response, reverse('admin:flex_importer_importjob_change', args=[retry_job.pk]))
+        self.assertEqual(retry_job.total_rows, 2)
+        self.assertEqual(retry_job.processed_rows, 2)
+        self.assertEqual(retry_job.error_rows, 2)
+        self.assertEqual(process_batches.call_count, 1)
+        self.assertEqual(
+            sorted(retry_job.row_errors.values_list('row_number', flat=True)),
+            sorted(job.row_errors.values_list('row_number', flat=True)),
+        )
+        self.assertEqual(Sale.objects.count(), 1)
+        self.assertIn(f'importación #{retry_job.pk}', job.get_progress_log(limit=1)[0]['message'])
+
+        response = self.client.get(reverse('admin:flex_importer_importjob_change', args=[job.pk]))
+        self.assertContains(response, reverse('admin:flex_importer_importjob_change', args=[retry_job.pk]))
+        self.assertContains(response, reverse('admin:flex_importer_retry_failed', args=[job.pk]))
+
+    def test_retry_failed_rows_requires_can_re_run(self):
+        """Test jobs of importers that cannot be re-run offer no retry of their failed rows"""
+        job = self.import_with_errors()
+        ImportJob.objects.filter(pk=job.pk).update(can_re_run=False)
+        user, _ = User.objects.get_or_create(username='admin', defaults={'is_staff': True, 'is_superuser': True})
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('admin:flex_importer_retry_failed', args=[job.pk]))
+
+        self.assertRedirects(response, reverse('admin:flex_importer_importjob_change', args=[job.pk]))
+        self.assertFalse(ImportJob.objects.filter(parent_job=job).exists())
+        response = self.client.get(reverse('admin:flex_importer_importjob_change', args=[job.pk]))
+        self.assertNotContains(response, reverse('admin:flex_importer_retry_failed', args=[job.pk]))
+
+    def create_sales_with_failure(self, content, **settings):
+        """Process a CSV with SalesImporter row by row; rows for 'Falla' write a sale and raise"""
+        def import_action(importer, row_data):
+            Sale.objects.create(
+                date=row_data['date'], cliente=row_data['cliente'], producto=row_data['producto'],
+                cantidad=1, precio=row_data['precio']
+            )
+            if row_data['cliente'] == 'Falla':
+                raise RuntimeError('fila rechazada')
+            return 'created'
+
+        job = self.create_job('csv', content)
+        with override_settings(**settings), \
+                mock.patch.object(SalesImporter, 'import_batch', FlexImporter.import_batch), \
+                mock.patch.object(SalesImporter, 'import_action', import_action):
+            self.assertTrue(ImportProcessor(job).process())
+        job.refresh_from_db()
+        return job
+
+    def test_chunked_transactions_isolate_failing_rows(self):
+        """Test a failing row is rolled back to its savepoint without aborting its chunk"""
+        content = (
+            'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+            '2026-01-01,Ana,1,1,10.50\n'
+            '2026-01-01,Falla,2,1,5.00\n'
+            '2026-01-01,Luis,3,1,5.00\n'
+        ).encode('utf-8')
+
+        job = self.create_sales_with_failure(
+            content, FLEX_IMPORTER_TRANSACTION_MODE='chunked', FLEX_IMPORTER_COMMIT_EVERY=2,
+            FLEX_IMPORTER_BATCH_SIZE=1
+        )
+
+        self.assertEqual(job.status, 'partial')
+        self.assertEqual((job.created_rows, job.error_rows), (2, 1))
+        self.assertEqual(job.error_details[0]['errors'], ['Excepción: fila rechazada'])
+        self.assertEqual(sorted(Sale.objects.values_list('cliente', flat=True)), ['Ana', 'Luis'])
+
+    def test_atomic_transaction_rolls_back_past_max_errors(self):
+        """Test the atomic mode saves nothing when errors exceed max_errors"""
+        content = (
+            'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+            '2026-01-01,Ana,1,1,10.50\n'
+            '2026-01-01,Falla,2,1,5.00\n'
+            '2026-01-01,Luis,3,1,5.00\n'
+        ).encode('utf-8')
+
+        job = self.create_sales_with_failure(content, FLEX_IMPORTER_TRANSACTION_MODE='atomic')
+
+        self.assertEqual(job.status, 'failed')
+        self.assertTrue(job.result_message.startswith('Importación revertida'))
+        self.assertEqual((job.success_rows, job.error_rows), (0, 1))
+        self.assertFalse(Sale.objects.exists())
+
+        job = self.create_sales_with_failure(
+            content, FLEX_IMPORTER_TRANSACTION_MODE='atomic', FLEX_IMPORTER_MAX_ERRORS=1
+        )
+
+        self.assertEqual(job.status, 'partial')
+        self.assertEqual(Sale.objects.count(), 2)
+
+    @override_settings(FLEX_IMPORTER_TRANSACTION_MODE='atomic', FLEX_IMPORTER_MAX_ERRORS=5, FLEX_IMPORTER_BATCH_SIZE=2)
+    def test_atomic_transaction_reader_error_discards_counters(self):
+        """Test an error other than too many row errors rolls back the rows and their counters"""
+        content = ''.join(
+            f'{{"date": "2026-02-01", "cliente": "JSON {i}", "producto": {i}, "precio": "1.00"}}\n' for i in range(3)
+        ) + '{"date": "2026-02-01", "cliente": "Malo", "producto": "x", "precio": "1.00"}\nno es json\n'
+        job = self.create_job('jsonl', content.encode('utf-8'))
+        processor = ImportProcessor(job)
+
+        self.assertFalse(processor.process())
+
+        job.refresh_from_db()
+        self.assertFalse(processor._hold_writes)
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('Línea 5: JSON inválido', job.result_message)
+        self.assertEqual((job.success_rows, job.created_rows, job.updated_rows, job.error_rows), (0, 0, 0, 1))
+        self.assertIsNone(job.checkpoint_row)
+        self.assertFalse(Sale.objects.exists())
+        self.assertEqual(list(job.row_errors.values_list('row_number', flat=True)), [4])
+
+    @override_settings(FLEX_IMPORTER_TRANSACTION_MODE='atomic', FLEX_IMPORTER_BATCH_SIZE=1,
+                       FLEX_IMPORTER_PROGRESS_FLUSH_ROWS=1)
+    def test_atomic_import_does_not_write_job_row_in_transaction(self):
+        """Test an atomic import only heartbeats while its transaction is open and writes counters at the end"""
+        content = ''.join(
+            f'{{"date": "2026-02-01", "cliente": "JSON {i}", "producto": {i}, "precio": "1.00"}}\n' for i in range(4)
+        )
+        job = self.create_job('jsonl', content.encode('utf-8'))
+
+        with mock.patch.object(ImportProcessor, '_write_heartbeat', autospec=True,
+                               side_effect=ImportProcessor._write_heartbeat) as write_heartbeat, \
+                CaptureQueriesContext(connection) as queries:
+            self.assertTrue(ImportProcessor(job).process())
+
+        sqls = [query['sql'] for query in queries.captured_queries]
+        savepoint = next(sql for sql in sqls if sql.startswith('SAVEPOINT')).split(' ', 1)[1]
+        start = sqls.index(f'SAVEPOINT {savepoint}')
+        end = sqls.index(f'RELEASE SAVEPOINT {savepoint}')
+        self.assertFalse([sql for sql in sqls[start:end] if sql.startswith('UPDATE "flex_importer_importjob"')])
+        self.assertEqual(write_heartbeat.call_count, 4)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.created_rows), ('success', 4))
+
+    def test_heartbeat_connection_updates_job(self):
+        """Test the heartbeat written through its own connection only touches last_heartbeat"""
+        job = self.create_job('csv', b'Fecha de Venta *\n')
+        processor = ImportProcessor(job)
+        processor._heartbeat_connection = connection
+
+        processor._write_heartbeat()
+
+        self.assertEqual(ImportJob.objects.get(pk=job.pk).last_heartbeat, processor.import_job.last_heartbeat)
+        self.assertEqual(ImportJob.objects.get(pk=job.pk).status, 'pending')
+
+    def test_resume_chunked_import_after_crash(self):
+        """Test an interrupted chunked import resumes after its checkpoint without duplicating rows"""
+        content = (
+            'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+            '2026-01-01,Ana,1,1,10.50\n'
+            '2026-01-01,Luis,abc,1,5.00\n'
+            '2026-01-01,Eva,3,1,5.00\n'
+            '2026-01-01,Sol,4,1,5.00\n'
+        ).encode('utf-8')
+        job = self.create_job('csv', content)
+        process_batch = ImportProcessor._process_batch
+
+        def crash_on_eva(processor, batch, *args):
+            if batch.row_numbers[0] == 4:
+                raise OSError('worker perdido')
+            return process_batch(processor, batch, *args)
+
+        settings = {'FLEX_IMPORTER_TRANSACTION_MODE': 'chunked', 'FLEX_IMPORTER_COMMIT_EVERY': 2,
+                    'FLEX_IMPORTER_BATCH_SIZE': 1}
+        with override_settings(**settings):
+            with mock.patch.object(ImportProcessor, '_process_batch', crash_on_eva):
+                self.assertFalse(ImportProcessor(job).process())
+
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'failed')
+            self.assertTrue(job.can_resume)
+            self.assertEqual((job.checkpoint_row, job.processed_rows, job.error_rows), (3, 2, 1))
+
+            call_command('resume_import', job.pk, stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'partial')
+        self.assertEqual((job.processed_rows, job.success_rows, job.error_rows), (4, 3, 1))
+        self.assertEqual(job.row_errors.count(), 1)
+        self.assertEqual(sorted(Sale.objects.values_list('cliente', flat=True)), ['Ana', 'Eva', 'Sol'])
+        self.assertFalse(job.can_resume)
+
+    def run_fanout(self, job):
+        """Split a job and process its chunks one after another, like the chord does in parallel"""
+        chunks = ImportProcessor(job).start_fanout()
+        self.assertIsNotNone(chunks)
+        results = [ImportProcessor(ImportJob.objects.get(pk=job.pk)).process_chunk(chunk) for chunk in chunks]
+        ImportProcessor(ImportJob.objects.get(pk=job.pk)).finish_fanout(results)
+        job.refresh_from_db()
+        return chunks
+
+    @override_settings(FLEX_IMPORTER_FANOUT_CHUNKS=3, FLEX_IMPORTER_FANOUT_MIN_ROWS=1, FLEX_IMPORTER_BATCH_SIZE=2)
+    def test_fanout_chunks_add_up_to_one_import(self):
+        """Test a job split into row and byte ranges imports every row once and sums the chunk counters"""
+        header = 'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+        lines = [f'2026-01-01,Cliente {i},{i},1,5.00\n' for i in range(10)]
+        lines[6] = '2026-01-01,Malo,abc,1,5.00\n'
+        lines[3] = '\n'
+        csv_job = self.create_job('csv', (header + ''.join(lines)).encode('utf-8'))
+        jsonl_job = self.create_job('jsonl', ''.join(
+            f'{{"date": "2026-02-01", "cliente": "JSON {i}", "producto": {i}, "precio": "1.00"}}\n' for i in range(10)
+        ).encode('utf-8'))
+        xlsx_path = write_temp_xlsx([header.strip().split(',')] + [
+            ['2026-03-01', f'XLSX {i}', i, 1, '2.00'] for i in range(4)
+        ])
+        self.addCleanup(os.remove, xlsx_path)
+        with open(xlsx_path, 'rb') as f:
+            xlsx_job = self.create_job('xlsx', f.read())
+
+        csv_chunks = self.run_fanout(csv_job)
+        jsonl_chunks = self.run_fanout(jsonl_job)
+        xlsx_chunks = self.run_fanout(xlsx_job)
+
+        self.assertEqual(len(csv_chunks), 3)
+        self.assertEqual(csv_chunks[0]['first_row'], 2)
+        self.assertEqual(len(jsonl_chunks), 3)
+        self.assertIn('start', jsonl_chunks[0])
+        self.assertEqual(xlsx_chunks[0]['after_row'], 1)
+        self.assertIsNone(xlsx_chunks[-1]['last_row'])
+
+        self.assertEqual(csv_job.status, 'partial')
+        self.assertEqual((csv_job.total_rows, csv_job.success_rows, csv_job.error_rows), (9, 8, 1))
+        # The blank line is not numbered, like in a single-task import
+        self.assertEqual(list(csv_job.row_errors.values_list('row_number', flat=True)), [7])
+        self.assertEqual(jsonl_job.status, 'success')
+        self.assertEqual(jsonl_job.created_rows, 10)
+        self.assertEqual(xlsx_job.status, 'success')
+        self.assertEqual(xlsx_job.created_rows, 4)
+        self.assertEqual(Sale.objects.count(), 22)
+        self.assertEqual(Sale.objects.values('cliente').distinct().count(), 22)
+        self.assertIn('Bloque desde la fila 2 terminado', [entry['message'] for entry in csv_job.get_progress_log()])
+        self.assertIn('Bloque filas 2-2 terminado', [entry['message'] for entry in xlsx_job.get_progress_log()])
+
+    @override_settings(FLEX_IMPORTER_FANOUT_CHUNKS=2, FLEX_IMPORTER_FANOUT_MIN_ROWS=1)
+    def test_fanout_failed_chunk_fails_job(self):
+        """Test the job fails, keeping the other chunks' rows, when a chunk raises"""
+        content = ''.join(
+            f'{{"date": "2026-02-01", "cliente": "JSON {i}", "producto": {i}, "precio": "1.00"}}\n' for i in range(4)
+        ) + 'no es json\n'
+        job = self.create_job('jsonl', content.encode('utf-8'))
+
+        self.run_fanout(job)
+
+        self.assertEqual(job.status, 'failed')
+        self.assertTrue(job.result_message.startswith('Error en importación: fallaron 1 de 2 bloques'))
+        self.assertIn('Línea 5: JSON inválido', job.result_message)
+        self.assertEqual(job.processed_rows, Sale.objects.count())
+
+    def test_fanout_skipped_for_small_or_atomic_jobs(self):
+        """Test jobs below fanout_min_rows or in atomic mode run in a single task"""
+        job = self.create_job('csv', b'Fecha de Venta *\n2026-01-01\n2026-01-02\n')
+
+        with override_settings(FLEX_IMPORTER_FANOUT_CHUNKS=2):
+            self.assertIsNone(ImportProcessor(job).start_fanout())
+        with override_settings(FLEX_IMPORTER_FANOUT_CHUNKS=2, FLEX_IMPORTER_FANOUT_MIN_ROWS=1,
+                               FLEX_IMPORTER_TRANSACTION_MODE='atomic'):
+            self.assertIsNone(ImportProcessor(job).start_fanout())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'pending')
+
+    @skipUnless(tasks.CELERY_AVAILABLE, 'Celery no está instalado')
+    @override_settings(FLEX_IMPORTER_FANOUT_CHUNKS=3, FLEX_IMPORTER_FANOUT_MIN_ROWS=1)
+    def test_fanout_chord_in_eager_mode(self):
+        """Test process_import_async fans out into a chord that finishes the job"""
+        from celery import current_app
+
+        content = ''.join(
+            f'{{"date": "2026-02-01", "cliente": "JSON {i}", "producto": {i}, "precio": "1.00"}}\n' for i in range(9)
+        )
+        job = self.create_job('jsonl', content.encode('utf-8'))
+
+        with mock.patch.dict(current_app.conf, task_always_eager=True, task_eager_propagates=True,
+                             broker_url='memory://', result_backend='cache+memory://'):
+            self.assertTrue(tasks.process_import_async.delay(job.pk).get())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'success')
+        self.assertEqual(job.created_rows, 9)
+        self.assertIn('3 bloques paralelos', job.get_progress_log()[1]['message'])
+
+    def test_finished_job_cannot_resume(self):
+        """Test a job that read the whole file clears its checkpoint, even if every row failed"""
+        content = (
+            'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+            '2026-01-01,Luis,abc,1,5.00\n'
+        ).encode('utf-8')
+        job = self.create_job('csv', content)
+
+        self.assertTrue(ImportProcessor(job).process())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNone(job.checkpoint_row)
+        self.assertFalse(job.can_resume)
+
+    def test_invalid_transaction_mode(self):
+        """Test an unknown transaction mode fails the job"""
+        job = self.create_job('csv', b'Fecha de Venta *\n2026-01-01\n')
+
+        with override_settings(FLEX_IMPORTER_TRANSACTION_MODE='nunca'):
+            self.assertFalse(ImportProcessor(job).process())
+
+        job.refresh_from_db()
+        self.assertEqual(job.result_message, 'Error en importación: Modo de transacción no válido: nunca')
+
+    @override_settings(FLEX_IMPORTER_BATCH_SIZE=8)
+    def test_failed_batch_is_bisected(self):
+        """Test a failing batch is split in halves until the bad row is isolated"""
+        header = 'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+        lines = [f'2026-01-01,Cliente {i},{i},1,5.00\n' for i in range(8)]
+        lines[5] = '2026-01-01,Malo,5,1,5.00\n'
+        job = self.create_job('csv', (header + ''.join(lines)).encode('utf-8'))
+        batch_sizes = []
+        bulk_import_batch = SalesImporter.import_batch
+
+        def import_batch(importer, rows):
+            batch_sizes.append(len(rows))
+            result = bulk_import_batch(importer, rows)
+            if any(row_data['cliente'] == 'Malo' for row_data in rows):
+                raise IntegrityError('UNIQUE constraint failed: example_app_sale.cliente')
+            return result
+
+        with mock.patch.object(SalesImporter, 'import_batch', import_batch):
+            self.assertTrue(ImportProcessor(job).process())
+
+        job.refresh_from_db()
+        # Full batch, then both halves at each level of the 8 -> 4 -> 2 -> 1 split
+        self.assertEqual(batch_sizes, [8, 4, 4, 2, 1, 1, 2])
+        self.assertEqual((job.created_rows, job.error_rows), (7, 1))
+        self.assertEqual(job.error_details[0]['row'], 7)
+        self.assertEqual(
+            job.error_details[0]['errors'],
+            ['Excepción: UNIQUE constraint failed: example_app_sale.cliente']
+        )
+        self.assertEqual(Sale.objects.count(), 7)
+        self.assertFalse(Sale.objects.filter(cliente='Malo').exists())
+
+    @override_settings(
+        FLEX_IMPORTER_BATCH_SIZE=1,
+        FLEX_IMPORTER_PROGRESS_FLUSH_ROWS=2,
+        FLEX_IMPORTER_PROGRESS_FLUSH_SECONDS=3600,
+    )
+    def test_progress_flush_policy(self):
+        """Test counters are written every N rows with F() increments, plus once at the end"""
+        header = 'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+        lines = ''.join(f'2026-01-01,Cliente {i},{i},1,5.00\n' for i in range(5))
+        job = self.create_job('csv', (header + lines).encode('utf-8'))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(ImportProcessor(job).process())
+
+        increments = [
+            query['sql'] for query in queries.captured_queries
+            if '"processed_rows" = ("flex_importer_importjob"."processed_rows" +' in query['sql']
+        ]
+        self.assertEqual(len(increments), 3)
+        job.refresh_from_db()
+        self.assertEqual((job.processed_rows, job.created_rows), (5, 5))
+
+    def test_progress_counters_keep_other_writers_increments(self):
+        """Test counters written by another writer of the same job are not overwritten"""
+        content = (
+            '{"date": "2026-01-01", "cliente": "Ana", "producto": 1, "precio": "10.50"}\n'
+            '{"date": "2026-01-01", "cliente": "Luis", "producto": 2, "precio": "5.00"}\n'
+        ).encode('utf-8')
+        job = self.create_job('jsonl', content)
+        bulk_import_batch = SalesImporter.import_batch
+
+        def import_batch(importer, rows):
+            # Another worker reports 3 rows of its own share of the file
+            ImportJob.objects.filter(pk=job.pk).update(
+                processed_rows=F('processed_rows') + 3,
+                success_rows=F('success_rows') + 3,
+                created_rows=F('created_rows') + 3,
+            )
+            return bulk_import_batch(importer, rows)
+
+        with mock.patch.object(SalesImporter, 'import_batch', import_batch):
+            self.assertTrue(ImportProcessor(job).process())
+
+        job.refresh_from_db()
+        self.assertEqual((job.processed_rows, job.created_rows, job.total_rows), (5, 5, 5))
+
+    def test_progress_log_entries_are_batched(self):
+        """Test per-row log entries are appended to ImportLogEntry with bulk inserts"""
+        header = 'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+        content = (header + ''.join(f'2026-01-01,Cliente {i},x,1,5.00\n' for i in range(20))).encode('utf-8')
+        job = self.create_job('csv', content)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(ImportProcessor(job).process())
+
+        inserts = [query for query in queries.captured_queries if 'INSERT INTO "flex_importer_importlogentry"' in query['sql']]
+        self.assertLess(len(inserts), 6)
+        self.assertEqual(job.log_entries.count(), 23)
+        tail = job.get_progress_log(limit=2)
+        self.assertEqual(tail[0]['message'], 'Fila 21: Errores de validación - '
+                         'Error en campo \'ID del Producto\': ["No se pudo convertir el valor \'x\' al tipo integer"]')
+        self.assertEqual(tail[1]['message'], 'Importación fallida. Todas las filas tuvieron errores.')
+        ids = [entry['id'] for entry in ImportJob.objects.get(pk=job.pk).progress_log]
+        self.assertEqual(ids, sorted(set(ids)))
+
+    def test_progress_log_cursor_with_concurrent_writers(self):
+        """Test entries written through two instances of the same job are all returned after a cursor"""
+        job = self.create_job('csv', b'Fecha de Venta *\n')
+        writer_a = ImportJob.objects.get(pk=job.pk)
+        writer_b = ImportJob.objects.get(pk=job.pk)
+
+        writer_a.add_progress_log('A1')
+        writer_b.add_progress_log('B1')
+        cursor = job.get_progress_log()[-1]['id']
+        writer_a.add_progress_log('A2')
+
+        self.assertEqual([entry['message'] for entry in job.get_progress_log()], ['A1', 'B1', 'A2'])
+        self.assertEqual([entry['message'] for entry in job.get_progress_log(since=cursor)], ['A2'])
+
+    def test_flush_progress_log_reads_back_ids(self):
+        """Test databases that do not return bulk insert ids still get one INSERT and the entry ids"""
+        job = self.create_job('csv', b'Fecha de Venta *\n')
+        other_writer = ImportJob.objects.get(pk=job.pk)
+        other_writer.add_progress_log('Otro proceso')
+        for message in ('Uno', 'Dos', 'Uno'):
+            job.add_progress_log(message, buffer=True)
+        entries = list(job._pending_log_entries)
+
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert',
+                               new_callable=mock.PropertyMock, return_value=False), \
+                CaptureQueriesContext(connection) as queries:
+            job.flush_progress_log()
+
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            [entry.pk for entry in entries],
+            list(job.log_entries.exclude(message='Otro proceso').values_list('pk', flat=True))
+        )
+
+    @override_settings(FLEX_IMPORTER_PROGRESS_CACHE='default')
+    def test_processor_publishes_progress_channel(self):
+        """Test the processor publishes live counters and log lines to the cache"""
+        content = (
+            '{"date": "2026-01-01", "cliente": "Ana", "producto": 1, "precio": "10.50"}\n'
+            '{"date": "2026-01-01", "cliente": "Luis", "producto": "x", "precio": "5.00"}\n'
+        ).encode('utf-8')
+        job = self.create_job('jsonl', content)
+        channel = get_progress_channel(job.pk)
+        self.addCleanup(channel.clear)
+
+        self.assertTrue(ImportProcessor(job).process())
+
+        state = channel.read()
+        self.assertEqual(state['status'], 'partial')
+        self.assertEqual((state['processed_rows'], state['error_rows']), (2, 1))
+        self.assertEqual(
+            [entry['id'] for entry in channel.read_log()],
+            [entry['id'] for entry in job.get_progress_log()]
+        )
+
+    @override_settings(FLEX_IMPORTER_PROGRESS_CACHE='default')
+    def test_progress_channel_log_with_concurrent_writers(self):
+        """Test two channels of the same job append to the ring buffer without overwriting each other"""
+        job = self.create_job('csv', b'Fecha de Venta *\n')
+        writer_a = get_progress_channel(job.pk)
+        writer_b = get_progress_channel(job.pk)
+        self.addCleanup(writer_a.clear)
+        writer_a.log_size = writer_b.log_size = 4
+
+        writer_a.append_log([{'message': 'A1'}])
+        writer_b.append_log([{'message': 'B1'}, {'message': 'B2'}])
+        writer_a.append_log([{'message': 'A2'}])
+        self.assertEqual([entry['message'] for entry in writer_b.read_log()], ['A1', 'B1', 'B2', 'A2'])
+
+        writer_b.append_log([{'message': f'B{n}'} for n in range(3, 9)])
+        self.assertEqual([entry['message'] for entry in writer_a.read_log()], ['B5', 'B6', 'B7', 'B8'])
+        self.assertEqual([entry['message'] for entry in writer_a.read_log(limit=2)], ['B7', 'B8'])
+
+        writer_a.clear()
+        self.assertEqual(writer_b.read_log(), [])
+
+    def test_row_errors_storage_policy(self):
+        """Test row errors are stored as ImportRowError rows, sampled and capped"""
+        header = 'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+        content = (header + ''.join(f'2026-01-01,Cliente {i},x,1,5.00\n' for i in range(6))).encode('utf-8')
+
+        job = self.create_job('csv', content)
+        self.assertTrue(ImportProcessor(job).process())
+        self.assertEqual(job.row_errors.count(), 6)
+        self.assertEqual(job.row_errors.first().row_number, 2)
+
+        job = self.create_job('csv', content)
+        with override_settings(FLEX_IMPORTER_ERROR_SAMPLE_RATE=2):
+            self.assertTrue(ImportProcessor(job).process())
+        self.assertEqual(list(job.row_errors.values_list('row_number', flat=True)), [2, 4, 6])
+
+        job = self.create_job('csv', content)
+        with override_settings(FLEX_IMPORTER_MAX_STORED_ERRORS=2):
+            self.assertTrue(ImportProcessor(job).process())
+        job.refresh_from_db()
+        self.assertEqual(job.row_errors.count(), 2)
+        self.assertEqual(job.error_rows, 6)
+
+
+class StalledImportJobTestCase(TestCase):
+    """Test stalled job detection from worker heartbeats"""
+
+    def create_job(self, status, minutes_ago, heartbeat_minutes_ago=None, **fields):
+        """Create a job created/started minutes_ago, with an optional heartbeat"""
+        now = timezone.now()
+        return ImportJob.objects.create(
+            importer_class='example_app.importers.SalesImporter',
+            importer_name='Importador de Ventas',
+            file_format='csv',
+            uploaded_file='imports/ventas.csv',
+            status=status,
+            created_at=now - timezone.timedelta(minutes=minutes_ago),
+            started_at=now - timezone.timedelta(minutes=minutes_ago) if status != 'pending' else None,
+            last_heartbeat=(
+                now - timezone.timedelta(minutes=heartbeat_minutes_ago)
+                if heartbeat_minutes_ago is not None else None
+            ),
+            **fields
+        )
+
+    def test_stalled_jobs(self):
+        """Test pending jobs stall by age and processing jobs by their last heartbeat"""
+        old_pending = self.create_job('pending', 30)
+        self.create_job('pending', 5)
+        died_halfway = self.create_job('processing', 60, heartbeat_minutes_ago=20, processed_rows=5000)
+        self.create_job('processing', 60, heartbeat_minutes_ago=1, processed_rows=5000)
+        no_heartbeat = self.create_job('processing', 30)
+        self.create_job('success', 60, heartbeat_minutes_ago=50)
+
+        stalled = set(ImportJob.objects.stalled(10).values_list('pk', flat=True))
+
+        self.assertEqual(stalled, {old_pending.pk, died_halfway.pk, no_heartbeat.pk})
+        self.assertTrue(died_halfway.is_stalled(10))
+
+    @override_settings(FLEX_IMPORTER_PROGRESS_CACHE='default')
+    def test_mark_stalled_as_failed_clears_progress_channel(self):
+        """Test marked jobs stop serving their stale 'processing' state from the cache"""
+        job = self.create_job('processing', 60, heartbeat_minutes_ago=30)
+        alive = self.create_job('processing', 60, heartbeat_minutes_ago=1)
+        for running_job in (job, alive):
+            channel = get_progress_channel(running_job.pk)
+            self.addCleanup(channel.clear)
+            channel.publish(running_job)
+
+        ImportJob.objects.mark_stalled_as_failed(10)
+
+        self.assertIsNone(get_progress_channel(job.pk).read())
+        self.assertEqual(get_progress_channel(alive.pk).read()['status'], 'processing')
+
+    def test_mark_stalled_as_failed_single_update(self):
+        """Test stalled jobs are failed with one UPDATE and get a log entry"""
+        job = self.create_job('processing', 60, heartbeat_minutes_ago=20, processed_rows=5000)
+        job.add_progress_log('Procesadas 5000 filas...')
+        alive = self.create_job('processing', 60, heartbeat_minutes_ago=1)
+
+        with CaptureQueriesContext(connection) as queries:
+            marked = ImportJob.objects.mark_stalled_as_failed(10)
+
+        self.assertEqual(marked, 1)
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        job.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('10 minutos', job.result_message)
+        self.assertEqual(alive.status, 'processing')
+        last_entry = job.get_progress_log(limit=1)[0]
+        self.assertEqual(last_entry['level'], 'error')
+        self.assertEqual(job.get_progress_log(since=last_entry['id'] - 1), [last_entry])
+
+    def test_processor_writes_heartbeat(self):
+        """Test the processor stores a heartbeat with its counter flushes"""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media_root):
+            job = ImportJob.objects.create(
+                importer_class='example_app.importers.SalesImporter',
+                importer_name='Importador de Ventas',
+                file_format='csv',
+                uploaded_file=SimpleUploadedFile(
+                    'ventas.csv',
+                    b'Fecha de Venta *,Nombre del Cliente *,ID del Producto *,Cantidad,Precio Unitario *\n'
+                    b'2026-01-01,Ana,1,2,10.50\n'
+                ),
+            )
+            with CaptureQueriesContext(connection) as queries:
+                ImportProcessor(job).process()
+
+        job.refresh_from_db()
+        self.assertGreaterEqual(job.last_heartbeat, job.started_at)
+        self.assertTrue(any(
+            query['sql'].startswith('UPDATE') and '"last_heartbeat"' in query['sql'] and '"processed_rows" +' in query['sql']
+            for query in queries.captured_queries
+        ))
+
+
+class ImportJobAdminTestCase(TestCase):
+    """Test the ImportJob admin pages"""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        self.client.force_login(self.user)
+
+    def test_change_form_paginates_row_errors(self):
+        """Test the change form renders one page of row errors"""
+        job = ImportJob.objects.create(
+            importer_class='example_app.importers.SalesImporter',
+            importer_name='Importador de Ventas',
+            file_format='csv',
+            uploaded_file='imports/ventas.csv',
+            status='partial',
+            error_rows=60,
+        )
+        ImportRowError.objects.bulk_create([
+            ImportRowError(job=job, row_number=number, errors=[f'Error <{number}>'])
+            for number in range(2, 62)
+        ])
+        url = reverse('admin:flex_importer_importjob_change', args=[job.pk])
+
+        response = self.client.get(url, {'errors_page': 2})
+
+        self.assertContains(response, 'Errores 51-60 de 60')
+        self.assertContains(response, 'Error &lt;61&gt;')
+        self.assertNotContains(response, 'Error &lt;2&gt;')
+        self.assertContains(response, '?errors_page=1')
+
+    def test_changelist_loads_only_list_columns(self):
+        """Test the changelist query count and selected columns do not grow with big jobs"""
+        now = timezone.now()
+        ImportJob.objects.bulk_create([
+            ImportJob(
+                importer_class='example_app.importers.SalesImporter',
+                importer_name='Importador de Ventas',
+                file_format='csv',
+                uploaded_file=f'imports/ventas_{number}.csv',
+                status='partial',
+                total_rows=1000,
+                processed_rows=1000,
+                success_rows=900,
+                error_rows=100,
+                result_message='x' * 1000,
+                created_at=now,
+            )
+            for number in range(10000)
+        ], batch_size=1000)
+        url = reverse('admin:flex_importer_importjob_changelist')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'status__exact': 'partial'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '90.0%')
+        job_queries = [query['sql'] for query in queries.captured_queries if 'flex_importer_importjob' in query['sql']]
+        # One COUNT for the paginator and one SELECT for the page
+        self.assertEqual(len(job_queries), 2)
+        page_query = next(sql for sql in job_queries if 'COUNT' not in sql)
+        self.assertNotIn('result_message', page_query)
+        self.assertNotIn('uploaded_file', page_query)
+        self.assertIn('LIMIT 100', page_query)
+
+    def test_progress_view_returns_log_tail(self):
+        """Test the progress endpoint returns only the last progress log entries"""
+        job = ImportJob.objects.create(
+            importer_class='example_app.importers.SalesImporter',
+            importer_name='Importador de Ventas',
+            file_format='csv',
+            uploaded_file='imports/ventas.csv',
+        )
+        for number in range(5):
+            job.add_progress_log(f'Mensaje {number}', buffer=True)
+        job.save()
+
+        with mock.patch('flex_importer.admin.ImportJobAdmin.progress_log_tail', 2):
+            response = self.client.get(reverse('admin:flex_importer_progress', args=[job.pk]))
+
+        messages = [entry['message'] for entry in response.json()['progress_log']]
+        self.assertEqual(messages, ['Mensaje 3', 'Mensaje 4'])
+
+    def test_progress_view_returns_entries_since_cursor(self):
+        """Test the progress endpoint only returns the log entries after the cursor"""
+        job = ImportJob.objects.create(
+            importer_class='example_app.importers.SalesImporter',
+            importer_name='Importador de Ventas',
+            file_format='csv',
+            uploaded_file='imports/ventas.csv',
+            status='processing',
+        )
+        for number in range(3):
+            job.add_progress_log(f'Mensaje {number}')
+        url = reverse('admin:flex_importer_progress', args=[job.pk])
+
+        data = self.client.get(url).json()
+        self.assertEqual(len(data['progress_log']), 3)
+        self.assertEqual(data['cursor'], job.log_entries.last().pk)
+
+        job.add_progress_log('Mensaje 3')
+        data = self.client.get(url, {'since': data['cursor']}).json()
+        self.assertEqual([entry['message'] for entry in data['progress_log']], ['Mensaje 3'])
+        self.assertEqual(data['cursor'], job.log_entries.last().pk)
+
+    def test_progress_view_not_modified(self):
+        """Test the progress endpoint answers 304 while nothing changed"""
+        job = ImportJob.objects.create(
+            importer_class='example_app.importers.SalesImporter',
+            importer_name='Importador de Ventas',
+            file_format='csv',
+            uploaded_file='imports/ventas.csv',
+            status='processing',
+            total_rows=10,
+        )
+        job.add_progress_log('Inicio')
+        url = reverse('admin:flex_importer_progress', args=[job.pk])
+
+        response = self.client.get(url)
+        cursor = response.json()['cursor']
+        etag = response['ETag']
+
+        response = self.client.get(url, {'since': cursor}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        ImportJob.objects.filter(pk=job.pk).update(processed_rows=5)
+        response = self.client.get(url, {'since': cursor}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['processed_rows'], 5)
+        self.assertEqual(response.json()['progress_log'], [])
+
+    def test_change_form_polls_instead_of_reloading(self):
+        """Test a running job's change form polls the progress endpoint"""
+        job = ImportJob.objects.create(
+            importer_class='example_app.importers.SalesImporter',
+            importer_name='Importador de Ventas',
+            file_format='csv',
+            uploaded_file='imports/ventas.csv',
+            status='processing',
+        )
+        job.add_progress_log('Inicio')
+
+        response = self.client.get(reverse('admin:flex_importer_importjob_change', args=[job.pk]))
+
+        self.assertContains(response, reverse('admin:flex_importer_progress', args=[job.pk]))
+        self.assertContains(response, 'id="flex-progress-log"')
+        self.assertContains(response, f'data-cursor="{job.log_entries.get().pk}"')
+        self.assertNotContains(response, 'cada 5 segundos')
+
+    @skipUnless(PROGRESS_STREAM_SUPPORTED, 'El stream de progreso requiere Django 4.2 o superior')
+    @override_settings(FLEX_IMPORTER_PROGRESS_STREAM=True)
+    def test_change_form_uses_progress_stream(self):
+        """Test the change form follows the event stream when FLEX_IMPORTER_PROGRESS_STREAM is set"""
+        job = ImportJob.objects.create(
+            importer_class='example_app.importers.SalesImporter',
+            importer_name='Importador de Ventas',
+            file_format='csv',
+            uploaded_file='imports/ventas.csv',
+            status='processing',
+        )
+
+        response = self.client.get(reverse('admin:flex_importer_importjob_change', args=[job.pk]))
+
+        self.assertContains(response, "stream('%s')" % reverse('admin:flex_importer_progress_stream', args=[job.pk]))
+
+    async def read_progress_stream(self, job, headers=None):
+        """Read the progress event stream of a job until the server closes it"""
+        await sync_to_async(self.async_client.force_login)(self.user)
+        url = reverse('admin:flex_importer_progress_stream', args=[job.pk])
+        response = await self.async_client.get(url, headers=headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return ''.join([chunk.decode() async for chunk in response.streaming_content])
+
+    @skipUnless(PROGRESS_STREAM_SUPPORTED, 'El stream de progreso requiere Django 4.2 o superior')
+    async def test_progress_stream_closes_on_final_status(self):
+        """Test the event stream sends the progress and ends once the job is finished"""
+        job = await ImportJob.objects.acreate(
+            importer_class='example_app.importers.SalesImporter',
+            importer_name='Importador de Ventas',
+            file_format='csv',
+            uploaded_file='imports/ventas.csv',
+            status='success',
+            total_rows=2,
+            processed_rows=2,
+        )
+        await sync_to_async(job.add_progress_log)('Mensaje 1')
+        await sync_to_async(job.add_progress_log)('Mensaje 2')
+
+        stream = await self.read_progress_stream(job)
+        events = stream.split('\n\n')
+        last_entry = await job.log_entries.alast()
+
+        self.assertEqual(events[0], 'retry: 3000')
+        self.assertTrue(events[1].startswith(f'id: {last_entry.pk}\nevent: progress\ndata: '))
+        payload = json.loads(events[1].split('data: ', 1)[1])
+        self.assertEqual(payload['processed_rows'], 2)
+        self.assertEqual([entry['message'] for entry in payload['progress_log']], ['Mensaje 1', 'Mensaje 2'])
+        self.assertEqual(events[2], 'event: end\ndata: {}')
+
+    @skipUnless(PROGRESS_STREAM_SUPPORTED, 'El stream de progreso requiere Django 4.2 o superior')
+    async def test_progress_stream_resumes_from_last_event_id(self):
+        """Test a reconnecting client only gets the log entries after Last-Event-ID"""
+        job = await ImportJob.objects.acreate(
+            importer_class='example_app.importers.SalesImporter',
+            importer_name='Importador de Ventas',
+            file_format='csv',
+            uploaded_file='imports/ventas.csv',
+            status='partial',
+        )
+        for number in range(3):
+            await sync_to_async(job.add_progress_log)(f'Mensaje {number}')
+
+        second_entry = await job.log_entries.filter(message='Mensaje 1').aget()
+        stream = await self.read_progress_stream(job, headers={'Last-Event-ID': str(second_entry.pk)})
+
+        payload = json.loads(stream.split('data: ', 1)[1].split('\n\n', 1)[0])
+        self.assertEqual([entry['message'] for entry in payload['progress_log']], ['Mensaje 2'])
+
+    @skipUnless(PROGRESS_STREAM_SUPPORTED, 'El stream de progreso requiere Django 4.2 o superior')
+    async def test_progress_stream_follows_running_job(self):
+        """Test the event stream sends heartbeats and updates until the job finishes"""
+        job = await ImportJob.objects.acreate(
+            importer_class='example_app.importers.SalesImporter',
+            importer_name='Importador de Ventas',
+            file_format='csv',
+            uploaded_file='imports/ventas.csv',
+            status='processing',
+            total_rows=10,
+        )
+        polls = []
+
+        def finish_job_on_third_poll(admin, pk, since=None):
+            polls.append(since)
+            if len(polls) == 3:
+                ImportJob.objects.filter(pk=pk).update(status='success', processed_rows=10)
+            return get_progress_payload(admin, pk, since)
+
+        get_progress_payload = ImportJobAdmin._get_progress_payload
+        with mock.patch.object(ImportJobAdmin, '_get_progress_payload', finish_job_on_third_poll), \
+                mock.patch.object(ImportJobAdmin, 'progress_stream_interval', 0), \
+                mock.patch.object(ImportJobAdmin, 'progress_stream_heartbeat', 0):
+            stream = await self.read_progress_stream(job)
+
+        self.assertEqual(stream.count('event: progress'), 2)
+        self.assertIn(': heartbeat', stream)
+        self.assertIn('"processed_rows": 10', stream)
+        self.assertTrue(stream.endswith('event: end\ndata: {}\n\n'))
+
+    @skipUnless(PROGRESS_STREAM_SUPPORTED, 'El stream de progreso requiere Django 4.2 o superior')
+    async def test_progress_stream_requires_staff(self):
+        """Test the event stream is only available to admin users"""
+        user = await sync_to_async(User.objects.create_user)('viewer', 'viewer@example.com', 'viewer')
+        await sync_to_async(self.async_client.force_login)(user)
+
+        response = await self.async_client.get(reverse('admin:flex_importer_progress_stream', args=[1]))
+
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(FLEX_IMPORTER_PROGRESS_CACHE='default')
+    def test_progress_view_reads_cache_channel(self):
+        """Test a running job's progress is served from the cache without querying the job"""
+        job = ImportJob.objects.create(
+            importer_class='example_app.importers.SalesImporter',
+            importer_name='Importador de Ventas',
+            file_format='csv',
+            uploaded_file='imports/ventas.csv',
+            status='processing',
+            total_rows=10,
+        )
+        self.addCleanup(get_progress_channel(job.pk).clear)
+        job.processed_rows = 4
+        job.add_progress_log('Procesadas 4 de 10 filas...')
+        url = reverse('admin:flex_importer_progress', args=[job.pk])
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(url).json()
+
+        self.assertEqual(data['processed_rows'], 4)
+        self.assertEqual(data['progress_log'][-1]['message'], 'Procesadas 4 de 10 filas...')
+        self.assertFalse(any('flex_importer_importjob' in query['sql'] for query in queries.captured_queries))
+
+        ImportJob.objects.filter(pk=job.pk).update(status='success', processed_rows=10)
+        job.status = 'success'
+        job.publish_progress()
+
+        self.assertEqual(self.client.get(url).json()['processed_rows'], 10)
@@ -1,19 +1,37 @@
 """
 Django admin for FlexImporter
 """
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import admin
-from django.http import HttpResponse, JsonResponse
-from django.shortcuts import render, redirect
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import (
+    Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotFound, JsonResponse, StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import path, reverse
-from django.utils.html import format_html
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.html import escape, format_html
 from django.utils.safestring import mark_safe
 from django import forms
+import django
+from .exports import EXPORT_CONTENT_TYPES, FailedRowsExport
 from .models import ImportJob
+from .progress import TERMINAL_STATUSES, get_progress_channel, job_progress_data
+from .readers import reader_registry
 from .registry import importer_registry
 from .utils import should_use_async
 from .tasks import process_import_async, process_import_sync
+from time import monotonic
+import asyncio
+import hashlib
 import json
 
+# StreamingHttpResponse accepts async iterators from Django 4.2 on
+PROGRESS_STREAM_SUPPORTED = django.VERSION >= (4, 2)
+
 
 class ImportForm(forms.Form):
     """Form for selecting importer and uploading file"""
@@ -30,11 +48,15 @@ class ImportForm(forms.Form):
     )
     file = forms.FileField(
         label='Archivo',
+        help_text='También se aceptan archivos comprimidos (.gz, .bz2, .xz) o un .zip con varios archivos del formato elegido.',
         widget=forms.FileInput(attrs={'class': 'form-control'})
     )
 
     def __init__(self, user=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # Formats come from the reader registry so third-party readers show up
+        self.fields['file_format'].choices = reader_registry.get_format_choices()
+
         # Filter importers based on user permissions
         if user and user.is_authenticated:
             allowed_choices = []
@@ -52,6 +74,14 @@ class ImportForm(forms.Form):
             self.fields['importer'].choices = importer_registry.get_importer_choices()
 
 
+class ImportJobChangeList(ChangeList):
+    """Changelist loading only the columns list_display needs"""
+
+    def get_queryset(self, request, *args, **kwargs):
+        queryset = super().get_queryset(request, *args, **kwargs)
+        return queryset.only(*self.model_admin.changelist_fields)
+
+
 @admin.register(ImportJob)
 class ImportJobAdmin(admin.ModelAdmin):
     """Admin for ImportJob model"""
@@ -67,12 +97,15 @@ class ImportJobAdmin(admin.ModelAdmin):
         'actions_column'
     ]
     list_filter = ['status', 'file_format', 'created_at']
+    # Skip the unfiltered COUNT(*) the changelist runs next to the filtered one
+    show_full_result_count = False
     search_fields = ['importer_name', 'importer_class']
     readonly_fields = [
         'importer_class',
         'importer_name',
         'file_format',
         'uploaded_file',
+        'parent_job',
         'status',
         'total_rows',
         'processed_rows',
@@ -80,7 +113,10 @@ class ImportJobAdmin(admin.ModelAdmin):
         'created_rows',
         'updated_rows',
         'error_rows',
+        'checkpoint_row',
+        'checkpoint_source',
         'error_details_display',
+        'retry_jobs_display',
         'progress_log_display',
         'result_message',
         'can_re_run',
@@ -99,6 +135,7 @@ class ImportJobAdmin(admin.ModelAdmin):
                 'importer_class',
                 'file_format',
                 'uploaded_file',
+                'parent_job',
                 'status',
                 'can_re_run'
             )
@@ -112,12 +149,15 @@ class ImportJobAdmin(admin.ModelAdmin):
                 'updated_rows',
                 'error_rows',
                 'success_rate_display',
+                'checkpoint_row',
+                'checkpoint_source',
             )
         }),
         ('Resultados', {
             'fields': (
                 'result_message',
                 'error_details_display',
+                'retry_jobs_display',
                 'progress_log_display',
             )
         }),
@@ -132,14 +172,55 @@ class ImportJobAdmin(admin.ModelAdmin):
         }),
     )
 
+    # Columns loaded by the changelist: the list_display columns and the
+    # counters behind progress_bar and success_rate_display
+    changelist_fields = [
+        'id',
+        'importer_name',
+        'file_format',
+        'status',
+        'total_rows',
+        'processed_rows',
+        'success_rows',
+        'can_re_run',
+        'created_at',
+    ]
+
+    # Row errors shown per page in the change form
+    errors_per_page = 50
+    # Last progress log entries shown in the change form and progress endpoint
+    progress_log_tail = 200
+    # Seconds between checks, seconds between heartbeats and client
+    # reconnect delay (milliseconds) of the progress event stream
+    progress_stream_interval = 1
+    progress_stream_heartbeat = 15
+    progress_stream_retry = 3000
+
+    def get_changelist(self, request, **kwargs):
+        return ImportJobChangeList
+
+    def get_object(self, request, object_id, from_field=None):
+        """Get the job, remembering which page of row errors to display"""
+        obj = super().get_object(request, object_id, from_field)
+        if obj is not None:
+            obj.errors_page = request.GET.get('errors_page')
+        return obj
+
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
             path('import/', self.admin_site.admin_view(self.import_view), name='flex_importer_import'),
             path('download-template/', self.admin_site.admin_view(self.download_template_view), name='flex_importer_download_template'),
             path('<int:pk>/re-run/', self.admin_site.admin_view(self.re_run_view), name='flex_importer_re_run'),
+            path('<int:pk>/retry-failed/', self.admin_site.admin_view(self.retry_failed_view), name='flex_importer_retry_failed'),
+            path('<int:pk>/resume/', self.admin_site.admin_view(self.resume_view), name='flex_importer_resume'),
             path('<int:pk>/progress/', self.admin_site.admin_view(self.progress_view), name='flex_importer_progress'),
+            path('<int:pk>/failed-rows/', self.admin_site.admin_view(self.failed_rows_view), name='flex_importer_failed_rows'),
         ]
+        if PROGRESS_STREAM_SUPPORTED:
+            custom_urls.append(
+                path('<int:pk>/progress/stream/', self.progress_stream_view, name='flex_importer_progress_stream')
+            )
         return custom_urls + urls
 
     def import_view(self, request):
@@ -222,6 +303,10 @@ class ImportJobAdmin(admin.ModelAdmin):
             buffer = importer_class.generate_template_json()
             content_type = 'application/json'
             filename = f'template_{importer_class.__name__}.json'
+        elif file_format == 'jsonl':
+            buffer = importer_class.generate_template_jsonl()
+            content_type = 'application/x-ndjson'
+            filename = f'template_{importer_class.__name__}.jsonl'
         else:
             return HttpResponse('Formato no soportado', status=400)
 
@@ -264,22 +349,205 @@ class ImportJobAdmin(admin.ModelAdmin):
 
         return redirect('admin:flex_importer_importjob_change', new_import_job.pk)
 
+    def retry_failed_view(self, request, pk):
+        """View for re-running only the failed rows of an import in a child job"""
+        import_job = get_object_or_404(ImportJob, pk=pk)
+
+        if not import_job.can_re_run:
+            self.message_user(request, 'Esta importación no puede ser re-ejecutada', level='error')
+            return redirect('admin:flex_importer_importjob_change', import_job.pk)
+
+        if import_job.status not in ('partial', 'failed') or not import_job.row_errors.exists():
+            self.message_user(request, 'Esta importación no tiene filas con error para reintentar', level='error')
+            return redirect('admin:flex_importer_importjob_change', import_job.pk)
+
+        retry_job = ImportJob.objects.create(
+            importer_class=import_job.importer_class,
+            importer_name=import_job.importer_name,
+            file_format=import_job.file_format,
+            uploaded_file=import_job.uploaded_file,
+            can_re_run=import_job.can_re_run,
+            parent_job=import_job,
+            created_by=request.user if request.user.is_authenticated else None
+        )
+
+        if should_use_async():
+            process_import_async.delay(retry_job.id)
+            self.message_user(
+                request,
+                f'Reintento de filas con error iniciado en segundo plano. ID: {retry_job.id}. '
+                f'Puede monitorear el progreso en la página de detalle.'
+            )
+        else:
+            process_import_sync(retry_job.id)
+            retry_job.refresh_from_db()
+            self.message_user(request, f'Filas con error reintentadas: {retry_job.result_message}')
+
+        return redirect('admin:flex_importer_importjob_change', retry_job.pk)
+
+    def resume_view(self, request, pk):
+        """View for resuming an interrupted import after its checkpoint, in the same job"""
+        import_job = get_object_or_404(ImportJob, pk=pk)
+
+        if not import_job.can_resume:
+            self.message_user(request, 'Esta importación no puede ser reanudada', level='error')
+            return redirect('admin:flex_importer_importjob_change', import_job.pk)
+
+        if should_use_async():
+            process_import_async.delay(import_job.id, resume=True)
+            self.message_user(
+                request,
+                f'Reanudación iniciada en segundo plano desde la fila {import_job.checkpoint_row}. '
+                f'Puede monitorear el progreso en la página de detalle.'
+            )
+        else:
+            process_import_sync(import_job.id, resume=True)
+            import_job.refresh_from_db()
+            self.message_user(request, f'Importación reanudada: {import_job.result_message}')
+
+        return redirect('admin:flex_importer_importjob_change', import_job.pk)
+
+    def failed_rows_view(self, request, pk):
+        """Download the failed rows of a job (?format=xlsx|csv|jsonl) to fix and import them again"""
+        import_job = get_object_or_404(ImportJob, pk=pk)
+        if not self.has_view_permission(request, import_job):
+            return HttpResponseForbidden('No tiene permiso para ver esta importación')
+
+        importer_class = importer_registry.get_importer(import_job.importer_class)
+        if not importer_class:
+            return HttpResponse('Importador no encontrado', status=404)
+
+        file_format = request.GET.get('format', 'xlsx')
+        if file_format not in EXPORT_CONTENT_TYPES:
+            return HttpResponse('Formato no soportado', status=400)
+
+        export = FailedRowsExport(import_job, importer_class)
+        response = StreamingHttpResponse(export.iter_format(file_format), content_type=EXPORT_CONTENT_TYPES[file_format])
+        response['Content-Disposition'] = f'attachment; filename="errores_{importer_class.__name__}_{pk}.{file_format}"'
+        return response
+
     def progress_view(self, request, pk):
-        """API endpoint for progress updates"""
-        import_job = ImportJob.objects.get(pk=pk)
+        """
+        API endpoint for progress updates.
+
+        While the job runs, the state comes from the cache progress channel
+        (FLEX_IMPORTER_PROGRESS_CACHE) without querying the job; once it
+        finishes, or without a channel, it is read from the database.
+
+        The endpoint is incremental: `?since=<cursor>` returns only the log
+        entries after that cursor, and the response carries the new `cursor`
+        for the next poll. The ETag covers counters, status and cursor, so a
+        poll sending `If-None-Match` gets a 304 when nothing changed.
+        """
+        try:
+            since = int(request.GET['since'])
+        except (KeyError, ValueError):
+            since = None
+
+        data, progress_log = self._get_progress_payload(pk, since)
+        etag = '"%s"' % hashlib.md5(
+            json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+        ).hexdigest()
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            data['progress_log'] = progress_log
+            response = JsonResponse(data)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
-        data = {
-            'status': import_job.status,
-            'total_rows': import_job.total_rows,
-            'processed_rows': import_job.processed_rows,
-            'success_rows': import_job.success_rows,
-            'error_rows': import_job.error_rows,
-            'progress_percentage': import_job.progress_percentage,
-            'progress_log': import_job.progress_log or [],
-            'result_message': import_job.result_message,
-        }
+    def _get_progress_payload(self, pk, since=None):
+        """
+        Read the progress of a job for the progress endpoints.
+
+        Returns:
+            tuple: (state dict with 'cursor', new log entries after `since`)
+        """
+        channel = get_progress_channel(pk)
+        state = channel.read() if channel else None
+        if state is not None and state['status'] not in TERMINAL_STATUSES:
+            data = dict(state)
+            progress_log = channel.read_log(limit=self.progress_log_tail)
+            if since is not None:
+                progress_log = [entry for entry in progress_log if entry.get('id', 0) > since]
+        else:
+            import_job = get_object_or_404(ImportJob, pk=pk)
+            data = job_progress_data(import_job)
+            progress_log = import_job.get_progress_log(limit=self.progress_log_tail, since=since)
+
+        data['cursor'] = progress_log[-1]['id'] if progress_log else (since or 0)
+        return data, progress_log
+
+    async def progress_stream_view(self, request, pk):
+        """
+        Server-Sent Events stream with the progress of a job.
+
+        Sends a 'progress' event (same payload as progress_view, with the
+        cursor as event id) whenever counters or log change, a comment line
+        as heartbeat while nothing changes, and an 'end' event once the job
+        reaches a final status, then closes. Browsers reconnecting send
+        Last-Event-ID and only get the log entries after it.
+
+        Needs an ASGI server: under WSGI Django buffers the whole stream.
+        """
+        allowed = await sync_to_async(self._can_view_progress)(request, pk)
+        if not allowed:
+            return HttpResponseForbidden('No tiene permiso para ver esta importación')
+
+        try:
+            since = int(request.headers.get('Last-Event-ID') or request.GET['since'])
+        except (KeyError, ValueError):
+            since = None
+
+        try:
+            data, progress_log = await sync_to_async(self._get_progress_payload)(pk, since)
+        except Http404:
+            return HttpResponseNotFound('Importación no encontrada')
+
+        response = StreamingHttpResponse(
+            self._progress_events(pk, data, progress_log),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Keep nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
-        return JsonResponse(data)
+    def _can_view_progress(self, request, pk):
+        """Check the admin access the progress endpoints need (admin_view cannot wrap async views)"""
+        if not self.admin_site.has_permission(request):
+            return False
+        return self.has_view_permission(request)
+
+    async def _progress_events(self, pk, data, progress_log):
+        """Yield the SSE messages of progress_stream_view"""
+        yield f'retry: {self.progress_stream_retry}\n\n'
+        last_sent = None
+        last_write = monotonic()
+        while True:
+            state = {key: value for key, value in data.items() if key not in ('cursor', 'version')}
+            if progress_log or state != last_sent:
+                payload = dict(data, progress_log=progress_log)
+                yield (
+                    f'id: {data["cursor"]}\nevent: progress\n'
+                    f'data: {json.dumps(payload, cls=DjangoJSONEncoder)}\n\n'
+                )
+                last_sent = state
+                last_write = monotonic()
+            elif monotonic() - last_write >= self.progress_stream_heartbeat:
+                yield ': heartbeat\n\n'
+                last_write = monotonic()
+
+            if data['status'] in TERMINAL_STATUSES:
+                yield 'event: end\ndata: {}\n\n'
+                return
+
+            await asyncio.sleep(self.progress_stream_interval)
+            try:
+                data, progress_log = await sync_to_async(self._get_progress_payload)(pk, data['cursor'])
+            except Http404:
+                return
 
     def status_badge(self, obj):
         """Display status as badge"""
@@ -328,39 +596,85 @@ class ImportJobAdmin(admin.ModelAdmin):
     duration_display.short_description = 'Duración'
 
     def error_details_display(self, obj):
-        """Display error details"""
-        if not obj.error_details:
+        """Display one page of the stored row errors"""
+        paginator = Paginator(obj.row_errors.only('row_number', 'source', 'errors'), self.errors_per_page)
+        if paginator.count == 0:
             return '-'
+        page = paginator.get_page(getattr(obj, 'errors_page', None))
 
         html = '<div style="max-height: 400px; overflow-y: auto;">'
-        for error in obj.error_details[:50]:
+        for row_error in page:
             html += f'<div style="margin-bottom: 10px; padding: 10px; background-color: #f8d7da; border: 1px solid #f5c6cb; border-radius: 3px;">'
-            html += f'<strong>Fila {error["row"]}:</strong><br>'
-            for err in error['errors']:
-                html += f'• {err}<br>'
+            if row_error.source:
+                html += f'<strong>{escape(row_error.source)}, fila {row_error.row_number}:</strong><br>'
+            else:
+                html += f'<strong>Fila {row_error.row_number}:</strong><br>'
+            for err in row_error.errors:
+                html += f'• {escape(err)}<br>'
             html += '</div>'
+        html += '</div>'
 
-        if len(obj.error_details) > 50:
-            html += f'<p>... y {len(obj.error_details) - 50} errores más</p>'
+        html += f'<p>Errores {page.start_index()}-{page.end_index()} de {paginator.count}'
+        if paginator.count < obj.error_rows:
+            html += f' guardados ({obj.error_rows} filas con error en total)'
+        html += '</p>'
+        export_url = reverse('admin:flex_importer_failed_rows', args=[obj.pk])
+        html += (
+            f'<p>Descargar filas con error para corregirlas: '
+            f'<a href="{export_url}?format=xlsx">Excel</a> | '
+            f'<a href="{export_url}?format=csv">CSV</a> | '
+            f'<a href="{export_url}?format=jsonl">JSONL</a></p>'
+        )
+        if paginator.num_pages > 1:
+            links = []
+            if page.has_previous():
+                links.append(f'<a href="?errors_page={page.previous_page_number()}">&laquo; Anterior</a>')
+            links.append(f'Página {page.number} de {paginator.num_pages}')
+            if page.has_next():
+                links.append(f'<a href="?errors_page={page.next_page_number()}">Siguiente &raquo;</a>')
+            html += f'<p>{" | ".join(links)}</p>'
 
-        html += '</div>'
         return mark_safe(html)
     error_details_display.short_description = 'Detalles de Errores'
 
+    def retry_jobs_display(self, obj):
+        """Display links to the jobs that retried the failed rows of this one"""
+        retry_jobs = obj.retry_jobs.only('pk', 'status', 'success_rows', 'processed_rows', 'created_at')
+        items = []
+        for retry_job in retry_jobs:
+            url = reverse('admin:flex_importer_importjob_change', args=[retry_job.pk])
+            items.append(format_html(
+                '<li><a href="{}">#{}</a> ({}): {} de {} filas importadas</li>',
+                url, retry_job.pk, retry_job.get_status_display(), retry_job.success_rows, retry_job.processed_rows
+            ))
+        if not items:
+            return '-'
+        return mark_safe(f'<ul>{"".join(items)}</ul>')
+    retry_jobs_display.short_description = 'Reintentos de Filas con Error'
+
     def progress_log_display(self, obj):
-        """Display progress log"""
-        if not obj.progress_log:
+        """Display the tail of the progress log"""
+        progress_log = obj.get_progress_log(limit=self.progress_log_tail)
+        if not progress_log and obj.status in TERMINAL_STATUSES:
             return '-'
 
-        html = '<div style="max-height: 400px; overflow-y: auto; background-color: #f8f9fa; padding: 10px; border-radius: 3px; font-family: monospace; font-size: 12px;">'
+        html = ''
+        if len(progress_log) == self.progress_log_tail:
+            html += f'<p>Mostrando las últimas {self.progress_log_tail} entradas</p>'
+        # The change form appends new entries to this container while the job runs
+        html += (
+            f'<div id="flex-progress-log" data-tail="{self.progress_log_tail}" '
+            f'data-cursor="{progress_log[-1]["id"] if progress_log else 0}" '
+            'style="max-height: 400px; overflow-y: auto; background-color: #f8f9fa; padding: 10px; border-radius: 3px; font-family: monospace; font-size: 12px;">'
+        )
 
-        for log_entry in obj.progress_log:
+        for log_entry in progress_log:
             level = log_entry.get('level', 'info')
             color = '#28a745' if level == 'success' else '#ffc107' if level == 'warning' else '#dc3545' if level == 'error' else '#17a2b8'
 
             html += f'<div style="margin-bottom: 5px;">'
             html += f'<span style="color: {color};">[{log_entry["timestamp"]}]</span> '
-            html += f'{log_entry["message"]}'
+            html += f'{escape(log_entry["message"])}'
             html += '</div>'
 
         html += '</div>'
@@ -389,6 +703,20 @@ class ImportJobAdmin(admin.ModelAdmin):
         # Get the import job object
         import_job = self.get_object(request, object_id)
 
+        # The change form follows running jobs through the event stream when
+        # served over ASGI; otherwise it polls progress_view
+        if import_job and PROGRESS_STREAM_SUPPORTED and getattr(settings, 'FLEX_IMPORTER_PROGRESS_STREAM', False):
+            extra_context['progress_stream_url'] = reverse('admin:flex_importer_progress_stream', args=[import_job.pk])
+
+        if import_job and import_job.can_resume:
+            extra_context['show_resume_button'] = True
+            extra_context['resume_url'] = reverse('admin:flex_importer_resume', args=[object_id])
+
+        if (import_job and import_job.can_re_run and import_job.status in ['partial', 'failed']
+                and import_job.row_errors.exists()):
+            extra_context['show_retry_failed_button'] = True
+            extra_context['retry_failed_url'] = reverse('admin:flex_importer_retry_failed', args=[object_id])
+
         if import_job and import_job.can_re_run and import_job.status in ['success', 'partial', 'failed']:
             extra_context['show_rerun_button'] = True
             extra_context['rerun_url'] = reverse('admin:flex_importer_re_run', args=[object_id])
@@ -1,15 +1,16 @@
 """
 Base class for FlexImporter
 """
-from django.db import models
+from contextlib import nullcontext
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 import csv
 import json
 from io import StringIO, BytesIO
 from openpyxl import Workbook, load_workbook
 from openpyxl.utils import get_column_letter
-from datetime import datetime, date
 from decimal import Decimal
+from .dates import get_date_parser
 
 
 class FlexImporterMeta:
@@ -19,6 +20,94 @@ class FlexImporterMeta:
     key_field = None
 
 
+def _convert_text(value):
+    return str(value)
+
+
+def _convert_boolean(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('true', 'yes', 'si', 'sí', '1', 't')
+
+
+def _convert_date(value):
+    return get_date_parser().to_date(value)
+
+
+def _convert_datetime(value):
+    return get_date_parser().to_datetime(value)
+
+
+def _convert_decimal(value):
+    return Decimal(str(value))
+
+
+# Converter callable per field type name (see FlexImporter._get_field_type_name)
+FIELD_CONVERTERS = {
+    'text': _convert_text,
+    'email': _convert_text,
+    'integer': int,
+    'float': float,
+    'decimal': _convert_decimal,
+    'boolean': _convert_boolean,
+    'date': _convert_date,
+    'datetime': _convert_datetime,
+}
+
+
+class ValidationPlan:
+    """
+    Validation steps of an importer class, compiled once and cached on it.
+
+    fields is a tuple of (name, verbose_name, required, type, converter)
+    entries in field order, field_name_map maps template headers (verbose
+    names) to field names and converters maps field types to converters
+    (with the date parser for Meta.date_formats).
+    """
+
+    __slots__ = ('fields', 'field_name_map', 'converters')
+
+    def __init__(self, importer_class):
+        field_info = importer_class.get_field_info()
+        date_parser = get_date_parser(getattr(getattr(importer_class, 'Meta', None), 'date_formats', None))
+        self.converters = dict(FIELD_CONVERTERS, date=date_parser.to_date, datetime=date_parser.to_datetime)
+        custom_converter = (
+            importer_class._convert_field_value.__func__
+            is not FlexImporter._convert_field_value.__func__
+        )
+
+        fields = []
+        for info in field_info:
+            if custom_converter:
+                # Keep honoring _convert_field_value overrides
+                def converter(value, field=info['field'], field_type=info['type']):
+                    return importer_class._convert_field_value(field, value, field_type)
+            else:
+                converter = self.converters.get(info['type'], _convert_text)
+            fields.append((info['name'], info['verbose_name'], info['required'], info['type'], converter))
+
+        self.fields = tuple(fields)
+        self.field_name_map = {info['verbose_name']: info['name'] for info in field_info}
+
+    def header_index(self, headers):
+        """
+        Map the columns of a header row to field names.
+
+        Args:
+            headers: Sequence of header strings (verbose names or field names)
+
+        Returns:
+            dict: {column index: field name} for the recognised headers
+        """
+        names = {name for name, *_ in self.fields}
+        index = {}
+        for column, header in enumerate(headers):
+            field_name = self.field_name_map.get(header, header)
+            if field_name in names:
+                index[column] = field_name
+        return index
+
+
 class FlexImporterBase(type):
     """Metaclass for FlexImporter to handle registration"""
 
@@ -119,6 +208,15 @@ class FlexImporter(metaclass=FlexImporterBase):
 
         return field_info
 
+    @classmethod
+    def get_validation_plan(cls):
+        """Get the compiled ValidationPlan of this class, building it on first use"""
+        plan = cls.__dict__.get('_validation_plan')
+        if plan is None:
+            plan = ValidationPlan(cls)
+            cls._validation_plan = plan
+        return plan
+
     @classmethod
     def _get_field_type_name(cls, field):
         """Get a readable field type name"""
@@ -134,12 +232,24 @@ class FlexImporter(metaclass=FlexImporterBase):
             models.EmailField: 'email',
         }
 
-        for field_class, type_name in type_map.items():
-            if isinstance(field, field_class):
-                return type_name
+        # Walk the MRO so subclasses (DateTimeField, EmailField) win over their bases
+        for field_class in type(field).__mro__:
+            if field_class in type_map:
+                return type_map[field_class]
 
         return 'text'
 
+    @classmethod
+    def get_template_headers(cls):
+        """Get the template column headers: verbose names, with ' *' on required fields"""
+        headers = []
+        for info in cls.get_field_info():
+            header = info['verbose_name']
+            if info['required']:
+                header += ' *'
+            headers.append(header)
+        return headers
+
     @classmethod
     def generate_template_xlsx(cls):
         """Generate Excel template"""
@@ -149,10 +259,7 @@ class FlexImporter(metaclass=FlexImporterBase):
 
         field_info = cls.get_field_info()
 
-        for idx, info in enumerate(field_info, start=1):
-            header = info['verbose_name']
-            if info['required']:
-                header += ' *'
+        for idx, header in enumerate(cls.get_template_headers(), start=1):
             ws.cell(row=1, column=idx, value=header)
 
         ws2 = wb.create_sheet("Información")
@@ -173,19 +280,9 @@ class FlexImporter(metaclass=FlexImporterBase):
     @classmethod
     def generate_template_csv(cls):
         """Generate CSV template"""
-        field_info = cls.get_field_info()
-
         output = StringIO()
         writer = csv.writer(output)
-
-        headers = []
-        for info in field_info:
-            header = info['verbose_name']
-            if info['required']:
-                header += ' *'
-            headers.append(header)
-
-        writer.writerow(headers)
+        writer.writerow(cls.get_template_headers())
 
         buffer = BytesIO()
         buffer.write(output.getvalue().encode('utf-8-sig'))
@@ -223,33 +320,62 @@ class FlexImporter(metaclass=FlexImporterBase):
         buffer.seek(0)
         return buffer
 
+    @classmethod
+    def generate_template_jsonl(cls):
+        """Generate JSON Lines template (one example object per line)"""
+        field_info = cls.get_field_info()
+
+        example_row = {info['name']: f"ejemplo_{info['type']}" for info in field_info}
+
+        buffer = BytesIO()
+        buffer.write(json.dumps(example_row, ensure_ascii=False).encode('utf-8'))
+        buffer.write(b'\n')
+        buffer.seek(0)
+        return buffer
+
     @classmethod
     def validate_row(cls, row_data):
         """Validate a single row of data"""
         errors = []
         validated_data = {}
-        field_info = cls.get_field_info()
 
-        for info in field_info:
-            field_name = info['name']
-            field = info['field']
-            value = row_data.get(field_name) or row_data.get(info['verbose_name'])
+        for field_name, verbose_name, required, field_type, converter in cls.get_validation_plan().fields:
+            value = row_data.get(field_name)
+            if value is None:
+                value = row_data.get(verbose_name)
 
-            if info['required'] and (value is None or value == ''):
-                errors.append(f"El campo '{info['verbose_name']}' es requerido")
+            if value is None or value == '':
+                if required:
+                    errors.append(f"El campo '{verbose_name}' es requerido")
+                else:
+                    validated_data[field_name] = None
                 continue
 
-            if value is not None and value != '':
-                try:
-                    validated_value = cls._convert_field_value(field, value, info['type'])
-                    validated_data[field_name] = validated_value
-                except (ValueError, ValidationError) as e:
-                    errors.append(f"Error en campo '{info['verbose_name']}': {str(e)}")
-            else:
-                validated_data[field_name] = None
+            try:
+                validated_data[field_name] = converter(value)
+            except ValidationError as e:
+                errors.append(f"Error en campo '{verbose_name}': {str(e)}")
+            except Exception:
+                error = ValidationError(f"No se pudo convertir el valor '{value}' al tipo {field_type}")
+                errors.append(f"Error en campo '{verbose_name}': {str(error)}")
 
         return validated_data, errors
 
+    def validate_batch(self, rows):
+        """
+        Validate a batch of rows.
+
+        Each row goes through validate_row; importers can override this to
+        validate a whole batch at once (e.g. one query for all foreign keys).
+
+        Args:
+            rows (list): Normalized row dicts
+
+        Returns:
+            list: (validated_data, errors) tuple per row
+        """
+        return [self.validate_row(row_data) for row_data in rows]
+
     @classmethod
     def _convert_field_value(cls, field, value, field_type):
         """Convert and validate field value"""
@@ -257,29 +383,38 @@ class FlexImporter(metaclass=FlexImporterBase):
             return None
 
         try:
-            if field_type == 'integer':
-                return int(value)
-            elif field_type == 'float':
-                return float(value)
-            elif field_type == 'decimal':
-                return Decimal(str(value))
-            elif field_type == 'boolean':
-                if isinstance(value, bool):
-                    return value
-                return str(value).lower() in ('true', 'yes', 'si', 'sí', '1', 't')
-            elif field_type == 'date':
-                if isinstance(value, date):
-                    return value
-                return datetime.strptime(str(value), '%Y-%m-%d').date()
-            elif field_type == 'datetime':
-                if isinstance(value, datetime):
-                    return value
-                return datetime.fromisoformat(str(value))
-            else:
-                return str(value)
+            return cls.get_validation_plan().converters.get(field_type, _convert_text)(value)
         except Exception as e:
             raise ValidationError(f"No se pudo convertir el valor '{value}' al tipo {field_type}")
 
+    def import_batch(self, rows):
+        """
+        Import a batch of validated rows.
+
+        Override this method to write a whole batch at once (e.g. with
+        bulk_create). The default calls import_action for each row.
+
+        Args:
+            rows (list): Validated row dicts
+
+        Returns:
+            list: One outcome per row, in the same order. An outcome is any
+            value import_action may return ('created', 'updated', 'skipped',
+            {'action': ...}, True/None or an error message) or the exception
+            raised while importing that row
+        """
+        # Inside a transaction each row gets a savepoint, so a failing row
+        # does not abort the rest of the batch
+        in_transaction = transaction.get_connection().in_atomic_block
+        outcomes = []
+        for row_data in rows:
+            try:
+                with transaction.atomic() if in_transaction else nullcontext():
+                    outcomes.append(self.import_action(row_data))
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
     def import_action(self, row_data):
         """
         Override this method to implement custom import logic.
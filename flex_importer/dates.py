@@ -0,0 +1,219 @@
+"""
+Date and datetime conversion for FlexImporter fields.
+
+Date columns repeat heavily (thousands of rows share the same day), so each
+DateParser memoizes parsed strings in a bounded LRU cache. Fixed ISO layouts
+are parsed by hand, extra formats from Meta.date_formats are compiled once,
+and native values from openpyxl (datetime cells and Excel serial numbers)
+are converted without going through str.
+"""
+import re
+from datetime import date, datetime, time
+from functools import lru_cache
+
+from openpyxl.utils.datetime import from_excel
+
+DEFAULT_CACHE_SIZE = 4096
+
+# Regex for the numeric strptime directives; other formats use strptime
+FORMAT_DIRECTIVES = {
+    'Y': r'(?P<year>\d{4})',
+    'y': r'(?P<short_year>\d{2})',
+    'm': r'(?P<month>\d{1,2})',
+    'd': r'(?P<day>\d{1,2})',
+    'H': r'(?P<hour>\d{1,2})',
+    'M': r'(?P<minute>\d{1,2})',
+    'S': r'(?P<second>\d{1,2})',
+    'f': r'(?P<microsecond>\d{1,6})',
+}
+
+_parsers = {}
+
+
+def _parse_iso(text):
+    """
+    Parse 'YYYY-MM-DD', 'YYYY-MM-DD HH:MM:SS' or 'YYYY-MM-DDTHH:MM:SS' by slicing.
+
+    Returns:
+        datetime or None if text does not have one of those exact layouts
+        or its parts are out of range (e.g. month 25)
+    """
+    length = len(text)
+    if length != 10 and length != 19:
+        return None
+    if text[4] != '-' or text[7] != '-':
+        return None
+    if length == 19 and (text[10] not in ' T' or text[13] != ':' or text[16] != ':'):
+        return None
+
+    digits = text[0:4] + text[5:7] + text[8:10]
+    if length == 19:
+        digits += text[11:13] + text[14:16] + text[17:19]
+    if not digits.isdigit() or not digits.isascii():
+        return None
+
+    try:
+        if length == 10:
+            return datetime(int(text[0:4]), int(text[5:7]), int(text[8:10]))
+        return datetime(
+            int(text[0:4]), int(text[5:7]), int(text[8:10]),
+            int(text[11:13]), int(text[14:16]), int(text[17:19])
+        )
+    except ValueError:
+        # Let the declared formats (e.g. '%Y-%d-%m') try it
+        return None
+
+
+def compile_format(date_format):
+    """
+    Compile a strptime format into a parser callable.
+
+    Formats made only of numeric directives (%Y %y %m %d %H %M %S %f) become
+    a single regex; anything else falls back to datetime.strptime.
+
+    Args:
+        date_format: strptime format string (e.g. '%d/%m/%Y')
+
+    Returns:
+        callable: text -> datetime, raising ValueError when text does not match
+    """
+    pattern = []
+    position = 0
+    while position < len(date_format):
+        char = date_format[position]
+        if char == '%' and position + 1 < len(date_format):
+            directive = date_format[position + 1]
+            if directive == '%':
+                pattern.append('%')
+            elif directive in FORMAT_DIRECTIVES:
+                pattern.append(FORMAT_DIRECTIVES[directive])
+            else:
+                return lambda text: datetime.strptime(text, date_format)
+            position += 2
+        elif char.isspace():
+            pattern.append(r'\s+')
+            position += 1
+        else:
+            pattern.append(re.escape(char))
+            position += 1
+
+    try:
+        regex = re.compile(''.join(pattern))
+    except re.error:
+        # Repeated directives (duplicate groups)
+        return lambda text: datetime.strptime(text, date_format)
+
+    def parse(text):
+        match = regex.fullmatch(text)
+        if match is None:
+            raise ValueError(f"'{text}' no coincide con el formato '{date_format}'")
+        parts = match.groupdict()
+        if parts.get('short_year') is not None:
+            # Same pivot as strptime: 69-99 -> 1900s, 00-68 -> 2000s
+            short_year = int(parts['short_year'])
+            year = short_year + (1900 if short_year >= 69 else 2000)
+        else:
+            year = int(parts.get('year') or 1900)
+        return datetime(
+            year,
+            int(parts.get('month') or 1),
+            int(parts.get('day') or 1),
+            int(parts.get('hour') or 0),
+            int(parts.get('minute') or 0),
+            int(parts.get('second') or 0),
+            int((parts.get('microsecond') or '0').ljust(6, '0')),
+        )
+
+    return parse
+
+
+class DateParser:
+    """
+    Convert cell values to date/datetime with a memoizing cache.
+
+    Strings are tried as fixed ISO layouts, then against the extra formats in
+    order, then with the standard parsers used before (strptime '%Y-%m-%d'
+    for dates, fromisoformat for datetimes).
+    """
+
+    def __init__(self, formats=(), cache_size=DEFAULT_CACHE_SIZE):
+        self.formats = tuple(formats)
+        self._format_parsers = tuple(compile_format(date_format) for date_format in self.formats)
+        self._parse_date = lru_cache(maxsize=cache_size)(self._parse_date_text)
+        self._parse_datetime = lru_cache(maxsize=cache_size)(self._parse_datetime_text)
+
+    def _parse_with_formats(self, text):
+        for parse in self._format_parsers:
+            try:
+                return parse(text)
+            except ValueError:
+                continue
+        return None
+
+    def _parse_date_text(self, text):
+        parsed = _parse_iso(text) if len(text) == 10 else None
+        if parsed is None:
+            parsed = self._parse_with_formats(text)
+        if parsed is None:
+            parsed = datetime.strptime(text, '%Y-%m-%d')
+        return parsed.date()
+
+    def _parse_datetime_text(self, text):
+        parsed = _parse_iso(text)
+        if parsed is None:
+            parsed = self._parse_with_formats(text)
+        if parsed is None:
+            parsed = datetime.fromisoformat(text)
+        return parsed
+
+    def _from_serial(self, value):
+        """Convert an Excel serial number (days since 1899-12-30) to datetime"""
+        converted = from_excel(value)
+        if not isinstance(converted, datetime):
+            raise ValueError(f"'{value}' no es un número de serie de fecha de Excel")
+        return converted
+
+    def to_date(self, value):
+        """Convert a cell value to date"""
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return self._from_serial(value).date()
+        return self._parse_date(str(value))
+
+    def to_datetime(self, value):
+        """Convert a cell value to datetime"""
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, date):
+            return datetime.combine(value, time())
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return self._from_serial(value)
+        return self._parse_datetime(str(value))
+
+    def cache_info(self):
+        """Cache statistics of the date and datetime caches"""
+        return {
+            'date': self._parse_date.cache_info(),
+            'datetime': self._parse_datetime.cache_info(),
+        }
+
+
+def get_date_parser(formats=()):
+    """
+    Get the shared DateParser for a list of extra formats.
+
+    Parsers (and their caches) are shared by importers declaring the same
+    formats. The cache size comes from FLEX_IMPORTER_DATE_CACHE_SIZE.
+    """
+    formats = tuple(formats or ())
+    parser = _parsers.get(formats)
+    if parser is None:
+        from django.conf import settings
+
+        cache_size = getattr(settings, 'FLEX_IMPORTER_DATE_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+        parser = DateParser(formats, cache_size=cache_size)
+        _parsers[formats] = parser
+    return parser
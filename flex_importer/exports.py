@@ -0,0 +1,157 @@
+"""
+Failed rows export for FlexImporter.
+
+Writes the rows of a job that failed, in the importer template layout plus
+an error column, so they can be fixed and imported again. The output is
+produced as an iterator of byte chunks for a StreamingHttpResponse: rows
+are read from ImportRowError in chunks and never all held in memory.
+"""
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+
+from openpyxl import Workbook
+
+ERRORS_COLUMN = 'Errores'
+# Key of the error messages in JSONL exports
+ERRORS_KEY = '_errores'
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+class FailedRowsExport:
+    """
+    Export the failed rows of an import job.
+
+    Rows come from the stored ImportRowError data. Errors stored without
+    data (e.g. migrated from old jobs) are looked up in the original file,
+    which is read once for all of them.
+
+    Args:
+        import_job: ImportJob whose row errors are exported
+        importer_class: Importer class of the job, for the template layout
+        chunk_size: Row errors fetched per query and rows per output chunk
+    """
+
+    def __init__(self, import_job, importer_class, chunk_size=2000):
+        self.import_job = import_job
+        self.importer_class = importer_class
+        self.chunk_size = chunk_size
+        self.field_names = [info['name'] for info in importer_class.get_field_info()]
+
+    def iter_rows(self):
+        """Yield (row dict by field name, error messages) for every stored row error"""
+        row_errors = self.import_job.row_errors.order_by('id').only('row_number', 'source', 'errors', 'data')
+        missing = set(
+            self.import_job.row_errors.filter(data__isnull=True).values_list('source', 'row_number')
+        )
+        original_rows = self._read_original_rows(missing) if missing else {}
+
+        for row_error in row_errors.iterator(chunk_size=self.chunk_size):
+            data = row_error.data
+            if data is None:
+                data = original_rows.get((row_error.source, row_error.row_number), {})
+            yield data, row_error.errors
+
+    def _read_original_rows(self, keys):
+        """Read the rows with the given (source, row_number) keys from the job file"""
+        from .processor import ImportProcessor
+
+        if not self.import_job.uploaded_file:
+            return {}
+        processor = ImportProcessor(self.import_job)
+        processor.importer_class = self.importer_class
+        try:
+            reader = processor._get_reader()
+        except (OSError, ValueError):
+            return {}
+
+        field_name_map = self.importer_class.get_validation_plan().field_name_map
+        rows = {}
+        for batch in reader.iter_batches(self.chunk_size):
+            for row_number, source, row_data in batch:
+                key = (source or '', row_number)
+                if key in keys:
+                    rows[key] = {field_name_map.get(name, name): value for name, value in row_data.items()}
+        return rows
+
+    def _iter_values(self):
+        """Yield the template column values plus the joined errors of every failed row"""
+        for data, errors in self.iter_rows():
+            values = [data.get(name) for name in self.field_names]
+            values.append('; '.join(errors))
+            yield values
+
+    def iter_csv(self):
+        """Yield the export as UTF-8 CSV chunks (with BOM, like the CSV template)"""
+        output = StringIO()
+        writer = csv.writer(output)
+        writer.writerow(self.importer_class.get_template_headers() + [ERRORS_COLUMN])
+
+        first = True
+        for idx, values in enumerate(self._iter_values(), start=1):
+            writer.writerow(values)
+            if idx % self.chunk_size == 0:
+                yield self._take(output, first)
+                first = False
+        yield self._take(output, first)
+
+    @staticmethod
+    def _take(output, first):
+        """Get and clear the buffered CSV text as bytes"""
+        chunk = output.getvalue().encode('utf-8-sig' if first else 'utf-8')
+        output.seek(0)
+        output.truncate()
+        return chunk
+
+    def iter_jsonl(self):
+        """Yield the export as JSON Lines chunks, one object per failed row"""
+        lines = []
+        for data, errors in self.iter_rows():
+            row = {name: data.get(name) for name in self.field_names}
+            row[ERRORS_KEY] = errors
+            lines.append(json.dumps(row, ensure_ascii=False, default=str))
+            if len(lines) >= self.chunk_size:
+                yield ('\n'.join(lines) + '\n').encode('utf-8')
+                lines = []
+        if lines:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+    def iter_xlsx(self, block_size=64 * 1024):
+        """
+        Yield the export as an Excel file.
+
+        The workbook is built in write-only mode, which streams rows to a
+        temporary file instead of keeping cells in memory; the saved file is
+        then sent in blocks and removed.
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('Errores')
+        ws.append(self.importer_class.get_template_headers() + [ERRORS_COLUMN])
+        for values in self._iter_values():
+            ws.append(values)
+
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        try:
+            wb.save(path)
+            with open(path, 'rb') as f:
+                while True:
+                    block = f.read(block_size)
+                    if not block:
+                        break
+                    yield block
+        finally:
+            os.remove(path)
+
+    def iter_format(self, file_format):
+        """Get the chunk iterator of an export format ('csv', 'jsonl' or 'xlsx')"""
+        if file_format not in EXPORT_CONTENT_TYPES:
+            raise ValueError(f'Formato de exportación no soportado: {file_format}')
+        return getattr(self, f'iter_{file_format}')()
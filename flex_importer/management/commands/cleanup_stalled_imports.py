@@ -42,10 +42,10 @@ class Command(BaseCommand):
         self.stdout.write()
 
         # Find stalled jobs
-        stalled_jobs = []
-        for job in ImportJob.objects.filter(status__in=['pending', 'processing']):
-            if job.is_stalled(timeout_minutes):
-                stalled_jobs.append(job)
+        stalled_jobs = list(
+            ImportJob.objects.stalled(timeout_minutes)
+            .only('id', 'importer_name', 'status', 'created_at', 'last_heartbeat')
+        )
 
         if not stalled_jobs:
             self.stdout.write(self.style.SUCCESS(
@@ -66,6 +66,8 @@ class Command(BaseCommand):
             self.stdout.write(f"  • ID {job.id}: {job.importer_name}")
             self.stdout.write(f"    Estado: {job.status}")
             self.stdout.write(f"    Creado: {job.created_at.strftime('%Y-%m-%d %H:%M:%S')}")
+            if job.last_heartbeat:
+                self.stdout.write(f"    Último latido: {job.last_heartbeat.strftime('%Y-%m-%d %H:%M:%S')}")
             self.stdout.write(f"    Tiempo transcurrido: {hours}h {minutes}m {seconds}s")
             self.stdout.write()
 
@@ -80,13 +82,8 @@ class Command(BaseCommand):
             "Marcando trabajos como fallidos...\n"
         ))
 
-        marked_count = 0
-        for job in stalled_jobs:
-            if job.mark_as_failed_if_stalled(timeout_minutes):
-                marked_count += 1
-                self.stdout.write(self.style.SUCCESS(
-                    f"  [OK] Job ID {job.id} marcado como fallido"
-                ))
+        # A single UPDATE; jobs that sent a heartbeat since the listing are left alone
+        marked_count = ImportJob.objects.mark_stalled_as_failed(timeout_minutes)
 
         self.stdout.write()
         self.stdout.write("="*70)
@@ -0,0 +1,51 @@
+"""
+Management command to resume an interrupted import job after its checkpoint.
+
+Usage:
+    python manage.py resume_import 42
+    python manage.py resume_import 42 --async  # Queue it in Celery
+"""
+from django.core.management.base import BaseCommand, CommandError
+from flex_importer.models import ImportJob
+from flex_importer.tasks import process_import_async, process_import_sync
+from flex_importer.utils import should_use_async
+
+
+class Command(BaseCommand):
+    help = 'Reanuda una importación interrumpida desde su último punto de control'
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_id', type=int, help='ID de la importación a reanudar')
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='use_async',
+            help='Encola la reanudación en Celery en lugar de procesarla aquí',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import_job = ImportJob.objects.get(pk=options['job_id'])
+        except ImportJob.DoesNotExist:
+            raise CommandError(f'No existe la importación {options["job_id"]}')
+
+        if not import_job.can_resume:
+            raise CommandError(
+                f'La importación {import_job.pk} no puede ser reanudada '
+                f'(estado: {import_job.status}, punto de control: {import_job.checkpoint_row})'
+            )
+
+        if options['use_async']:
+            if not should_use_async():
+                raise CommandError('Celery no está disponible')
+            process_import_async.delay(import_job.pk, resume=True)
+            self.stdout.write(self.style.SUCCESS(
+                f'Reanudación de la importación {import_job.pk} encolada desde la fila {import_job.checkpoint_row}'
+            ))
+            return
+
+        self.stdout.write(f'Reanudando importación {import_job.pk} desde la fila {import_job.checkpoint_row}...')
+        process_import_sync(import_job.pk, resume=True)
+        import_job.refresh_from_db()
+        style = self.style.SUCCESS if import_job.status in ('success', 'partial') else self.style.ERROR
+        self.stdout.write(style(f'{import_job.get_status_display()}: {import_job.result_message}'))
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flex_importer', '0004_add_importer_permissions'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='importjob',
+            options={'ordering': ['-created_at'], 'verbose_name': 'Trabajo de Importación', 'verbose_name_plural': 'Trabajos de Importación'},
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='file_format',
+            field=models.CharField(choices=[('xlsx', 'Excel (XLSX)'), ('csv', 'CSV'), ('json', 'JSON'), ('jsonl', 'JSON Lines (JSONL)')], max_length=10, verbose_name='Formato'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_error_details_to_rows(apps, schema_editor):
+    """Move the error_details JSON entries of every job to ImportRowError rows"""
+    ImportJob = apps.get_model('flex_importer', 'ImportJob')
+    ImportRowError = apps.get_model('flex_importer', 'ImportRowError')
+
+    jobs = ImportJob.objects.exclude(error_details=[]).exclude(error_details__isnull=True)
+    for job in jobs.only('pk', 'error_details').iterator():
+        ImportRowError.objects.bulk_create(
+            [
+                ImportRowError(
+                    job_id=job.pk,
+                    row_number=entry.get('row') or 0,
+                    source=entry.get('file') or '',
+                    errors=entry.get('errors') or [],
+                    data=entry.get('data'),
+                )
+                for entry in job.error_details
+            ],
+            batch_size=1000,
+        )
+
+
+def copy_rows_to_error_details(apps, schema_editor):
+    """Rebuild the error_details JSON of every job from its ImportRowError rows"""
+    ImportJob = apps.get_model('flex_importer', 'ImportJob')
+    ImportRowError = apps.get_model('flex_importer', 'ImportRowError')
+
+    job_ids = ImportRowError.objects.values_list('job_id', flat=True).distinct()
+    for job_id in job_ids:
+        error_details = []
+        for row_error in ImportRowError.objects.filter(job_id=job_id).order_by('id').iterator():
+            entry = {'row': row_error.row_number, 'errors': row_error.errors, 'data': row_error.data}
+            if row_error.source:
+                entry['file'] = row_error.source
+            error_details.append(entry)
+        ImportJob.objects.filter(pk=job_id).update(error_details=error_details)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flex_importer', '0005_add_jsonl_format'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRowError',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.IntegerField(verbose_name='Fila')),
+                ('source', models.CharField(blank=True, max_length=255, verbose_name='Archivo')),
+                ('errors', models.JSONField(default=list, verbose_name='Errores')),
+                ('data', models.JSONField(blank=True, null=True, verbose_name='Datos')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='row_errors', to='flex_importer.importjob', verbose_name='Trabajo de Importación')),
+            ],
+            options={
+                'verbose_name': 'Error de Fila',
+                'verbose_name_plural': 'Errores de Fila',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['job', 'row_number'], name='flex_import_job_row_idx')],
+            },
+        ),
+        migrations.RunPython(copy_error_details_to_rows, copy_rows_to_error_details),
+        migrations.RemoveField(
+            model_name='importjob',
+            name='error_details',
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+from django.utils.dateparse import parse_datetime
+
+
+def copy_progress_log_to_entries(apps, schema_editor):
+    """Move the progress_log JSON entries of every job to ImportLogEntry rows"""
+    ImportJob = apps.get_model('flex_importer', 'ImportJob')
+    ImportLogEntry = apps.get_model('flex_importer', 'ImportLogEntry')
+
+    jobs = ImportJob.objects.exclude(progress_log=[]).exclude(progress_log__isnull=True)
+    for job in jobs.only('pk', 'progress_log', 'created_at').iterator():
+        ImportLogEntry.objects.bulk_create(
+            [
+                ImportLogEntry(
+                    job_id=job.pk,
+                    sequence=sequence,
+                    timestamp=parse_datetime(entry.get('timestamp') or '') or job.created_at,
+                    level=entry.get('level') or 'info',
+                    message=entry.get('message') or '',
+                    processed=entry.get('processed') or 0,
+                    total=entry.get('total') or 0,
+                )
+                for sequence, entry in enumerate(job.progress_log, start=1)
+            ],
+            batch_size=1000,
+        )
+
+
+def copy_entries_to_progress_log(apps, schema_editor):
+    """Rebuild the progress_log JSON of every job from its ImportLogEntry rows"""
+    ImportJob = apps.get_model('flex_importer', 'ImportJob')
+    ImportLogEntry = apps.get_model('flex_importer', 'ImportLogEntry')
+
+    job_ids = ImportLogEntry.objects.values_list('job_id', flat=True).distinct()
+    for job_id in job_ids:
+        progress_log = [
+            {
+                'timestamp': entry.timestamp.isoformat(),
+                'message': entry.message,
+                'level': entry.level,
+                'processed': entry.processed,
+                'total': entry.total,
+            }
+            for entry in ImportLogEntry.objects.filter(job_id=job_id).order_by('sequence', 'id').iterator()
+        ]
+        ImportJob.objects.filter(pk=job_id).update(progress_log=progress_log)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flex_importer', '0006_importrowerror'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField(verbose_name='Secuencia')),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('level', models.CharField(default='info', max_length=10, verbose_name='Nivel')),
+                ('message', models.TextField(verbose_name='Mensaje')),
+                ('processed', models.IntegerField(default=0, verbose_name='Filas Procesadas')),
+                ('total', models.IntegerField(default=0, verbose_name='Total de Filas')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log_entries', to='flex_importer.importjob', verbose_name='Trabajo de Importación')),
+            ],
+            options={
+                'verbose_name': 'Entrada de Log',
+                'verbose_name_plural': 'Entradas de Log',
+                'ordering': ['sequence', 'id'],
+                'indexes': [models.Index(fields=['job', 'sequence'], name='flex_import_job_seq_idx')],
+            },
+        ),
+        migrations.RunPython(copy_progress_log_to_entries, copy_entries_to_progress_log),
+        migrations.RemoveField(
+            model_name='importjob',
+            name='progress_log',
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flex_importer', '0007_importlogentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(fields=['-created_at'], name='flex_job_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(fields=['status', '-created_at'], name='flex_job_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(fields=['file_format', '-created_at'], name='flex_job_format_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(fields=['importer_class', '-created_at'], name='flex_job_importer_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flex_importer', '0008_importjob_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='parent_job',
+            field=models.ForeignKey(blank=True, help_text='Importación cuyas filas con error se reintentan en este trabajo', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='retry_jobs', to='flex_importer.importjob', verbose_name='Importación Original'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flex_importer', '0009_importjob_parent_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='last_heartbeat',
+            field=models.DateTimeField(blank=True, help_text='Última vez que el worker registró progreso', null=True, verbose_name='Último Latido'),
+        ),
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(fields=['status', 'last_heartbeat'], name='flex_job_heartbeat_idx'),
+        ),
+    ]
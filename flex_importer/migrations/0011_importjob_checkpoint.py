@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flex_importer', '0010_importjob_last_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='checkpoint_row',
+            field=models.IntegerField(blank=True, help_text='Número de la última fila cuyo resultado y contadores están guardados; una reanudación sigue desde la siguiente', null=True, verbose_name='Última Fila Guardada'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='checkpoint_source',
+            field=models.CharField(blank=True, help_text='Archivo dentro del ZIP de la última fila guardada', max_length=255, verbose_name='Archivo de la Última Fila'),
+        ),
+    ]
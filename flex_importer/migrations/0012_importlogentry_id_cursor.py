@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flex_importer', '0011_importjob_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='importlogentry',
+            options={'ordering': ['id'], 'verbose_name': 'Entrada de Log', 'verbose_name_plural': 'Entradas de Log'},
+        ),
+        migrations.RemoveIndex(
+            model_name='importlogentry',
+            name='flex_import_job_seq_idx',
+        ),
+        # Entries are ordered by id from now on; the default lets the field be re-added on rollback
+        migrations.AlterField(
+            model_name='importlogentry',
+            name='sequence',
+            field=models.PositiveIntegerField(default=0, verbose_name='Secuencia'),
+        ),
+        migrations.RemoveField(
+            model_name='importlogentry',
+            name='sequence',
+        ),
+        migrations.AddIndex(
+            model_name='importlogentry',
+            index=models.Index(fields=['job', 'id'], name='flex_log_job_id_idx'),
+        ),
+    ]
@@ -1,7 +1,8 @@
 """
 Model-based importer for FlexImporter
 """
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.utils import timezone
 from .base import FlexImporter, FlexImporterBase
 
 
@@ -238,3 +239,133 @@ class FlexModelImporter(FlexImporter, metaclass=FlexModelImporterBase):
 
         except Exception as e:
             raise Exception(f"Error saving {model.__name__}: {str(e)}")
+
+    @classmethod
+    def save_instances(cls, rows):
+        """
+        Create or update the instances of a batch with set-based queries.
+
+        Bulk counterpart of save_instance for import_batch. Existing rows are
+        preloaded with a single key_field__in query, then the batch is written
+        with one bulk_create and one bulk_update. When key_field is unique and
+        the database supports it, a single INSERT ... ON CONFLICT DO UPDATE is
+        used instead. Rows repeating a key within the batch are merged, the
+        later ones counting as 'updated'.
+
+        Like any bulk operation, save() and model signals are not called.
+        Database errors are raised for the whole batch.
+
+        Args:
+            rows (list): Validated row dicts
+
+        Returns:
+            list: {'instance': instance, 'action': 'created'/'updated'} per
+            row, or an Exception for keys matching several existing rows
+        """
+        model = cls.get_model()
+        if not model:
+            return [None] * len(rows)
+
+        key_field = cls.get_key_field()
+        using = router.db_for_write(model)
+        manager = model._default_manager.db_manager(using)
+
+        keys = set()
+        if key_field:
+            keys = {row_data[key_field] for row_data in rows if row_data.get(key_field) is not None}
+
+        existing = {}
+        if keys:
+            pk_name = model._meta.pk.name
+            for instance in manager.filter(**{f'{key_field}__in': keys}).only(pk_name, key_field):
+                existing.setdefault(getattr(instance, key_field), []).append(instance)
+
+        # Rows without key are always created; keyed rows are merged per key
+        outcomes = []
+        row_keys = []
+        pending = {}
+        for row_data in rows:
+            key = row_data.get(key_field) if key_field else None
+            row_keys.append(key)
+
+            if key is None:
+                outcomes.append({'instance': model(**row_data), 'action': 'created'})
+                continue
+
+            matches = existing.get(key, [])
+            if len(matches) > 1:
+                outcomes.append(Exception(
+                    f"Error saving {model.__name__}: {len(matches)} rows with {key_field}={key!r}"
+                ))
+                continue
+
+            outcomes.append({'instance': None, 'action': 'updated' if matches or key in pending else 'created'})
+            pending.setdefault(key, {}).update(row_data)
+
+        field_names = {field.name for field in model._meta.concrete_fields}
+        update_fields = sorted({
+            name for data in pending.values() for name in data
+            if name != key_field and name in field_names
+        })
+        auto_now_fields = [
+            field.name for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now', False) and field.name not in update_fields
+        ]
+
+        new_instances = [
+            outcome['instance'] for key, outcome in zip(row_keys, outcomes)
+            if key is None and isinstance(outcome, dict)
+        ]
+        instances = {}
+        updated_instances = []
+        native = cls._supports_native_upsert(key_field, using)
+
+        for key, data in pending.items():
+            if native or key not in existing:
+                instance = model(**data)
+                new_instances.append(instance)
+            else:
+                instance = existing[key][0]
+                for name, value in data.items():
+                    setattr(instance, name, value)
+                if auto_now_fields:
+                    now = timezone.now()
+                    for name in auto_now_fields:
+                        setattr(instance, name, now)
+                updated_instances.append(instance)
+            instances[key] = instance
+
+        with transaction.atomic(using=using):
+            if native and pending:
+                if update_fields:
+                    manager.bulk_create(
+                        new_instances,
+                        update_conflicts=True,
+                        unique_fields=[key_field],
+                        update_fields=update_fields + auto_now_fields,
+                    )
+                else:
+                    manager.bulk_create(new_instances, ignore_conflicts=True)
+            elif new_instances:
+                manager.bulk_create(new_instances)
+            if updated_instances and update_fields:
+                manager.bulk_update(updated_instances, update_fields + auto_now_fields)
+
+        for key, outcome in zip(row_keys, outcomes):
+            if key is not None and isinstance(outcome, dict):
+                outcome['instance'] = instances[key]
+        return outcomes
+
+    @classmethod
+    def _supports_native_upsert(cls, key_field, using):
+        """
+        Check if key_field is unique and the database has INSERT ... ON CONFLICT.
+
+        The feature flag (and bulk_create(update_conflicts=...)) exists from
+        Django 4.1; older versions use bulk_create plus bulk_update.
+        """
+        if not key_field:
+            return False
+        field = cls.get_model()._meta.get_field(key_field)
+        features = connections[using].features
+        return field.unique and getattr(features, 'supports_update_conflicts_with_target', False)
@@ -1,13 +1,80 @@
 """
 Models for FlexImporter
 """
-from django.db import models
+from django.db import connections, models, router
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
 User = get_user_model()
 
 
+STALLED_MESSAGE = (
+    'Importación cancelada: La tarea quedó atascada después de {timeout} minutos sin procesarse. '
+    'Posibles causas: worker de Celery no está corriendo o Redis no está disponible.'
+)
+
+
+class ImportJobQuerySet(models.QuerySet):
+    """QuerySet of import jobs with stalled job detection"""
+
+    def stalled(self, timeout_minutes=10):
+        """
+        Jobs that stopped making progress.
+
+        A pending job is stalled when it was created more than timeout_minutes
+        ago. A processing job is stalled when its worker has not written a
+        heartbeat for timeout_minutes (falling back to started_at, then
+        created_at, for jobs without heartbeat).
+        """
+        cutoff = timezone.now() - timezone.timedelta(minutes=timeout_minutes)
+        no_heartbeat = models.Q(status='processing', last_heartbeat__isnull=True)
+        return self.filter(
+            models.Q(status='pending', created_at__lt=cutoff)
+            | models.Q(status='processing', last_heartbeat__lt=cutoff)
+            | (no_heartbeat & models.Q(started_at__lt=cutoff))
+            | (no_heartbeat & models.Q(started_at__isnull=True, created_at__lt=cutoff))
+        )
+
+    def mark_stalled_as_failed(self, timeout_minutes=10):
+        """
+        Mark the stalled jobs as failed with a single UPDATE.
+
+        A log entry is added to every marked job with one bulk insert, and
+        their live progress channels are cleared so progress is read from
+        the database again.
+
+        Returns:
+            int: Number of jobs marked as failed
+        """
+        now = timezone.now()
+        marked = self.stalled(timeout_minutes).update(
+            status='failed',
+            result_message=STALLED_MESSAGE.format(timeout=timeout_minutes),
+            completed_at=now,
+        )
+        if marked:
+            # completed_at tells apart the jobs this UPDATE marked
+            job_ids = list(
+                self.model.objects.filter(status='failed', completed_at=now).values_list('pk', flat=True)
+            )
+            ImportLogEntry.objects.bulk_create([
+                ImportLogEntry(
+                    job_id=job_id,
+                    timestamp=now,
+                    level='error',
+                    message=f'Tarea marcada como fallida por timeout ({timeout_minutes} min)',
+                )
+                for job_id in job_ids
+            ], batch_size=500)
+
+            from .progress import get_progress_channel
+            for job_id in job_ids:
+                channel = get_progress_channel(job_id)
+                if channel is not None:
+                    channel.clear()
+        return marked
+
+
 class ImportJob(models.Model):
     """Record of import job executions"""
 
@@ -23,6 +90,7 @@ class ImportJob(models.Model):
         ('xlsx', 'Excel (XLSX)'),
         ('csv', 'CSV'),
         ('json', 'JSON'),
+        ('jsonl', 'JSON Lines (JSONL)'),
     ]
 
     importer_class = models.CharField(
@@ -72,16 +140,6 @@ class ImportJob(models.Model):
         default=0,
         verbose_name='Filas con Error'
     )
-    error_details = models.JSONField(
-        default=list,
-        blank=True,
-        verbose_name='Detalles de Errores'
-    )
-    progress_log = models.JSONField(
-        default=list,
-        blank=True,
-        verbose_name='Log de Progreso'
-    )
     result_message = models.TextField(
         blank=True,
         verbose_name='Mensaje de Resultado'
@@ -97,6 +155,15 @@ class ImportJob(models.Model):
         blank=True,
         verbose_name='Creado por'
     )
+    parent_job = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='retry_jobs',
+        verbose_name='Importación Original',
+        help_text='Importación cuyas filas con error se reintentan en este trabajo'
+    )
     created_at = models.DateTimeField(
         default=timezone.now,
         verbose_name='Fecha de Creación'
@@ -111,11 +178,40 @@ class ImportJob(models.Model):
         blank=True,
         verbose_name='Fecha de Finalización'
     )
+    last_heartbeat = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Último Latido',
+        help_text='Última vez que el worker registró progreso'
+    )
+
+    checkpoint_row = models.IntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Última Fila Guardada',
+        help_text='Número de la última fila cuyo resultado y contadores están guardados; una reanudación sigue desde la siguiente'
+    )
+    checkpoint_source = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Archivo de la Última Fila',
+        help_text='Archivo dentro del ZIP de la última fila guardada'
+    )
+
+    objects = ImportJobQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Trabajo de Importación'
         verbose_name_plural = 'Trabajos de Importación'
         ordering = ['-created_at']
+        # Match the admin changelist filters, each followed by the default ordering
+        indexes = [
+            models.Index(fields=['-created_at'], name='flex_job_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='flex_job_status_idx'),
+            models.Index(fields=['file_format', '-created_at'], name='flex_job_format_idx'),
+            models.Index(fields=['importer_class', '-created_at'], name='flex_job_importer_idx'),
+            models.Index(fields=['status', 'last_heartbeat'], name='flex_job_heartbeat_idx'),
+        ]
 
     def __str__(self):
         return f"{self.importer_name} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
@@ -141,24 +237,134 @@ class ImportJob(models.Model):
             return (self.processed_rows / self.total_rows) * 100
         return 0
 
-    def add_progress_log(self, message, level='info'):
-        """Add a log entry to progress_log"""
-        if self.progress_log is None:
-            self.progress_log = []
-
-        log_entry = {
-            'timestamp': timezone.now().isoformat(),
-            'message': message,
-            'level': level,
-            'processed': self.processed_rows,
-            'total': self.total_rows
-        }
-        self.progress_log.append(log_entry)
-        self.save(update_fields=['progress_log'])
+    @property
+    def error_details(self):
+        """
+        Row errors as a list of dicts, in the format of the former error_details field.
+
+        Loads every stored error: prefer querying row_errors with a slice.
+        """
+        return [row_error.as_dict() for row_error in self.row_errors.all()]
+
+    @property
+    def progress_log(self):
+        """
+        Progress log entries as a list of dicts, in the format of the former progress_log field.
+
+        Loads every entry: prefer get_progress_log(limit) to read only the tail.
+        """
+        return self.get_progress_log()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.flush_progress_log()
+        self.publish_progress()
+
+    def add_progress_log(self, message, level='info', buffer=False):
+        """
+        Append an entry to the progress log.
+
+        Args:
+            message: Log message
+            level: 'info', 'success', 'warning' or 'error'
+            buffer: If True, the entry is kept in memory until the next
+                flush_progress_log() or save(), so many entries are written
+                with a single bulk insert (and published to the progress
+                channel on the next publish_progress())
+        """
+        entry = ImportLogEntry(
+            job=self,
+            timestamp=timezone.now(),
+            level=level,
+            message=message,
+            processed=self.processed_rows,
+            total=self.total_rows,
+        )
+        self.__dict__.setdefault('_pending_log_entries', []).append(entry)
+        self.__dict__.setdefault('_unpublished_log_entries', []).append(entry)
+        if not buffer:
+            self.flush_progress_log()
+            self.publish_progress()
+
+    def flush_progress_log(self):
+        """
+        Write the buffered progress log entries with bulk_create.
+
+        Entry ids are the log cursor. On databases where bulk_create does not
+        return them (MySQL), they are read back with one query over the job
+        entries after the last id known here, matching timestamp, level and
+        message.
+        """
+        pending = self.__dict__.get('_pending_log_entries')
+        if pending and self.pk is not None:
+            ImportLogEntry.objects.bulk_create(pending, batch_size=500)
+            if not connections[router.db_for_write(ImportLogEntry)].features.can_return_rows_from_bulk_insert:
+                self._read_back_log_ids(pending)
+            self._pending_log_entries = []
+
+    def _read_back_log_ids(self, entries):
+        """Set the pk of log entries inserted without returning their ids"""
+        candidates = {}
+        written = ImportLogEntry.objects.filter(
+            job=self, id__gt=self.__dict__.get('_last_log_id', 0)
+        ).order_by('id').values_list('id', 'timestamp', 'level', 'message')
+        for pk, timestamp, level, message in written:
+            candidates.setdefault((timestamp, level, message), []).append(pk)
+
+        for entry in entries:
+            pks = candidates.get((entry.timestamp, entry.level, entry.message))
+            if pks:
+                entry.pk = pks.pop(0)
+                self._last_log_id = max(self.__dict__.get('_last_log_id', 0), entry.pk)
+
+    def publish_progress(self):
+        """
+        Publish the counters and new log entries to the live progress channel, if enabled.
+
+        Entries still held back in memory (inside an atomic import) have no
+        id yet and are published once they are written; written entries whose
+        id could not be read back are left to the database log.
+        """
+        from .progress import get_progress_channel
+
+        unpublished = self.__dict__.get('_unpublished_log_entries') or []
+        pending = {id(entry) for entry in self.__dict__.get('_pending_log_entries') or []}
+        self._unpublished_log_entries = [entry for entry in unpublished if entry.pk is None and id(entry) in pending]
+        channel = get_progress_channel(self.pk)
+        if channel is not None:
+            channel.append_log([entry.as_dict() for entry in unpublished if entry.pk is not None])
+            channel.publish(self)
+
+    def get_progress_log(self, limit=None, since=None):
+        """
+        Get the progress log entries as dicts, oldest first.
+
+        Args:
+            limit: Only return the last `limit` entries (None for all)
+            since: Only return entries with an id greater than this one
+
+        Returns:
+            list: Entries with timestamp, message, level, processed, total and id
+        """
+        log_entries = self.log_entries.all()
+        if since is not None:
+            log_entries = log_entries.filter(id__gt=since)
+        if limit is None:
+            entries = list(log_entries)
+        else:
+            entries = list(log_entries.order_by('-id')[:limit])[::-1]
+        return [entry.as_dict() for entry in entries]
+
+    @property
+    def can_resume(self):
+        """Check if the job was interrupted after saving a checkpoint (and no worker is still running it)"""
+        if self.checkpoint_row is None:
+            return False
+        return self.status == 'failed' or (self.status == 'processing' and self.is_stalled())
 
     def is_stalled(self, timeout_minutes=10):
         """
-        Check if this import job is stalled (stuck in pending/processing state).
+        Check if this import job is stalled (see ImportJobQuerySet.stalled).
 
         Args:
             timeout_minutes: Minutes to wait before considering a job stalled
@@ -169,21 +375,10 @@ class ImportJob(models.Model):
         if self.status not in ['pending', 'processing']:
             return False
 
-        # Calculate time since creation
-        time_elapsed = timezone.now() - self.created_at
-        timeout_threshold = timezone.timedelta(minutes=timeout_minutes)
-
-        # If pending for too long, it's stalled
-        if self.status == 'pending' and time_elapsed > timeout_threshold:
-            return True
-
-        # If processing but no progress in timeout period
-        if self.status == 'processing' and self.started_at:
-            time_since_start = timezone.now() - self.started_at
-            if time_since_start > timeout_threshold and self.processed_rows == 0:
-                return True
-
-        return False
+        cutoff = timezone.now() - timezone.timedelta(minutes=timeout_minutes)
+        if self.status == 'pending':
+            return self.created_at < cutoff
+        return (self.last_heartbeat or self.started_at or self.created_at) < cutoff
 
     def mark_as_failed_if_stalled(self, timeout_minutes=10):
         """
@@ -195,17 +390,121 @@ class ImportJob(models.Model):
         Returns:
             bool: True if job was marked as failed, False otherwise
         """
-        if self.is_stalled(timeout_minutes):
-            self.status = 'failed'
-            self.result_message = f'Importación cancelada: La tarea quedó atascada después de {timeout_minutes} minutos sin procesarse. Posibles causas: worker de Celery no está corriendo o Redis no está disponible.'
-            self.completed_at = timezone.now()
-            self.add_progress_log(
-                f'Tarea marcada como fallida por timeout ({timeout_minutes} min)',
-                'error'
-            )
-            self.save()
-            return True
-        return False
+        marked = ImportJob.objects.filter(pk=self.pk).mark_stalled_as_failed(timeout_minutes)
+        if marked:
+            self.refresh_from_db(fields=['status', 'result_message', 'completed_at'])
+        return bool(marked)
+
+
+class ImportRowError(models.Model):
+    """Validation or import error of a single row of an import job"""
+
+    job = models.ForeignKey(
+        ImportJob,
+        on_delete=models.CASCADE,
+        related_name='row_errors',
+        verbose_name='Trabajo de Importación'
+    )
+    row_number = models.IntegerField(
+        verbose_name='Fila'
+    )
+    source = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Archivo'
+    )
+    errors = models.JSONField(
+        default=list,
+        verbose_name='Errores'
+    )
+    data = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name='Datos'
+    )
+
+    class Meta:
+        verbose_name = 'Error de Fila'
+        verbose_name_plural = 'Errores de Fila'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['job', 'row_number'], name='flex_import_job_row_idx'),
+        ]
+
+    def __str__(self):
+        if self.source:
+            return f"{self.source}, fila {self.row_number}"
+        return f"Fila {self.row_number}"
+
+    def as_dict(self):
+        """Return the error in the format of the former error_details entries"""
+        entry = {
+            'row': self.row_number,
+            'errors': self.errors,
+            'data': self.data,
+        }
+        if self.source:
+            entry['file'] = self.source
+        return entry
+
+
+class ImportLogEntry(models.Model):
+    """
+    Append-only progress log entry of an import job.
+
+    The database-assigned id orders the entries and is the cursor of the
+    incremental progress endpoints, so several writers of the same job
+    (chunk tasks, the stalled-job cleanup, retry jobs) never collide.
+    """
+
+    job = models.ForeignKey(
+        ImportJob,
+        on_delete=models.CASCADE,
+        related_name='log_entries',
+        verbose_name='Trabajo de Importación'
+    )
+    timestamp = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Fecha'
+    )
+    level = models.CharField(
+        max_length=10,
+        default='info',
+        verbose_name='Nivel'
+    )
+    message = models.TextField(
+        verbose_name='Mensaje'
+    )
+    processed = models.IntegerField(
+        default=0,
+        verbose_name='Filas Procesadas'
+    )
+    total = models.IntegerField(
+        default=0,
+        verbose_name='Total de Filas'
+    )
+
+    class Meta:
+        verbose_name = 'Entrada de Log'
+        verbose_name_plural = 'Entradas de Log'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['job', 'id'], name='flex_log_job_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"[{self.timestamp.isoformat()}] {self.message}"
+
+    def as_dict(self):
+        """Return the entry in the format of the former progress_log entries"""
+        return {
+            'timestamp': self.timestamp.isoformat(),
+            'message': self.message,
+            'level': self.level,
+            'processed': self.processed,
+            'total': self.total,
+            'id': self.pk,
+        }
 
 
 class ImporterPermission(models.Model):
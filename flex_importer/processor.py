@@ -1,14 +1,21 @@
 """
 Import processor for FlexImporter
 """
-import csv
 import json
 from datetime import datetime, date, time
 from decimal import Decimal
-from io import TextIOWrapper, BytesIO
-from openpyxl import load_workbook
+from itertools import takewhile
+from time import monotonic
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models import F
 from django.utils import timezone
-from .models import ImportJob
+from .models import ImportJob, ImportRowError
+from .progress import get_progress_channel
+from .readers import (
+    CSVReader, JSONLReader, RowBatch, ZipArchiveReader,
+    batch_rows, get_compression, reader_registry
+)
+from .utils import get_importer_setting
 
 
 def make_json_serializable(data):
@@ -41,15 +48,44 @@ def make_json_serializable(data):
             return str(data)
 
 
+TRANSACTION_MODES = ('autocommit', 'chunked', 'atomic')
+
+# ImportJob counters updated while rows are processed
+COUNTER_FIELDS = ('processed_rows', 'success_rows', 'created_rows', 'updated_rows', 'error_rows')
+
+
+class ImportRolledBack(Exception):
+    """Raised inside the atomic transaction to roll back the whole import"""
+
+
 class ImportProcessor:
     """Process imports from different file formats"""
 
     def __init__(self, import_job):
         self.import_job = import_job
         self.importer_class = None
-
-    def process(self):
-        """Main process method to handle import"""
+        self.rolled_back = False
+        # Row errors waiting to be written with bulk_create
+        self._pending_errors = []
+        self._stored_errors = 0
+        self._hold_writes = False
+        # (row_number, source) of the last processed row, saved with the counters
+        self._checkpoint = None
+        self._transaction_mode = None
+        # Set while processing one chunk of a job shared with other workers
+        self._fanout = False
+        # Autocommit connection writing the heartbeat while an atomic import runs
+        self._heartbeat_connection = None
+
+    def process(self, resume=False):
+        """
+        Main process method to handle import.
+
+        Args:
+            resume: Continue an interrupted job after its checkpoint, keeping
+                its counters, instead of starting from the first row
+        """
+        resume = resume and self.import_job.checkpoint_row is not None
         try:
             from .registry import importer_registry
 
@@ -64,240 +100,755 @@ class ImportProcessor:
                 return False
 
             self.import_job.status = 'processing'
-            self.import_job.started_at = timezone.now()
-            self.import_job.add_progress_log('Iniciando importación...')
-            self.import_job.save()
-
-            file_format = self.import_job.file_format
-            file_path = self.import_job.uploaded_file.path
-
-            if file_format == 'xlsx':
-                rows = self._read_xlsx(file_path)
-            elif file_format == 'csv':
-                rows = self._read_csv(file_path)
-            elif file_format == 'json':
-                rows = self._read_json(file_path)
+            self.import_job.last_heartbeat = timezone.now()
+            if resume:
+                self.import_job.completed_at = None
+                self._stored_errors = self.import_job.row_errors.count()
+                self.import_job.add_progress_log(
+                    f'Reanudando importación después de la '
+                    f'{self._row_label(self.import_job.checkpoint_row, self.import_job.checkpoint_source).lower()}'
+                )
             else:
-                raise ValueError(f'Formato no soportado: {file_format}')
-
-            self.import_job.total_rows = len(rows)
-            self.import_job.add_progress_log(f'Se encontraron {len(rows)} filas para procesar')
+                self.import_job.started_at = self.import_job.last_heartbeat
+                self.import_job.add_progress_log('Iniciando importación...')
             self.import_job.save()
 
-            self._process_rows(rows)
-
-            self.import_job.completed_at = timezone.now()
-
-            if self.import_job.error_rows == 0:
-                self.import_job.status = 'success'
-                message_parts = [f'Importación completada exitosamente. {self.import_job.success_rows} filas procesadas']
-                if self.import_job.updated_rows > 0 or self.import_job.created_rows > 0:
-                    message_parts.append(f'({self.import_job.created_rows} creadas, {self.import_job.updated_rows} actualizadas)')
-                self.import_job.result_message = ' '.join(message_parts) + '.'
-            elif self.import_job.success_rows > 0:
-                self.import_job.status = 'partial'
-                message_parts = [f'Importación parcial. {self.import_job.success_rows} exitosas']
-                if self.import_job.updated_rows > 0 or self.import_job.created_rows > 0:
-                    message_parts.append(f'({self.import_job.created_rows} creadas, {self.import_job.updated_rows} actualizadas)')
-                message_parts.append(f'{self.import_job.error_rows} con errores')
-                self.import_job.result_message = ', '.join(message_parts) + '.'
+            reader = self._get_reader()
+            if self.import_job.parent_job_id:
+                total_rows = self._process_retry(reader, resume)
+            elif resume:
+                total_rows = self.import_job.total_rows or None
+                rows = self._iter_after_checkpoint(reader)
+                self._process_batches(batch_rows(rows, self._get_batch_size()), total_rows)
             else:
-                self.import_job.status = 'failed'
-                self.import_job.result_message = f'Importación fallida. Todas las filas tuvieron errores.'
+                total_rows = reader.estimate_total()
 
-            self.import_job.add_progress_log(self.import_job.result_message, 'success' if self.import_job.status == 'success' else 'warning')
-            self.import_job.save()
+                if total_rows is None:
+                    self.import_job.add_progress_log('Procesando filas a medida que se leen del archivo')
+                else:
+                    self.import_job.total_rows = total_rows
+                    self.import_job.add_progress_log(f'Se estiman {total_rows} filas para procesar')
+                self.import_job.save()
+
+                self._process_batches(reader.iter_batches(self._get_batch_size()), total_rows)
 
+            self._finish()
             return True
 
         except Exception as e:
+            if self._transaction_mode == 'chunked':
+                self._restore_checkpoint()
+            elif self._checkpoint is not None:
+                # Autocommit rows are already saved, keep the checkpoint in step with the counters
+                self.import_job.checkpoint_row, self.import_job.checkpoint_source = self._checkpoint
+            self._write_pending_records()
             self.import_job.status = 'failed'
             self.import_job.result_message = f'Error en importación: {str(e)}'
             self.import_job.completed_at = timezone.now()
             self.import_job.add_progress_log(f'Error: {str(e)}', 'error')
             self.import_job.save()
+            self._report_to_parent_job()
             return False
 
-    def _read_xlsx(self, file_path):
-        """Read data from Excel file"""
-        wb = load_workbook(file_path, data_only=True)
-        ws = wb.active
-
-        # Obtener header_row desde la Meta del importador (default: 1)
-        header_row = 1
-        if hasattr(self.importer_class, 'Meta') and hasattr(self.importer_class.Meta, 'header_row'):
-            header_row = self.importer_class.Meta.header_row
-
-        headers = []
-        for cell in ws[header_row]:
-            if cell.value:
-                header = str(cell.value).replace(' *', '').strip()
-                headers.append(header)
-
-        rows = []
-        data_start_row = header_row + 1
-        for row_idx, row in enumerate(ws.iter_rows(min_row=data_start_row, values_only=True), start=data_start_row):
-            if all(cell is None or cell == '' for cell in row):
-                continue
-
-            row_data = {}
-            for idx, value in enumerate(row):
-                if idx < len(headers):
-                    row_data[headers[idx]] = value
-
-            row_data['_row_number'] = row_idx
-            rows.append(row_data)
-
-        return rows
-
-    def _read_csv(self, file_path):
-        """Read data from CSV file"""
-        rows = []
-
-        with open(file_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
+    def _finish(self):
+        """Set the final status and result message from the job counters and save the job"""
+        # The estimate may count blank lines or be unknown, keep the real number
+        self.import_job.total_rows = self.import_job.processed_rows
+        # The whole file was read, there is nothing left to resume
+        self.import_job.checkpoint_row = None
+        self.import_job.checkpoint_source = ''
 
-            headers = [h.replace(' *', '').strip() for h in reader.fieldnames]
-            reader.fieldnames = headers
+        self.import_job.completed_at = timezone.now()
 
-            for row_idx, row in enumerate(reader, start=2):
-                if all(not value or value == '' for value in row.values()):
-                    continue
-
-                row['_row_number'] = row_idx
-                rows.append(row)
-
-        return rows
-
-    def _read_json(self, file_path):
-        """Read data from JSON file"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        if isinstance(data, dict) and 'data' in data:
-            rows = data['data']
-        elif isinstance(data, list):
-            rows = data
+        if self.rolled_back:
+            self.import_job.status = 'failed'
+            self.import_job.result_message = (
+                f'Importación revertida. {self.import_job.error_rows} filas con errores superan '
+                f'el máximo permitido ({self._get_max_errors()}); no se guardó ninguna fila.'
+            )
+        elif self.import_job.error_rows == 0:
+            self.import_job.status = 'success'
+            message_parts = [f'Importación completada exitosamente. {self.import_job.success_rows} filas procesadas']
+            if self.import_job.updated_rows > 0 or self.import_job.created_rows > 0:
+                message_parts.append(f'({self.import_job.created_rows} creadas, {self.import_job.updated_rows} actualizadas)')
+            self.import_job.result_message = ' '.join(message_parts) + '.'
+        elif self.import_job.success_rows > 0:
+            self.import_job.status = 'partial'
+            message_parts = [f'Importación parcial. {self.import_job.success_rows} exitosas']
+            if self.import_job.updated_rows > 0 or self.import_job.created_rows > 0:
+                message_parts.append(f'({self.import_job.created_rows} creadas, {self.import_job.updated_rows} actualizadas)')
+            message_parts.append(f'{self.import_job.error_rows} con errores')
+            self.import_job.result_message = ', '.join(message_parts) + '.'
+        else:
+            self.import_job.status = 'failed'
+            self.import_job.result_message = f'Importación fallida. Todas las filas tuvieron errores.'
+
+        self.import_job.add_progress_log(self.import_job.result_message, 'success' if self.import_job.status == 'success' else 'warning')
+        self.import_job.save()
+        self._report_to_parent_job()
+
+    def start_fanout(self):
+        """
+        Split a large job into ranges to be processed by parallel chunk tasks.
+
+        Plain JSONL and CSV files are split into byte ranges aligned to
+        line/record starts, so each chunk seeks straight to its range. XLSX
+        files are split into ranges of row numbers, which every chunk reaches
+        with iter_after() by reading the sheet from the start. The job is
+        left in 'processing' with its estimated total. Zip archives, retries,
+        atomic imports, files below fanout_min_rows and files without a row
+        estimate (JSON, compressed files) run in a single task instead.
+
+        Returns:
+            list: JSON-serializable chunk dicts for process_chunk(), or None
+            when the job should be processed with process()
+        """
+        from .registry import importer_registry
+
+        self.importer_class = importer_registry.get_importer(self.import_job.importer_class)
+        if not self.importer_class or self.import_job.parent_job_id:
+            return None
+
+        parts = get_importer_setting(self.importer_class, 'fanout_chunks', 'FLEX_IMPORTER_FANOUT_CHUNKS', 1)
+        min_rows = get_importer_setting(self.importer_class, 'fanout_min_rows', 'FLEX_IMPORTER_FANOUT_MIN_ROWS', 100000)
+        if parts < 2 or self._get_transaction_mode() == 'atomic':
+            return None
+
+        reader = self._get_reader()
+        if isinstance(reader, ZipArchiveReader):
+            return None
+        total_rows = reader.estimate_total()
+        if total_rows is None or total_rows < min_rows:
+            return None
+
+        if isinstance(reader, JSONLReader) and reader.is_plain_file:
+            chunks = [
+                {'start': start, 'end': end, 'first_line': first_line}
+                for start, end, first_line in JSONLReader.split_ranges(reader.file_path, parts)
+            ]
+        elif isinstance(reader, CSVReader) and reader.is_plain_file:
+            chunks = [
+                {'start': start, 'end': end, 'first_row': first_row}
+                for start, end, first_row in CSVReader.split_ranges(reader.file_path, parts)
+            ]
         else:
-            raise ValueError('Formato JSON inválido. Debe ser una lista o un objeto con propiedad "data"')
+            rows = iter(reader)
+            first_row = next(rows, {}).get('_row_number', 1)
+            if hasattr(rows, 'close'):
+                rows.close()
+            # Row numbers can skip blank lines, the last range is left open
+            bounds = [first_row - 1 + total_rows * part // parts for part in range(parts)] + [None]
+            chunks = [
+                {'after_row': after_row, 'last_row': last_row}
+                for after_row, last_row in zip(bounds, bounds[1:])
+                if last_row is None or last_row > after_row
+            ]
+
+        self.import_job.status = 'processing'
+        self.import_job.started_at = timezone.now()
+        self.import_job.last_heartbeat = self.import_job.started_at
+        self.import_job.total_rows = total_rows
+        self.import_job.add_progress_log('Iniciando importación...')
+        self.import_job.add_progress_log(
+            f'Se estiman {total_rows} filas para procesar en {len(chunks)} bloques paralelos'
+        )
+        self.import_job.save()
+        return chunks
+
+    def process_chunk(self, chunk):
+        """
+        Process one range of a job split by start_fanout().
+
+        Several chunks run at once on the same job: counters are added with
+        the F() increments of _flush_progress and re-read after each flush,
+        so the job and the progress channel always show the sum of all
+        chunks. The job row is never saved as a whole, per-row log entries
+        are skipped (row errors are still stored) and no checkpoint is kept.
+
+        Args:
+            chunk: Chunk dict from start_fanout()
+
+        Returns:
+            dict: {'error': None} or {'error': message} if the chunk failed
+        """
+        from .registry import importer_registry
+
+        self._fanout = True
+        label = self._chunk_label(chunk)
+        rows = None
+        try:
+            self.importer_class = importer_registry.get_importer(self.import_job.importer_class)
+            if not self.importer_class:
+                raise ValueError('Clase importadora no encontrada')
 
-        for idx, row in enumerate(rows, start=1):
-            row['_row_number'] = idx
+            if 'start' in chunk:
+                rows = iter(self._get_reader(**chunk))
+            else:
+                rows = self._get_reader().iter_after(chunk['after_row'])
+            last_row = chunk.get('last_row')
+            selected = rows if last_row is None else takewhile(lambda row: row['_row_number'] <= last_row, rows)
 
-        return rows
+            self._process_batches(batch_rows(selected, self._get_batch_size()), self.import_job.total_rows)
+            self.import_job.add_progress_log(f'Bloque {label} terminado')
+            return {'error': None}
 
-    def _process_rows(self, rows):
-        """Process each row of data"""
-        field_info = self.importer_class.get_field_info()
-        field_name_map = {info['verbose_name']: info['name'] for info in field_info}
+        except Exception as e:
+            if self._transaction_mode == 'chunked':
+                # The open chunk transaction was rolled back with its rows
+                self._pending_errors = []
+            elif self._transaction_mode is not None:
+                self._flush_progress(force=True)
+            self.import_job.add_progress_log(f'Error en el bloque {label}: {str(e)}', 'error')
+            return {'error': f'Bloque {label}: {str(e)}'}
+
+        finally:
+            if rows is not None and hasattr(rows, 'close'):
+                rows.close()
+
+    def finish_fanout(self, results):
+        """
+        Set the final status of a job once all its chunks are done.
+
+        Args:
+            results: Return values of process_chunk() for every chunk
+        """
+        self.import_job.refresh_from_db()
+        errors = [result['error'] for result in results if result['error']]
+        if not errors:
+            self._finish()
+            return
+
+        self.import_job.total_rows = self.import_job.processed_rows
+        self.import_job.status = 'failed'
+        self.import_job.result_message = (
+            f'Error en importación: fallaron {len(errors)} de {len(results)} bloques '
+            f'({self.import_job.success_rows} filas importadas). {errors[0]}'
+        )
+        self.import_job.completed_at = timezone.now()
+        self.import_job.add_progress_log(self.import_job.result_message, 'error')
+        self.import_job.save()
+
+    def _chunk_label(self, chunk):
+        """Describe a chunk for log messages"""
+        if 'first_line' in chunk:
+            return f'desde la línea {chunk["first_line"]}'
+        if 'start' in chunk:
+            return f'desde la fila {chunk["first_row"]}'
+        if chunk['last_row'] is None:
+            return f'desde la fila {chunk["after_row"] + 1}'
+        return f'filas {chunk["after_row"] + 1}-{chunk["last_row"]}'
+
+    def _process_retry(self, reader, resume=False):
+        """
+        Process only the rows that failed in the parent job.
+
+        The rows are picked by the (source, row_number) of the parent's
+        stored row errors; readers skip straight past the other rows. When
+        resuming, the rows up to the checkpoint are left out.
+
+        Returns:
+            int: Number of rows to retry
+        """
+        parent_job = self.import_job.parent_job
+        selection = {}
+        for source, row_number in parent_job.row_errors.values_list('source', 'row_number').iterator():
+            selection.setdefault(source, set()).add(row_number)
+
+        total_rows = sum(len(row_numbers) for row_numbers in selection.values())
+        if resume:
+            selection = self._selection_after_checkpoint(selection, reader)
+        else:
+            self.import_job.total_rows = total_rows
+            self.import_job.add_progress_log(
+                f'Reintentando {total_rows} filas con error de la importación #{parent_job.pk}'
+            )
+            if total_rows < parent_job.error_rows:
+                self.import_job.add_progress_log(
+                    f'Solo se guardaron {total_rows} de {parent_job.error_rows} filas con error; '
+                    f'las demás no se reintentan',
+                    'warning'
+                )
+            self.import_job.save()
 
+        if isinstance(reader, ZipArchiveReader):
+            rows = reader.iter_selected(selection)
+        else:
+            rows = reader.iter_selected(selection.get('', set()))
+        self._process_batches(batch_rows(rows, self._get_batch_size()), total_rows)
+        return total_rows
+
+    def _iter_after_checkpoint(self, reader):
+        """Read the rows after the job checkpoint, letting the reader skip the others"""
+        if isinstance(reader, ZipArchiveReader):
+            return reader.iter_after(self.import_job.checkpoint_row, self.import_job.checkpoint_source)
+        return reader.iter_after(self.import_job.checkpoint_row)
+
+    def _selection_after_checkpoint(self, selection, reader):
+        """Drop the selected rows up to the job checkpoint ({source: row numbers})"""
+        checkpoint_row = self.import_job.checkpoint_row
+        checkpoint_source = self.import_job.checkpoint_source
+        sources = [''] if not isinstance(reader, ZipArchiveReader) else reader.list_members()
+        done = sources[:sources.index(checkpoint_source)] if checkpoint_source in sources else []
+
+        remaining = {}
+        for source, row_numbers in selection.items():
+            if source in done:
+                continue
+            if source == checkpoint_source:
+                row_numbers = {row_number for row_number in row_numbers if row_number > checkpoint_row}
+            remaining[source] = row_numbers
+        return remaining
+
+    def _restore_checkpoint(self):
+        """
+        Go back to the last committed checkpoint after an error in chunked mode.
+
+        The failing chunk transaction was rolled back, so its counters and
+        row errors are dropped and the job is left exactly at the checkpoint
+        committed with the previous chunk, ready to resume.
+        """
+        self._pending_errors = []
+        self._checkpoint = None
+        self.import_job.refresh_from_db(fields=list(COUNTER_FIELDS) + ['checkpoint_row', 'checkpoint_source'])
+        self._reset_flush_state()
+
+    def _report_to_parent_job(self):
+        """Log the result of a retry job on the job whose failed rows it retried"""
+        if not self.import_job.parent_job_id:
+            return
+        self.import_job.parent_job.add_progress_log(
+            f'Reintento de filas con error (importación #{self.import_job.pk}): '
+            f'{self.import_job.success_rows} de {self.import_job.processed_rows} filas importadas',
+            'success' if self.import_job.status == 'success' else 'warning'
+        )
+
+    def _get_batch_size(self):
+        """Get the number of rows per batch (Meta.batch_size or FLEX_IMPORTER_BATCH_SIZE)"""
+        return get_importer_setting(self.importer_class, 'batch_size', 'FLEX_IMPORTER_BATCH_SIZE', 500)
+
+    def _get_transaction_mode(self):
+        """
+        Get the transaction mode (Meta.transaction_mode or FLEX_IMPORTER_TRANSACTION_MODE).
+
+        - 'autocommit': each import_batch call commits in its own transaction (default)
+        - 'chunked': one transaction every commit_every rows, savepoints per batch and row
+        - 'atomic': one transaction for the whole import, rolled back past max_errors
+        """
+        mode = get_importer_setting(self.importer_class, 'transaction_mode', 'FLEX_IMPORTER_TRANSACTION_MODE', 'autocommit')
+        if mode not in TRANSACTION_MODES:
+            raise ValueError(f'Modo de transacción no válido: {mode}')
+        return mode
+
+    def _get_commit_every(self):
+        """Get the rows per transaction in chunked mode (Meta.commit_every or FLEX_IMPORTER_COMMIT_EVERY)"""
+        return get_importer_setting(self.importer_class, 'commit_every', 'FLEX_IMPORTER_COMMIT_EVERY', 1000)
+
+    def _get_max_errors(self):
+        """Get the errors tolerated in atomic mode (Meta.max_errors or FLEX_IMPORTER_MAX_ERRORS)"""
+        return get_importer_setting(self.importer_class, 'max_errors', 'FLEX_IMPORTER_MAX_ERRORS', 0)
+
+    def _get_flush_policy(self):
+        """
+        Get how often job counters are written to the database.
+
+        Returns:
+            tuple: (rows, seconds) from Meta.progress_flush_rows/progress_flush_seconds
+            or FLEX_IMPORTER_PROGRESS_FLUSH_ROWS/FLEX_IMPORTER_PROGRESS_FLUSH_SECONDS
+        """
+        # With the cache progress channel, polls do not read the job row, so it
+        # can be written much less often
+        live_channel = get_progress_channel(self.import_job.pk) is not None
+        return (
+            get_importer_setting(self.importer_class, 'progress_flush_rows', 'FLEX_IMPORTER_PROGRESS_FLUSH_ROWS', 10000 if live_channel else 1000),
+            get_importer_setting(self.importer_class, 'progress_flush_seconds', 'FLEX_IMPORTER_PROGRESS_FLUSH_SECONDS', 30 if live_channel else 2),
+        )
+
+    def _reset_flush_state(self):
+        """Take the current counters as already written to the database"""
+        self._flushed_counters = {name: getattr(self.import_job, name) for name in COUNTER_FIELDS}
+        self._flushed_rows = self.import_job.processed_rows
+        self._flushed_at = monotonic()
+
+    def _flush_progress(self, force=False):
+        """
+        Write the pending row errors and the counter deltas since the last
+        flush (with F() increments), along with the worker heartbeat.
+
+        Only flushes every flush rows or seconds (whichever comes first),
+        unless force is True. Inside an atomic import only the heartbeat is
+        written, see _write_heartbeat().
+        """
+        if not force and self._fanout and self._transaction_mode == 'chunked':
+            # Other chunks share the counters, so they only move when a transaction commits
+            return
+        flush_rows, flush_seconds = self._get_flush_policy()
+        pending_rows = self.import_job.processed_rows - self._flushed_rows
+        if not force and pending_rows < flush_rows and monotonic() - self._flushed_at < flush_seconds:
+            return
+
+        if self._hold_writes:
+            # Counters written inside the import transaction would be invisible to
+            # other connections and keep the job row locked until the import ends
+            self._write_heartbeat()
+            self._flushed_rows = self.import_job.processed_rows
+            self._flushed_at = monotonic()
+            return
+
+        self._write_pending_records()
+
+        # The heartbeat and checkpoint ride on the counters UPDATE, so they cost
+        # no extra query and the checkpoint always matches the stored counters
+        self.import_job.last_heartbeat = timezone.now()
+        updates = {'last_heartbeat': self.import_job.last_heartbeat}
+        if self._checkpoint is not None:
+            self.import_job.checkpoint_row, self.import_job.checkpoint_source = self._checkpoint
+            updates['checkpoint_row'] = self.import_job.checkpoint_row
+            updates['checkpoint_source'] = self.import_job.checkpoint_source
+        for name in COUNTER_FIELDS:
+            delta = getattr(self.import_job, name) - self._flushed_counters[name]
+            if delta:
+                updates[name] = F(name) + delta
+        ImportJob.objects.filter(pk=self.import_job.pk).update(**updates)
+        if self._fanout:
+            # Publish the sum of all chunks, not just this one
+            self.import_job.refresh_from_db(fields=COUNTER_FIELDS)
+        self._reset_flush_state()
+
+    def _open_heartbeat_connection(self):
+        """
+        Open a separate connection for the heartbeat of an atomic import.
+
+        Not opened on SQLite, where the import transaction locks the whole
+        database, nor when the import runs inside a transaction of the
+        caller, where the job row may not be committed yet. Those atomic
+        imports write no heartbeat until they end.
+        """
+        alias = router.db_for_write(ImportJob)
+        if connections[alias].vendor != 'sqlite' and not connections[alias].in_atomic_block:
+            self._heartbeat_connection = connections.create_connection(alias)
+
+    def _close_heartbeat_connection(self):
+        if self._heartbeat_connection is not None:
+            self._heartbeat_connection.close()
+            self._heartbeat_connection = None
+
+    def _write_heartbeat(self):
+        """Write the worker heartbeat outside the atomic import transaction"""
+        self.import_job.last_heartbeat = timezone.now()
+        if self._heartbeat_connection is None:
+            return
+
+        connection = self._heartbeat_connection
+        opts = ImportJob._meta
+        quote_name = connection.ops.quote_name
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {quote_name(opts.db_table)} '
+                    f'SET {quote_name(opts.get_field("last_heartbeat").column)} = %s '
+                    f'WHERE {quote_name(opts.pk.column)} = %s',
+                    [connection.ops.adapt_datetimefield_value(self.import_job.last_heartbeat), self.import_job.pk]
+                )
+        except DatabaseError:
+            # A missed heartbeat is written again on the next flush
+            pass
+
+    def _get_error_storage_policy(self):
+        """
+        Get which row errors are stored as ImportRowError.
+
+        Returns:
+            tuple: (max_stored, sample_rate) from Meta.max_stored_errors/error_sample_rate
+            or FLEX_IMPORTER_MAX_STORED_ERRORS/FLEX_IMPORTER_ERROR_SAMPLE_RATE.
+            max_stored None stores every error, sample_rate N stores one error of every N
+        """
+        return (
+            get_importer_setting(self.importer_class, 'max_stored_errors', 'FLEX_IMPORTER_MAX_STORED_ERRORS', None),
+            get_importer_setting(self.importer_class, 'error_sample_rate', 'FLEX_IMPORTER_ERROR_SAMPLE_RATE', 1),
+        )
+
+    def _write_pending_records(self):
+        """Write the pending row errors and log entries (held back inside an atomic import)"""
+        if self._hold_writes:
+            return
+        if self._pending_errors:
+            ImportRowError.objects.bulk_create(self._pending_errors, batch_size=500)
+            self._pending_errors = []
+        self.import_job.flush_progress_log()
+
+    def _get_reader(self, **reader_options):
+        """
+        Get the streaming reader for the job file from the reader registry.
+
+        Compressed files (.gz, .bz2, .xz) are decompressed while reading and
+        zip archives are read member by member, never extracted to disk.
+        reader_options are passed on to the reader (e.g. a JSONL byte range).
+        """
+        file_format = self.import_job.file_format
+        file_path = self.import_job.uploaded_file.path
+
+        reader_class = reader_registry.get_reader(file_format)
+        if not reader_class:
+            raise ValueError(f'Formato no soportado: {file_format}')
+
+        options = {**reader_class.get_options(self.importer_class), **reader_options}
+        if get_compression(file_path) == '.zip':
+            return ZipArchiveReader(file_path, reader_class, file_format, **options)
+        return reader_class(file_path, **options)
+
+    def _normalize_batch(self, batch, field_name_map):
+        """Map template headers to field names for every row of a batch"""
+        normalized_rows = []
+        for row_data in batch.rows:
+            normalized_rows.append({
+                field_name_map.get(key, key): value
+                for key, value in row_data.items()
+            })
+        return RowBatch(normalized_rows, batch.row_numbers, batch.sources)
+
+    def _validate_batch(self, batch, importer_instance):
+        """Validate every row of a normalized batch, returning (validated_data, errors) pairs"""
+        return importer_instance.validate_batch(batch.rows)
+
+    def _row_label(self, row_number, source=None):
+        """Label of a row for log messages, including the archive member if any"""
+        if source:
+            return f'{source}, fila {row_number}'
+        return f'Fila {row_number}'
+
+    def _record_error(self, row_number, source, errors, normalized_data, log_message):
+        """Count a failed row and queue its ImportRowError, following the storage policy"""
+        self.import_job.error_rows += 1
+
+        max_stored, sample_rate = self._get_error_storage_policy()
+        sampled = (self.import_job.error_rows - 1) % sample_rate == 0
+        if sampled and (max_stored is None or self._stored_errors < max_stored):
+            self._stored_errors += 1
+            self._pending_errors.append(ImportRowError(
+                job=self.import_job,
+                row_number=row_number,
+                source=source or '',
+                errors=errors,
+                data=make_json_serializable(normalized_data),
+            ))
+
+        self._log_row(f'{self._row_label(row_number, source)}: {log_message}', 'error')
+
+    def _log_row(self, message, level):
+        """
+        Buffer a per-row log entry.
+
+        Chunks of a fanned-out job skip them: their numbering would
+        interleave in the shared log, and row errors are stored anyway.
+        """
+        if self._fanout:
+            return
+        self.import_job.add_progress_log(message, level, buffer=True)
+
+    def _progress_message(self, idx, total_rows, with_counts=False):
+        """Build the periodic 'Procesadas X de Y' log message"""
+        message = f'Procesadas {idx} de {total_rows} filas' if total_rows else f'Procesadas {idx} filas'
+        if with_counts:
+            message += f' ({self.import_job.created_rows} creadas, {self.import_job.updated_rows} actualizadas)'
+        return message + '...'
+
+    def _process_batches(self, batches, total_rows=None):
+        """
+        Process batches of rows.
+
+        Batches flow through a lazy reader -> normalize -> validate -> import
+        pipeline, so each batch is imported as soon as it is read. Depending
+        on the transaction mode, batches run in autocommit, in transactions
+        of commit_every rows, or in a single transaction for the whole file.
+
+        Args:
+            batches: Iterable of RowBatch objects
+            total_rows: Expected number of rows, None if unknown
+        """
+        field_name_map = self.importer_class.get_validation_plan().field_name_map
         importer_instance = self.importer_class()
+        mode = self._get_transaction_mode()
+        self._transaction_mode = mode
+        batches = iter(batches)
+        # Continue the numbering of a resumed job
+        idx = self.import_job.processed_rows
+        self._reset_flush_state()
+
+        if mode == 'autocommit':
+            for batch in batches:
+                idx = self._process_batch(batch, importer_instance, field_name_map, idx, total_rows)
+
+        elif mode == 'chunked':
+            commit_every = self._get_commit_every()
+            finished = False
+            while not finished:
+                # Batches are consumed until the chunk holds commit_every rows
+                finished = True
+                with transaction.atomic():
+                    chunk_rows = 0
+                    for batch in batches:
+                        idx = self._process_batch(batch, importer_instance, field_name_map, idx, total_rows)
+                        chunk_rows += len(batch)
+                        if chunk_rows >= commit_every:
+                            finished = False
+                            break
+                    # The counters and checkpoint commit together with the chunk rows
+                    self._flush_progress(force=True)
 
-        for idx, row_data in enumerate(rows, start=1):
-            row_number = row_data.get('_row_number', idx)
-
-            normalized_data = {}
-            for key, value in row_data.items():
-                if key == '_row_number':
-                    continue
-
-                field_name = field_name_map.get(key, key)
-                normalized_data[field_name] = value
-
-            validated_data, errors = importer_instance.validate_row(normalized_data)
-
-            if errors:
-                self.import_job.error_rows += 1
-                error_entry = {
-                    'row': row_number,
-                    'errors': errors,
-                    'data': make_json_serializable(normalized_data)
-                }
-                if self.import_job.error_details is None:
-                    self.import_job.error_details = []
-                self.import_job.error_details.append(error_entry)
+        else:
+            max_errors = self._get_max_errors()
+            # Row errors and log entries are written after the transaction so a rollback keeps them,
+            # and the counters once it ends (see _flush_progress)
+            self._open_heartbeat_connection()
+            self._hold_writes = True
+            try:
+                with transaction.atomic():
+                    for batch in batches:
+                        idx = self._process_batch(batch, importer_instance, field_name_map, idx, total_rows)
+                        if self.import_job.error_rows > max_errors:
+                            raise ImportRolledBack()
+            except ImportRolledBack:
+                self._discard_rolled_back_rows()
+                self.rolled_back = True
+                # No counters were written inside the transaction, store them now
+                self.import_job.save(update_fields=list(COUNTER_FIELDS))
+                self._reset_flush_state()
                 self.import_job.add_progress_log(
-                    f'Fila {row_number}: Errores de validación - {", ".join(errors)}',
+                    f'Se revierte la importación: {self.import_job.error_rows} filas con errores '
+                    f'(máximo permitido: {max_errors})',
                     'error'
                 )
+            except Exception:
+                # Any other error (e.g. from the reader) rolled back the rows as well
+                self._discard_rolled_back_rows()
+                raise
+            finally:
+                self._hold_writes = False
+                self._close_heartbeat_connection()
+
+        self._flush_progress(force=True)
+        # Pick up increments made by other writers sharing this job
+        self.import_job.refresh_from_db(fields=COUNTER_FIELDS)
+
+    def _discard_rolled_back_rows(self):
+        """Reset the counters and checkpoint of an atomic import whose transaction was rolled back"""
+        self.import_job.success_rows = 0
+        self.import_job.created_rows = 0
+        self.import_job.updated_rows = 0
+        self._checkpoint = None
+        self.import_job.checkpoint_row = None
+        self.import_job.checkpoint_source = ''
+
+    def _process_batch(self, batch, importer_instance, field_name_map, idx, total_rows):
+        """
+        Normalize, validate and import one batch, flushing the job counters
+        when the flush policy says so.
+
+        Returns:
+            int: Index of the last processed row
+        """
+        normalized_batch = self._normalize_batch(batch, field_name_map)
+        validation_results = self._validate_batch(normalized_batch, importer_instance)
+
+        valid_rows = [validated_data for validated_data, errors in validation_results if not errors]
+        outcomes = iter(self._import_batch(importer_instance, valid_rows))
+
+        for (row_number, source, normalized_data), (validated_data, errors) in zip(normalized_batch, validation_results):
+            idx += 1
+            if errors:
+                self._record_error(
+                    row_number, source, errors, normalized_data,
+                    f'Errores de validación - {", ".join(errors)}'
+                )
             else:
-                try:
-                    result = importer_instance.import_action(validated_data)
-
-                    # Handle different return formats from import_action
-                    if result is True or result is None:
-                        # Legacy format: True/None means created
-                        self.import_job.success_rows += 1
-                        self.import_job.created_rows += 1
-                        if idx % 10 == 0 or idx == len(rows):
-                            self.import_job.add_progress_log(
-                                f'Procesadas {idx} de {len(rows)} filas...',
-                                'info'
-                            )
-                    elif isinstance(result, str) and result in ['created', 'updated', 'skipped']:
-                        # String format: 'created', 'updated', 'skipped'
-                        if result == 'skipped':
-                            # Skipped rows don't count as success or error
-                            pass
-                        else:
-                            self.import_job.success_rows += 1
-                            if result == 'created':
-                                self.import_job.created_rows += 1
-                            else:  # updated
-                                self.import_job.updated_rows += 1
-
-                        if idx % 10 == 0 or idx == len(rows):
-                            self.import_job.add_progress_log(
-                                f'Procesadas {idx} de {len(rows)} filas ({self.import_job.created_rows} creadas, {self.import_job.updated_rows} actualizadas)...',
-                                'info'
-                            )
-                    elif isinstance(result, dict) and result.get('action') in ['created', 'updated', 'skipped']:
-                        # Dict format: {'action': 'created/updated/skipped'}
-                        if result['action'] == 'skipped':
-                            # Skipped rows don't count as success or error
-                            pass
-                        else:
-                            self.import_job.success_rows += 1
-                            if result['action'] == 'created':
-                                self.import_job.created_rows += 1
-                            else:  # updated
-                                self.import_job.updated_rows += 1
-
-                        if idx % 10 == 0 or idx == len(rows):
-                            self.import_job.add_progress_log(
-                                f'Procesadas {idx} de {len(rows)} filas ({self.import_job.created_rows} creadas, {self.import_job.updated_rows} actualizadas)...',
-                                'info'
-                            )
-                    else:
-                        # Any other value is treated as an error
-                        self.import_job.error_rows += 1
-                        error_entry = {
-                            'row': row_number,
-                            'errors': [str(result)],
-                            'data': make_json_serializable(normalized_data)
-                        }
-                        if self.import_job.error_details is None:
-                            self.import_job.error_details = []
-                        self.import_job.error_details.append(error_entry)
-                        self.import_job.add_progress_log(
-                            f'Fila {row_number}: Error en import_action - {result}',
-                            'error'
-                        )
-
-                except Exception as e:
-                    self.import_job.error_rows += 1
-                    error_entry = {
-                        'row': row_number,
-                        'errors': [f'Excepción: {str(e)}'],
-                        'data': make_json_serializable(normalized_data)
-                    }
-                    if self.import_job.error_details is None:
-                        self.import_job.error_details = []
-                    self.import_job.error_details.append(error_entry)
-                    self.import_job.add_progress_log(
-                        f'Fila {row_number}: Excepción - {str(e)}',
-                        'error'
-                    )
-
+                self._record_outcome(idx, total_rows, row_number, source, normalized_data, next(outcomes))
             self.import_job.processed_rows += 1
-            self.import_job.save(update_fields=['processed_rows', 'success_rows', 'created_rows', 'updated_rows', 'error_rows', 'error_details'])
+
+        # An atomic import is all or nothing, there is nothing to resume; chunks
+        # of a fanned-out job finish out of order, so no single row marks progress
+        if len(batch) and self._transaction_mode != 'atomic' and not self._fanout:
+            self._checkpoint = (batch.row_numbers[-1], batch.sources[-1] or '')
+        self._flush_progress()
+        self.import_job.publish_progress()
+        return idx
+
+    def _import_batch(self, importer_instance, rows):
+        """
+        Call importer.import_batch() for the valid rows of a batch.
+
+        Each call runs in its own savepoint (a transaction in autocommit
+        mode). If it raises, its writes are rolled back and the rows are split
+        in halves and retried recursively, so a batch with k bad rows costs
+        O(k·log n) extra calls and only the offending rows get the error.
+
+        Returns:
+            list: One outcome per row, the exception for isolated bad rows
+        """
+        if not rows:
+            return []
+        try:
+            with transaction.atomic():
+                outcomes = list(importer_instance.import_batch(rows))
+                if len(outcomes) != len(rows):
+                    raise ValueError(
+                        f'import_batch devolvió {len(outcomes)} resultados para {len(rows)} filas'
+                    )
+            return outcomes
+        except Exception as e:
+            if len(rows) == 1:
+                return [e]
+
+        middle = len(rows) // 2
+        return (
+            self._import_batch(importer_instance, rows[:middle])
+            + self._import_batch(importer_instance, rows[middle:])
+        )
+
+    def _record_outcome(self, idx, total_rows, row_number, source, normalized_data, result):
+        """Update the job counters with the outcome of importing a row"""
+        # Handle different return formats from import_action
+        if isinstance(result, Exception):
+            self._record_error(
+                row_number, source, [f'Excepción: {str(result)}'], normalized_data,
+                f'Excepción - {str(result)}'
+            )
+        elif result is True or result is None:
+            # Legacy format: True/None means created
+            self.import_job.success_rows += 1
+            self.import_job.created_rows += 1
+            if idx % 10 == 0 or idx == total_rows:
+                self._log_row(self._progress_message(idx, total_rows), 'info')
+        elif isinstance(result, str) and result in ['created', 'updated', 'skipped']:
+            # String format: 'created', 'updated', 'skipped'
+            if result == 'skipped':
+                # Skipped rows don't count as success or error
+                pass
+            else:
+                self.import_job.success_rows += 1
+                if result == 'created':
+                    self.import_job.created_rows += 1
+                else:  # updated
+                    self.import_job.updated_rows += 1
+
+            if idx % 10 == 0 or idx == total_rows:
+                self._log_row(self._progress_message(idx, total_rows, with_counts=True), 'info')
+        elif isinstance(result, dict) and result.get('action') in ['created', 'updated', 'skipped']:
+            # Dict format: {'action': 'created/updated/skipped'}
+            if result['action'] == 'skipped':
+                # Skipped rows don't count as success or error
+                pass
+            else:
+                self.import_job.success_rows += 1
+                if result['action'] == 'created':
+                    self.import_job.created_rows += 1
+                else:  # updated
+                    self.import_job.updated_rows += 1
+
+            if idx % 10 == 0 or idx == total_rows:
+                self._log_row(self._progress_message(idx, total_rows, with_counts=True), 'info')
+        else:
+            # Any other value is treated as an error
+            self._record_error(
+                row_number, source, [str(result)], normalized_data,
+                f'Error en import_action - {result}'
+            )
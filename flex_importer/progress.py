@@ -0,0 +1,142 @@
+"""
+Live progress channel for import jobs, backed by the Django cache.
+
+While a job runs, the processor publishes its counters and the last log
+lines to the cache, so progress polls read the cache instead of the
+ImportJob row. Enable it with the FLEX_IMPORTER_PROGRESS_CACHE setting
+(a cache alias such as 'default'); any cache backend works: LocMem or file
+cache locally, Redis in production. Note LocMem is per process, so with
+Celery workers a shared backend is needed for the channel to be useful.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+TERMINAL_STATUSES = ('success', 'partial', 'failed')
+
+DEFAULT_TIMEOUT = 3600
+DEFAULT_LOG_SIZE = 200
+
+
+def job_progress_data(import_job):
+    """Build the progress payload of a job (without log lines)"""
+    return {
+        'status': import_job.status,
+        'total_rows': import_job.total_rows,
+        'processed_rows': import_job.processed_rows,
+        'success_rows': import_job.success_rows,
+        'created_rows': import_job.created_rows,
+        'updated_rows': import_job.updated_rows,
+        'error_rows': import_job.error_rows,
+        'progress_percentage': import_job.progress_percentage,
+        'result_message': import_job.result_message,
+    }
+
+
+class ProgressChannel:
+    """
+    Cache keys holding the live progress of one import job.
+
+    - state: the job_progress_data() payload plus a 'version' number
+    - version: incremented with cache.incr on every publish
+    - log_head: number of log entries appended so far, allocated with
+      cache.incr so concurrent writers (fan-out chunks) never get the same slot
+    - log:<slot % log_size>: ring buffer of (slot, entry) pairs with the last
+      log_size log entries
+    """
+
+    def __init__(self, job_id, cache_alias='default', timeout=DEFAULT_TIMEOUT, log_size=DEFAULT_LOG_SIZE):
+        self.job_id = job_id
+        self.cache = caches[cache_alias]
+        self.timeout = timeout
+        self.log_size = log_size
+
+    def _key(self, name):
+        return f'flex_importer:progress:{self.job_id}:{name}'
+
+    def _slot_key(self, slot):
+        return self._key(f'log:{slot % self.log_size}')
+
+    def _incr(self, name, delta=1):
+        key = self._key(name)
+        self.cache.add(key, 0, self.timeout)
+        try:
+            return self.cache.incr(key, delta)
+        except ValueError:
+            # The key expired between add and incr
+            self.cache.set(key, delta, self.timeout)
+            return delta
+
+    def publish(self, import_job):
+        """Write the current counters and status of the job"""
+        state = job_progress_data(import_job)
+        state['version'] = self._incr('version')
+        self.cache.set(self._key('state'), state, self.timeout)
+        return state
+
+    def append_log(self, entries):
+        """
+        Append log entries (dicts) to the ring buffer, keeping the last log_size.
+
+        The slots are reserved with one atomic increment of log_head and each
+        entry is written under its own key, so several processes appending to
+        the same job never overwrite each other's entries.
+        """
+        entries = list(entries)
+        if not entries:
+            return
+        head = self._incr('log_head', len(entries))
+        first_slot = head - len(entries) + 1
+        self.cache.set_many({
+            self._slot_key(slot): (slot, entry)
+            for slot, entry in enumerate(entries, start=first_slot)
+            if slot > head - self.log_size
+        }, self.timeout)
+
+    def read(self):
+        """Get the published state, or None if nothing was published (or it expired)"""
+        return self.cache.get(self._key('state'))
+
+    def read_log(self, limit=None):
+        """
+        Get the last log entries of the ring buffer, oldest first.
+
+        Slots reserved by a writer that has not stored them yet, or already
+        reused by newer entries, are left out.
+        """
+        head = self.cache.get(self._key('log_head'))
+        if not head:
+            return []
+        count = min(head, self.log_size if limit is None else min(limit, self.log_size))
+        slots = range(head - count + 1, head + 1)
+        stored = self.cache.get_many([self._slot_key(slot) for slot in slots])
+
+        log = []
+        for slot in slots:
+            item = stored.get(self._slot_key(slot))
+            if item is not None and item[0] == slot:
+                log.append(item[1])
+        return log
+
+    def clear(self):
+        """Remove the job keys from the cache"""
+        keys = [self._key('state'), self._key('version'), self._key('log_head')]
+        keys.extend(self._slot_key(slot) for slot in range(self.log_size))
+        self.cache.delete_many(keys)
+
+
+def get_progress_channel(job_id):
+    """
+    Get the progress channel of a job.
+
+    Returns:
+        ProgressChannel or None when FLEX_IMPORTER_PROGRESS_CACHE is not set
+    """
+    cache_alias = getattr(settings, 'FLEX_IMPORTER_PROGRESS_CACHE', None)
+    if not cache_alias or job_id is None:
+        return None
+    return ProgressChannel(
+        job_id,
+        cache_alias=cache_alias,
+        timeout=getattr(settings, 'FLEX_IMPORTER_PROGRESS_CACHE_TIMEOUT', DEFAULT_TIMEOUT),
+        log_size=getattr(settings, 'FLEX_IMPORTER_PROGRESS_CACHE_LOG_SIZE', DEFAULT_LOG_SIZE),
+    )
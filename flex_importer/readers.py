@@ -0,0 +1,910 @@
+"""
+Streaming readers for FlexImporter input files
+"""
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import re
+import zipfile
+from openpyxl import load_workbook
+
+from .utils import get_importer_setting
+
+
+# Single-file compression formats, decompressed on the fly while reading
+COMPRESSED_OPENERS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+}
+
+
+def get_compression(file_path):
+    """
+    Get the compression of a file from its extension.
+
+    Returns:
+        str: '.gz', '.bz2', '.xz', '.zip' or None for plain files
+    """
+    suffix = os.path.splitext(str(file_path))[1].lower()
+    if suffix in COMPRESSED_OPENERS or suffix == '.zip':
+        return suffix
+    return None
+
+
+def open_binary(file_path):
+    """Open a file for binary reading, decompressing gzip/bz2/xz as a stream"""
+    opener = COMPRESSED_OPENERS.get(get_compression(file_path), open)
+    return opener(file_path, 'rb')
+
+
+def clean_header(value):
+    """Strip the required marker (' *') and surrounding whitespace from a header"""
+    return str(value).replace(' *', '').strip()
+
+
+def is_blank_row(values):
+    """Check if every value of a row is empty"""
+    return all(value is None or value == '' for value in values)
+
+
+def count_lines(file_path, start=0, end=None, chunk_size=1024 * 1024):
+    """Count lines in a file (or in a byte range of it) without decoding it"""
+    count = 0
+    last_chunk = b''
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        remaining = None if end is None else end - start
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            count += chunk.count(b'\n')
+            last_chunk = chunk
+            if remaining is not None:
+                remaining -= len(chunk)
+
+    # A last line without trailing newline is still a line
+    if last_chunk and not last_chunk.endswith(b'\n'):
+        count += 1
+    return count
+
+
+def iter_text_lines(f, end=None, encoding='utf-8-sig'):
+    """
+    Decode the lines of a binary file from its current position.
+
+    Lines are split on newline bytes only (no universal newlines), and
+    reading stops at the line starting at byte offset end (if given).
+    """
+    position = f.tell()
+    for line in f:
+        if end is not None and position >= end:
+            break
+        position += len(line)
+        yield line.decode(encoding)
+
+
+class RowBatch:
+    """
+    A fixed-size batch of rows read from a file.
+
+    rows holds the row dicts keyed by header; row_numbers and sources are
+    parallel lists with the row number and archive member (or None) of
+    each row.
+    """
+
+    __slots__ = ('rows', 'row_numbers', 'sources')
+
+    def __init__(self, rows, row_numbers, sources=None):
+        self.rows = rows
+        self.row_numbers = row_numbers
+        self.sources = sources if sources is not None else [None] * len(rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return zip(self.row_numbers, self.sources, self.rows)
+
+
+def batch_rows(rows, batch_size):
+    """
+    Group row dicts into RowBatch objects of batch_size rows.
+
+    The '_row_number' and '_source' keys are moved out of each row into the
+    batch; rows without '_row_number' are numbered by position from 1.
+    """
+    rows_batch, row_numbers, sources = [], [], []
+
+    for idx, row in enumerate(rows, start=1):
+        row_numbers.append(row.pop('_row_number', idx))
+        sources.append(row.pop('_source', None))
+        rows_batch.append(row)
+
+        if len(rows_batch) >= batch_size:
+            yield RowBatch(rows_batch, row_numbers, sources)
+            rows_batch, row_numbers, sources = [], [], []
+
+    if rows_batch:
+        yield RowBatch(rows_batch, row_numbers, sources)
+
+
+class BaseReader:
+    """
+    Reader protocol used by the import processor.
+
+    A reader is created with the path of the uploaded file plus the options
+    returned by get_options(), and must implement __iter__ yielding row
+    dicts with a '_row_number' key. The processor consumes iter_batches(),
+    which readers backed by faster engines can override to build RowBatch
+    objects directly.
+    """
+
+    @classmethod
+    def get_options(cls, importer_class):
+        """Get reader options from the importer class (e.g. its Meta)"""
+        return {}
+
+    def estimate_total(self):
+        """Estimate the number of rows, None if unknown"""
+        return None
+
+    def __iter__(self):
+        raise NotImplementedError
+
+    def iter_batches(self, batch_size):
+        """Yield RowBatch objects of at most batch_size rows"""
+        return batch_rows(iter(self), batch_size)
+
+    def iter_selected(self, row_numbers):
+        """
+        Yield only the rows whose '_row_number' is in row_numbers.
+
+        Used to retry the failed rows of a job. This default filters the
+        full iteration; readers override it to skip unwanted rows without
+        building them and to stop after the last selected row.
+        """
+        for row in self:
+            if row['_row_number'] in row_numbers:
+                yield row
+
+    def iter_after(self, row_number):
+        """
+        Yield the rows after row_number, to resume an interrupted import.
+
+        Row numbers are deterministic (record, line, sheet row or list
+        index), so a checkpoint stays valid across runs. This default
+        filters the full iteration; readers override it to skip the leading
+        rows cheaply.
+        """
+        for row in self:
+            if row['_row_number'] > row_number:
+                yield row
+
+
+class FileReader(BaseReader):
+    """
+    Base class for readers of a single input file.
+
+    By default the file is opened from file_path, decompressing it when it
+    has a .gz/.bz2/.xz extension. An `opener` callable returning a binary
+    file object can be given instead (e.g. for zip archive members).
+    """
+
+    def __init__(self, file_path, opener=None):
+        self.file_path = file_path
+        self.opener = opener
+
+    @property
+    def is_plain_file(self):
+        """Check if the input is an uncompressed file on disk (seekable, sizeable)"""
+        return self.opener is None and get_compression(self.file_path) is None
+
+    def open_binary(self):
+        """Open the input as a binary stream"""
+        if self.opener is not None:
+            return self.opener()
+        return open_binary(self.file_path)
+
+    def open_text(self, encoding='utf-8', newline=None):
+        """Open the input as a decoded text stream"""
+        return io.TextIOWrapper(self.open_binary(), encoding=encoding, newline=newline)
+
+
+class XLSXReader(FileReader):
+    """
+    Stream rows from an Excel workbook.
+
+    The workbook is opened in read-only mode, so openpyxl parses the sheet
+    XML while rows are consumed instead of building every cell in memory.
+    Each yielded row is a dict keyed by header with a '_row_number' entry
+    holding the sheet row index.
+    """
+
+    def __init__(self, file_path, header_row=1, opener=None):
+        super().__init__(file_path, opener=opener)
+        self.header_row = header_row
+
+    @classmethod
+    def get_options(cls, importer_class):
+        """Read header_row from the importer Meta (default: 1)"""
+        meta = getattr(importer_class, 'Meta', None)
+        return {'header_row': getattr(meta, 'header_row', 1)}
+
+    def estimate_total(self):
+        """
+        Estimate the number of data rows from the sheet dimensions.
+
+        Blank rows are included in the estimate, so the real number of
+        imported rows can be lower. Compressed workbooks and sheets saved
+        without dimensions are not estimated.
+        """
+        if not self.is_plain_file:
+            return None
+
+        wb = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            max_row = wb.active.max_row
+        finally:
+            wb.close()
+
+        if max_row is None:
+            return None
+        return max(max_row - self.header_row, 0)
+
+    def __iter__(self):
+        with self.open_binary() as f:
+            yield from self._iter_workbook(f)
+
+    def iter_selected(self, row_numbers):
+        """Yield the selected sheet rows, stopping at the last one"""
+        if not row_numbers:
+            return
+        with self.open_binary() as f:
+            yield from self._iter_workbook(f, row_numbers.__contains__, max_row=max(row_numbers))
+
+    def iter_after(self, row_number):
+        """Yield the sheet rows after row_number, starting the sheet iteration there"""
+        with self.open_binary() as f:
+            yield from self._iter_workbook(f, min_row=row_number + 1)
+
+    def _iter_workbook(self, f, wanted=None, min_row=None, max_row=None):
+        wb = load_workbook(f, read_only=True, data_only=True)
+        try:
+            ws = wb.active
+            header_cells = next(
+                ws.iter_rows(min_row=self.header_row, max_row=self.header_row, values_only=True), ()
+            )
+            headers = [
+                (idx, clean_header(value))
+                for idx, value in enumerate(header_cells)
+                if value
+            ]
+
+            first_row = max(self.header_row + 1, min_row or 0)
+            sheet_rows = ws.iter_rows(min_row=first_row, max_row=max_row, values_only=True)
+
+            for row_idx, row in enumerate(sheet_rows, start=first_row):
+                if wanted is not None and not wanted(row_idx):
+                    continue
+                if is_blank_row(row):
+                    continue
+
+                row_data = {}
+                for idx, header in headers:
+                    if idx < len(row):
+                        row_data[header] = row[idx]
+
+                row_data['_row_number'] = row_idx
+                yield row_data
+        finally:
+            wb.close()
+
+
+class CSVReader(FileReader):
+    """
+    Stream rows from a CSV file.
+
+    Rows are yielded as dicts keyed by header with a '_row_number' entry
+    holding the record index (the header being row 1). A reader of a plain
+    file can be limited to the byte range [start, end), which must begin at
+    a record start after the header; first_row is the record number at
+    start. Use split_ranges() to compute such ranges for parallel processing.
+    """
+
+    def __init__(self, file_path, start=0, end=None, first_row=2, opener=None):
+        super().__init__(file_path, opener=opener)
+        self.start = start
+        self.end = end
+        self.first_row = first_row
+
+    @classmethod
+    def split_ranges(cls, file_path, parts):
+        """
+        Split a file into at most `parts` byte ranges aligned to record starts.
+
+        Records can span lines (quoted line breaks), so the file is tokenized
+        once up to the last split point to find where records end.
+
+        Returns:
+            list: (start, end, first_row) tuples covering every data record
+        """
+        if get_compression(file_path):
+            raise ValueError('Solo se pueden dividir archivos CSV sin comprimir')
+
+        size = os.path.getsize(file_path)
+        targets = [size * part // parts for part in range(1, parts)]
+
+        with open(file_path, 'rb') as f:
+            reader = csv.reader(iter_text_lines(f))
+            next(reader, None)
+            # csv.reader pulls one line at a time, so after each record the
+            # file position is the start of the next one
+            boundaries = [(f.tell(), 2)]
+            row_idx = 1
+            for values in reader:
+                if not targets:
+                    break
+                if values:
+                    row_idx += 1
+                position = f.tell()
+                if position >= targets[0] and boundaries[-1][0] < position < size:
+                    boundaries.append((position, row_idx + 1))
+                    targets = [target for target in targets if target > position]
+
+        ends = [start for start, _ in boundaries[1:]] + [size]
+        return [(start, end, first_row) for (start, first_row), end in zip(boundaries, ends)]
+
+    def estimate_total(self):
+        """
+        Estimate the number of data rows by counting lines.
+
+        Blank lines and quoted line breaks are included in the estimate.
+        Compressed files are not counted.
+        """
+        if not self.is_plain_file:
+            return None
+        return max(count_lines(self.file_path) - 1, 0)
+
+    def __iter__(self):
+        if self.start:
+            yield from self._iter_records()
+            return
+
+        with self.open_text(encoding='utf-8-sig', newline='') as f:
+            reader = csv.DictReader(f)
+            if not reader.fieldnames:
+                return
+
+            reader.fieldnames = [clean_header(h) for h in reader.fieldnames]
+
+            for row_idx, row in enumerate(reader, start=2):
+                if all(not value for value in row.values()):
+                    continue
+
+                row['_row_number'] = row_idx
+                yield row
+
+    def iter_selected(self, row_numbers):
+        """Yield the selected records, stopping after the last one"""
+        if not row_numbers:
+            return
+        yield from self._iter_records(row_numbers.__contains__, max(row_numbers))
+
+    def iter_after(self, row_number):
+        """Yield the records after row_number"""
+        return self._iter_records(lambda row_idx: row_idx > row_number)
+
+    def _iter_records(self, wanted=None, last_row=None):
+        """
+        Yield the records whose number passes wanted(), up to last_row.
+
+        Records can span lines (quoted line breaks), so they are still
+        tokenized to be counted, but skipped ones are never turned into dicts.
+        With a byte range, the header is read from the start of the file and
+        the records from start to end only.
+        """
+        with self.open_text(encoding='utf-8-sig', newline='') as f:
+            if self.start:
+                # Nothing was read through the text layer, use the raw file
+                raw = f.buffer
+                headers = next(csv.reader(iter_text_lines(raw)), [])
+                raw.seek(self.start)
+                reader = csv.reader(iter_text_lines(raw, self.end))
+            else:
+                reader = csv.reader(f)
+                headers = next(reader, [])
+
+            headers = [clean_header(h) for h in headers]
+            if not headers:
+                return
+
+            row_idx = self.first_row - 1
+            for values in reader:
+                # csv.DictReader skips empty lines without numbering them
+                if not values:
+                    continue
+                row_idx += 1
+                if last_row is not None and row_idx > last_row:
+                    break
+                if (wanted is not None and not wanted(row_idx)) or not any(values):
+                    continue
+
+                # Same padding as csv.DictReader
+                row = dict(zip(headers, values))
+                for header in headers[len(values):]:
+                    row[header] = None
+                row['_row_number'] = row_idx
+                yield row
+
+
+class JSONStream:
+    """
+    Incremental decoder over a text file holding a JSON document.
+
+    Only the unconsumed tail of the current chunk is kept in memory, so a
+    top-level array can be walked one value at a time. A single value may
+    not exceed max_value_size characters.
+    """
+
+    WHITESPACE = ' \t\n\r'
+    LITERALS = ('true', 'false', 'null', 'NaN', 'Infinity', '-Infinity')
+
+    def __init__(self, f, chunk_size=64 * 1024, max_value_size=16 * 1024 * 1024):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+        # Lines and columns consumed before the start of the buffer
+        self.line = 0
+        self.column = 0
+
+    def _fill(self):
+        """
+        Append the next chunk to the buffer, dropping consumed text.
+
+        A value longer than a chunk doubles the read size, so refilling it
+        copies the buffer a logarithmic number of times.
+        """
+        if self.eof:
+            return False
+
+        chunk = self.f.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+
+        newlines = self.buffer.count('\n', 0, self.pos)
+        if newlines:
+            self.line += newlines
+            self.column = self.pos - self.buffer.rindex('\n', 0, self.pos) - 1
+        else:
+            self.column += self.pos
+
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _refill_value(self):
+        """Read more of the value at the current position, within max_value_size"""
+        if len(self.buffer) - self.pos > self.max_value_size:
+            raise ValueError(
+                f'JSON inválido en {self._location(self.pos)}: un valor supera el tamaño máximo '
+                f'de {self.max_value_size} caracteres'
+            )
+        return self._fill()
+
+    def _location(self, pos):
+        """Describe a buffer position as a line and column of the file"""
+        newlines = self.buffer.count('\n', 0, pos)
+        if newlines:
+            column = pos - self.buffer.rindex('\n', 0, pos)
+        else:
+            column = self.column + pos + 1
+        return f'la línea {self.line + newlines + 1}, columna {column}'
+
+    def _is_cut(self, error):
+        """Check if a decode error only comes from the value running past the end of the buffer"""
+        if error.msg.startswith('Unterminated string'):
+            return True
+        tail = self.buffer[error.pos:]
+        if error.msg.startswith('Invalid \\uXXXX escape'):
+            # A surrogate pair escape is 12 characters long
+            return len(tail) <= 12
+        # Whitespace, or the start of a number or literal ("-1.", "tr") inside a container
+        return (
+            not tail.strip()
+            or self.NUMBER_TAIL.fullmatch(tail) is not None
+            or any(literal.startswith(tail) for literal in self.LITERALS)
+        )
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it (None at EOF)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return None
+
+    def expect(self, char):
+        """Consume the next non-whitespace character, which must be char"""
+        if self.peek() != char:
+            raise ValueError('Formato JSON inválido. Debe ser una lista o un objeto con propiedad "data"')
+        self.pos += 1
+
+    def decode(self):
+        """Decode and consume the next JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Only a value cut at the end of the buffer is read further
+                if not self._is_cut(e) or not self._refill_value():
+                    raise ValueError(f'JSON inválido en {self._location(e.pos)}: {e.msg}') from e
+                continue
+
+            # A number followed only by number characters up to the buffer end
+            # ("12." or "1e+") may continue in the next chunk
+            if self._may_continue(value, end) and self._refill_value():
+                continue
+
+            self.pos = end
+            return value
+
+    NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+
+    def _may_continue(self, value, end):
+        """Check if a decoded value could be the start of a longer number cut by the chunk"""
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False
+        return self.NUMBER_TAIL.fullmatch(self.buffer, end) is not None
+
+    def iter_array(self):
+        """Decode the values of the array starting at the current position"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+
+        while True:
+            yield self.decode()
+
+            separator = self.peek()
+            self.pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError('Formato JSON inválido: se esperaba "," o "]" entre filas')
+
+    def iter_rows(self):
+        """
+        Decode the rows of a top-level list or of the "data" property.
+
+        Other properties of a top-level object are decoded and discarded.
+        """
+        invalid_message = 'Formato JSON inválido. Debe ser una lista o un objeto con propiedad "data"'
+        first_char = self.peek()
+
+        if first_char == '[':
+            yield from self.iter_array()
+            return
+
+        if first_char != '{':
+            raise ValueError(invalid_message)
+
+        self.pos += 1
+        while self.peek() not in ('}', None):
+            key = self.decode()
+            self.expect(':')
+
+            if key == 'data':
+                if self.peek() != '[':
+                    raise ValueError(invalid_message)
+                yield from self.iter_array()
+                return
+
+            self.decode()
+            if self.peek() == ',':
+                self.pos += 1
+
+        raise ValueError(invalid_message)
+
+
+class JSONReader(FileReader):
+    """
+    Stream rows from a JSON file.
+
+    Accepts either a list of objects or an object with a "data" property
+    holding that list. Rows are decoded one object at a time and numbered
+    from 1 in list order. The row count is unknown until parsed. A row
+    larger than max_row_size characters is rejected instead of being read
+    into memory.
+    """
+
+    def __init__(self, file_path, chunk_size=64 * 1024, max_row_size=16 * 1024 * 1024, opener=None):
+        super().__init__(file_path, opener=opener)
+        self.chunk_size = chunk_size
+        self.max_row_size = max_row_size
+
+    @classmethod
+    def get_options(cls, importer_class):
+        """Read json_max_row_size from the importer Meta or FLEX_IMPORTER_JSON_MAX_ROW_SIZE"""
+        return {'max_row_size': get_importer_setting(
+            importer_class, 'json_max_row_size', 'FLEX_IMPORTER_JSON_MAX_ROW_SIZE', 16 * 1024 * 1024
+        )}
+
+    def __iter__(self):
+        with self.open_text(encoding='utf-8') as f:
+            stream = JSONStream(f, chunk_size=self.chunk_size, max_value_size=self.max_row_size)
+
+            for idx, row in enumerate(stream.iter_rows(), start=1):
+                if not isinstance(row, dict):
+                    raise ValueError(f'Formato JSON inválido: la fila {idx} no es un objeto')
+
+                row['_row_number'] = idx
+                yield row
+
+
+class JSONLReader(FileReader):
+    """
+    Stream rows from a JSON Lines (NDJSON) file.
+
+    Each non-blank line holds one JSON object and '_row_number' is its line
+    number. A reader of a plain file can be limited to the byte range
+    [start, end), which must begin at a line start; first_line is the line
+    number at start. Use split_ranges() to compute such ranges for parallel
+    processing.
+    """
+
+    def __init__(self, file_path, start=0, end=None, first_line=1, opener=None):
+        super().__init__(file_path, opener=opener)
+        self.start = start
+        self.end = end
+        self.first_line = first_line
+
+    @classmethod
+    def split_ranges(cls, file_path, parts):
+        """
+        Split a file into at most `parts` byte ranges aligned to line starts.
+
+        Returns:
+            list: (start, end, first_line) tuples covering the whole file
+        """
+        if get_compression(file_path):
+            raise ValueError('Solo se pueden dividir archivos JSONL sin comprimir')
+
+        size = os.path.getsize(file_path)
+        boundaries = [0]
+
+        with open(file_path, 'rb') as f:
+            for part in range(1, parts):
+                offset = size * part // parts
+                if offset <= boundaries[-1]:
+                    continue
+                # Move to the start of the line following offset - 1
+                f.seek(offset - 1)
+                f.readline()
+                position = f.tell()
+                if boundaries[-1] < position < size:
+                    boundaries.append(position)
+        boundaries.append(size)
+
+        ranges = []
+        first_line = 1
+        for start, end in zip(boundaries, boundaries[1:]):
+            ranges.append((start, end, first_line))
+            # Ranges end right after a newline, so every line is complete
+            first_line += count_lines(file_path, start, end)
+        return ranges
+
+    def estimate_total(self):
+        """Estimate the number of rows by counting lines (blank lines included)"""
+        if not self.is_plain_file:
+            return None
+        return count_lines(self.file_path, self.start, self.end)
+
+    def __iter__(self):
+        return self._iter_lines()
+
+    def iter_selected(self, row_numbers):
+        """Yield the selected lines, decoding only those and stopping after the last one"""
+        if not row_numbers:
+            return
+        yield from self._iter_lines(row_numbers.__contains__, max(row_numbers))
+
+    def iter_after(self, row_number):
+        """Yield the lines after row_number, without decoding the skipped ones"""
+        return self._iter_lines(lambda line_number: line_number > row_number)
+
+    def _iter_lines(self, wanted=None, last_line=None):
+        """Decode the lines whose number passes wanted(), up to last_line"""
+        with self.open_binary() as f:
+            if self.start:
+                f.seek(self.start)
+            position = self.start
+
+            for line_number, line in enumerate(f, start=self.first_line):
+                if self.end is not None and position >= self.end:
+                    break
+                if last_line is not None and line_number > last_line:
+                    break
+                position += len(line)
+
+                if wanted is not None and not wanted(line_number):
+                    continue
+                if not line.strip():
+                    continue
+
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f'Línea {line_number}: JSON inválido ({e})')
+
+                if not isinstance(row, dict):
+                    raise ValueError(f'Línea {line_number}: se esperaba un objeto JSON')
+
+                row['_row_number'] = line_number
+                yield row
+
+
+class ZipArchiveReader(BaseReader):
+    """
+    Read the members of a zip archive as one logical import.
+
+    Every member with the expected extension is streamed, in archive order,
+    through the reader class of the import format without being extracted
+    to disk. Rows keep the numbering of their own member and carry the
+    member name under '_source'.
+    """
+
+    def __init__(self, file_path, reader_class, extension, **reader_options):
+        self.file_path = file_path
+        self.reader_class = reader_class
+        self.extension = f'.{extension.lower()}'
+        self.reader_options = reader_options
+
+    def get_members(self, archive):
+        """Get the member names to import, in archive order"""
+        members = []
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith('__MACOSX/') or os.path.basename(name).startswith('.'):
+                continue
+            if name.lower().endswith(self.extension):
+                members.append(name)
+
+        if not members:
+            raise ValueError(f'El archivo ZIP no contiene archivos {self.extension}')
+        return members
+
+    def __iter__(self):
+        with zipfile.ZipFile(self.file_path) as archive:
+            for name in self.get_members(archive):
+                reader = self.reader_class(
+                    self.file_path,
+                    opener=lambda name=name: archive.open(name),
+                    **self.reader_options
+                )
+                for row in reader:
+                    row['_source'] = name
+                    yield row
+
+    def list_members(self):
+        """Get the member names to import, in archive order"""
+        with zipfile.ZipFile(self.file_path) as archive:
+            return self.get_members(archive)
+
+    def iter_selected(self, row_numbers):
+        """
+        Yield the selected rows of every member.
+
+        Args:
+            row_numbers: {member name: set of row numbers}; members without
+                selected rows are not opened
+        """
+        with zipfile.ZipFile(self.file_path) as archive:
+            for name in self.get_members(archive):
+                if not row_numbers.get(name):
+                    continue
+                reader = self.reader_class(
+                    self.file_path,
+                    opener=lambda name=name: archive.open(name),
+                    **self.reader_options
+                )
+                for row in reader.iter_selected(row_numbers[name]):
+                    row['_source'] = name
+                    yield row
+
+    def iter_after(self, row_number, source=''):
+        """
+        Yield the rows after row `row_number` of member `source`.
+
+        Members before `source` are not opened, the rest are read whole.
+        """
+        with zipfile.ZipFile(self.file_path) as archive:
+            members = self.get_members(archive)
+            if source in members:
+                members = members[members.index(source):]
+            for name in members:
+                reader = self.reader_class(
+                    self.file_path,
+                    opener=lambda name=name: archive.open(name),
+                    **self.reader_options
+                )
+                rows = reader.iter_after(row_number) if name == source else iter(reader)
+                for row in rows:
+                    row['_source'] = name
+                    yield row
+
+
+class ReaderRegistry:
+    """
+    Registry of reader classes by file format.
+
+    Built-in formats are registered below. Third-party formats can register
+    their own reader class, and a deployment can swap the reader of any
+    format with the FLEX_IMPORTER_READERS setting, e.g.:
+
+        FLEX_IMPORTER_READERS = {'csv': 'myproject.readers.FastCSVReader'}
+    """
+
+    def __init__(self):
+        self._registry = {}
+
+    def register(self, file_format, reader_class=None, verbose_name=None):
+        """
+        Register a reader class for a file format.
+
+        Can also be used as a class decorator:
+
+            @reader_registry.register('parquet', verbose_name='Parquet')
+            class ParquetReader(FileReader):
+                ...
+        """
+        if reader_class is None:
+            def decorator(cls):
+                self.register(file_format, cls, verbose_name)
+                return cls
+            return decorator
+
+        self._registry[file_format] = (reader_class, verbose_name or file_format.upper())
+        return reader_class
+
+    def get_all_readers(self):
+        """Get all registered readers as {file_format: reader_class}"""
+        return {file_format: self.get_reader(file_format) for file_format in self._registry}
+
+    def get_reader(self, file_format):
+        """Get the reader class for a file format, honoring FLEX_IMPORTER_READERS"""
+        from django.conf import settings
+        from django.utils.module_loading import import_string
+
+        overrides = getattr(settings, 'FLEX_IMPORTER_READERS', {})
+        if file_format in overrides:
+            return import_string(overrides[file_format])
+
+        entry = self._registry.get(file_format)
+        return entry[0] if entry else None
+
+    def get_format_choices(self):
+        """Get choices for Django select field"""
+        return [(file_format, verbose_name) for file_format, (_, verbose_name) in self._registry.items()]
+
+
+reader_registry = ReaderRegistry()
+reader_registry.register('xlsx', XLSXReader, 'Excel (XLSX)')
+reader_registry.register('csv', CSVReader, 'CSV')
+reader_registry.register('json', JSONReader, 'JSON')
+reader_registry.register('jsonl', JSONLReader, 'JSON Lines (JSONL)')
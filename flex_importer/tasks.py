@@ -5,15 +5,17 @@ from .processor import ImportProcessor
 from .models import ImportJob
 
 
-def process_import_sync(import_job_id):
+def process_import_sync(import_job_id, resume=False):
     """
     Synchronous fallback when Celery is not available.
     This is called directly when Celery is not configured.
+
+    With resume=True an interrupted job continues after its checkpoint.
     """
     try:
         import_job = ImportJob.objects.get(id=import_job_id)
         processor = ImportProcessor(import_job)
-        processor.process()
+        processor.process(resume=resume)
         return True
     except ImportJob.DoesNotExist:
         return False
@@ -23,20 +25,75 @@ def process_import_sync(import_job_id):
 
 try:
     # Try to import Celery
-    from celery import shared_task
+    from celery import chord, shared_task
 
     @shared_task(bind=True, name='flex_importer.process_import')
-    def process_import_async(self, import_job_id):
+    def process_import_async(self, import_job_id, resume=False):
         """
         Asynchronous task for processing imports with Celery.
 
+        Large files of importers with fanout_chunks are split into chunk
+        tasks (see fan_out_import); other jobs are processed here.
+
         Args:
             import_job_id: ID of the ImportJob to process
+            resume: Continue an interrupted job after its checkpoint
+
+        Returns:
+            bool: True if successful (or fanned out), False otherwise
+        """
+        if not resume and fan_out_import(import_job_id):
+            return True
+        return process_import_sync(import_job_id, resume=resume)
+
+    def fan_out_import(import_job_id):
+        """
+        Dispatch a large job as a chord of chunk tasks.
+
+        Each process_import_chunk task adds its counters to the job; the
+        finish_import_chunks callback sets the final status once all of them
+        are done. Chords need a Celery result backend.
+
+        Returns:
+            bool: True if the chunks were dispatched, False if the job must
+            be processed in a single task
+        """
+        try:
+            import_job = ImportJob.objects.get(id=import_job_id)
+            chunks = ImportProcessor(import_job).start_fanout()
+        except Exception:
+            # process_import_sync reports the error on the job
+            return False
+        if not chunks:
+            return False
+
+        chord(
+            process_import_chunk.s(import_job_id, chunk) for chunk in chunks
+        )(finish_import_chunks.s(import_job_id))
+        return True
+
+    @shared_task(name='flex_importer.process_import_chunk')
+    def process_import_chunk(import_job_id, chunk):
+        """
+        Process one range of a fanned-out job.
+
+        Returns:
+            dict: Chunk result for finish_import_chunks ({'error': ...})
+        """
+        import_job = ImportJob.objects.get(id=import_job_id)
+        return ImportProcessor(import_job).process_chunk(chunk)
+
+    @shared_task(name='flex_importer.finish_import_chunks')
+    def finish_import_chunks(results, import_job_id):
+        """
+        Chord callback setting the final status of a fanned-out job.
 
         Returns:
-            bool: True if successful, False otherwise
+            bool: True unless some chunk failed
         """
-        return process_import_sync(import_job_id)
+        import_job = ImportJob.objects.get(id=import_job_id)
+        ImportProcessor(import_job).finish_fanout(results)
+        return not any(result['error'] for result in results)
 
     @shared_task(name='flex_importer.cleanup_stalled_imports')
     def cleanup_stalled_imports_task(timeout_minutes=10):
@@ -52,25 +109,15 @@ try:
         Returns:
             int: Number of jobs marked as failed
         """
-        marked_count = 0
-        stalled_jobs = []
-
-        # Find stalled jobs
-        for job in ImportJob.objects.filter(status__in=['pending', 'processing']):
-            if job.is_stalled(timeout_minutes):
-                stalled_jobs.append(job)
-
-        # Mark them as failed
-        for job in stalled_jobs:
-            if job.mark_as_failed_if_stalled(timeout_minutes):
-                marked_count += 1
-
-        return marked_count
+        return ImportJob.objects.mark_stalled_as_failed(timeout_minutes)
 
     CELERY_AVAILABLE = True
 
 except ImportError:
     # Celery is not installed or configured
     process_import_async = None
+    fan_out_import = None
+    process_import_chunk = None
+    finish_import_chunks = None
     cleanup_stalled_imports_task = None
     CELERY_AVAILABLE = False
@@ -3,6 +3,28 @@ Utility functions for flex_importer
 """
 
 
+def get_importer_setting(importer_class, meta_attr, setting_name, default):
+    """
+    Resolve an option from the importer Meta, then Django settings, then default.
+
+    Args:
+        importer_class: The importer class (may be None)
+        meta_attr: Attribute name in the importer Meta (e.g. 'batch_size')
+        setting_name: Django setting name (e.g. 'FLEX_IMPORTER_BATCH_SIZE')
+        default: Value used when neither defines the option
+
+    Returns:
+        The resolved option value
+    """
+    from django.conf import settings
+
+    meta = getattr(importer_class, 'Meta', None)
+    value = getattr(meta, meta_attr, None)
+    if value is not None:
+        return value
+    return getattr(settings, setting_name, default)
+
+
 def is_celery_available():
     """
     Check if Celery is available and properly configured.